@@ -0,0 +1,197 @@
+from functools import partial
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import QueryDict
+
+from .bulk import apply_queryset_action
+from .cache import bump_list_version
+from .country_index import sorted_country_choices
+from .models import Destination, UserProfile
+from .pagination import EstimatedCountPaginator
+from .search import match_destinations
+from .sharding import route_to, shard_aliases, shard_for, sharding_enabled
+from .stats import StatsDelta, apply_delta
+
+
+# ==============================
+# 🛠️ ADMIN FOR LARGE TABLES
+# ==============================
+# Every changelist here has to stay fast with millions of rows:
+#   • counts come from the planner (EstimatedCountPaginator) and the
+#     "N total" COUNT(*) is switched off (show_full_result_count)
+#   • owners are joined in the same query (list_select_related) and picked
+#     with autocomplete instead of a <select> of every user
+#   • filters list fixed choices (no DISTINCT scan) and hit the
+#     (status, -id) / (location, -id) indexes with ordering by -id
+#   • search goes through the search_text indexes (accounts/search.py)
+#   • bulk actions are set-based (accounts/bulk.py) and keep the travel
+#     stats and list caches right, like the bulk toolbar on the list page
+#   • with sharding, the destination changelist shows one shard at a time
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+# ==============================
+# 👤 USERS (autocomplete source)
+# ==============================
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class WanderlistUserAdmin(LargeTableAdmin, UserAdmin):
+    # Keeps UserAdmin's search_fields (username, names, email), which the
+    # destination owner autocomplete searches too.
+    ordering = ("-id",)
+
+
+# ==============================
+# 🌍 DESTINATIONS
+# ==============================
+class DestinationActionForm(ActionForm):
+    country = forms.ChoiceField(
+        required=False,
+        label="Country",
+        help_text="Used by “Set country”; leave empty to clear.",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["country"].choices = [("", "—"), *sorted_country_choices()]
+
+
+def _status_action(status):
+    def action(modeladmin, request, queryset):
+        modeladmin.run_bulk_action(request, queryset, "set_status", status)
+
+    action.__name__ = f"mark_{status.lower()}"
+    return admin.action(description=f"Mark selected as {status}")(action)
+
+
+@admin.register(Destination)
+class DestinationAdmin(LargeTableAdmin):
+    list_display = ("name", "user", "city", "location", "status", "updated_at")
+    list_select_related = ("user",)
+    list_filter = ("status", "location")
+    ordering = ("-id",)
+    autocomplete_fields = ("user",)
+    search_fields = ("search_text",)
+    search_help_text = "Name, city or country."
+    readonly_fields = ("created_at", "updated_at")
+    action_form = DestinationActionForm
+    actions = [*(_status_action(status) for status, _ in Destination.STATUS_CHOICES), "set_country"]
+
+    def get_search_results(self, request, queryset, search_term):
+        return match_destinations(queryset, search_term), False
+
+    @admin.action(description="Set country of selected destinations")
+    def set_country(self, request, queryset):
+        self.run_bulk_action(request, queryset, "set_country", request.POST.get("country"))
+
+    def run_bulk_action(self, request, queryset, action, value):
+        touched = apply_queryset_action(queryset, action, value)
+        self.message_user(request, f"✅ Updated {touched} destination(s).", messages.SUCCESS)
+
+    def delete_queryset(self, request, queryset):
+        apply_queryset_action(queryset, "delete")
+
+    def delete_model(self, request, obj):
+        apply_queryset_action(Destination.objects.using(obj._state.db).filter(pk=obj.pk), "delete")
+
+    def save_model(self, request, obj, form, change):
+        """Save, then adjust the travel stats of the old and new owner."""
+        db = obj._state.db if change else shard_for(obj.user_id)
+        with route_to(db), transaction.atomic(using=db):
+            old = None
+            if change:
+                old = (
+                    Destination.objects.using(db).select_for_update()
+                    .values_list("user_id", "status", "location")
+                    .get(pk=obj.pk)
+                )
+            super().save_model(request, obj, form, change)
+
+            deltas = {}
+            if old:
+                deltas.setdefault(old[0], StatsDelta()).deleted(old[1], old[2])
+            deltas.setdefault(obj.user_id, StatsDelta()).created(obj.status, obj.location)
+            for user_id, delta in deltas.items():
+                apply_delta(user_id, delta)
+                # post_save only bumps the new owner
+                transaction.on_commit(partial(bump_list_version, user_id), using=db)
+
+    # ----- sharding: one shard per changelist, chosen with the filter -----
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request).using(_selected_shard(request))
+        if sharding_enabled():
+            queryset = queryset.prefetch_related("user")
+        return queryset
+
+    def get_list_select_related(self, request):
+        # auth_user isn't on the shards; owners are prefetched from "default" instead.
+        return () if sharding_enabled() else self.list_select_related
+
+    def get_list_filter(self, request):
+        return (ShardFilter, *self.list_filter) if sharding_enabled() else self.list_filter
+
+    def get_readonly_fields(self, request, obj=None):
+        # Reassigning a row to a user on another shard would strand it.
+        if obj is not None and sharding_enabled():
+            return (*self.readonly_fields, "user")
+        return self.readonly_fields
+
+
+def _selected_shard(request):
+    """Shard picked in the changelist filter, also on change/delete pages reached from it."""
+    shard = request.GET.get(ShardFilter.parameter_name)
+    if shard is None:
+        preserved = QueryDict(request.GET.get("_changelist_filters", ""))
+        shard = preserved.get(ShardFilter.parameter_name)
+    aliases = shard_aliases()
+    return shard if shard in aliases else aliases[0]
+
+
+class ShardFilter(admin.SimpleListFilter):
+    title = "shard"
+    parameter_name = "shard"
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in shard_aliases()]
+
+    def choices(self, changelist):
+        # No "All": a changelist pages through one shard (see shard_summary() for totals).
+        for lookup, title in self.lookup_choices:
+            yield {
+                "selected": self.value() == lookup or (self.value() is None and lookup == self.lookup_choices[0][0]),
+                "query_string": changelist.get_query_string({self.parameter_name: lookup}),
+                "display": title,
+            }
+
+    def queryset(self, request, queryset):
+        return queryset  # applied in DestinationAdmin.get_queryset via .using()
+
+
+# ==============================
+# 🙍 PROFILES
+# ==============================
+@admin.register(UserProfile)
+class UserProfileAdmin(LargeTableAdmin):
+    list_display = ("user", "username", "email", "updated_at")
+    list_select_related = ("user",)
+    ordering = ("-id",)
+    search_fields = ("username", "email")
+    search_help_text = "Username or email."
+    # Profiles are created and kept in sync by the User post_save receiver.
+    readonly_fields = ("user", "username", "email", "picture_hash", "created_at", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
+
@@ -0,0 +1,375 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import condition, require_GET, require_POST
+
+from .cache import bump_list_version
+from .country_index import match_countries
+from .gazetteer import complete_city
+from .models import Destination
+from .pagination import MAX_PAGE_SIZE, paginate_destinations, parse_page_size
+from .sharding import atomic_for, shard_for
+from .stats import StatsDelta, apply_delta
+from .sync import changes_since, record_tombstones
+from .transfer import IMPORT_FIELDS, clean_row
+
+
+# ==============================
+# 🔌 JSON API FOR DESTINATIONS
+# ==============================
+# Session-authenticated, scoped to request.user like the HTML views.
+# List responses carry an ETag/Last-Modified derived from the user's
+# max(updated_at) and row count, so an unchanged list answers 304 from a
+# single aggregate query without serializing anything.
+
+API_FIELDS = ("id", "name", "location", "country", "city", "status", "created_at", "updated_at")
+MAX_BATCH_OPERATIONS = 500
+
+
+def api_login_required(view_func):
+    """Like login_required, but answers 401 JSON instead of redirecting."""
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        return view_func(request, *args, **kwargs)
+    return _wrapped
+
+
+def parse_fields(value):
+    """Sparse fieldset from ?fields=a,b (unknown names ignored, id always kept)."""
+    if not value:
+        return API_FIELDS
+    requested = {name.strip() for name in value.split(",")}
+    return tuple(name for name in API_FIELDS if name in requested or name == "id")
+
+
+def serialize(destination, fields=API_FIELDS):
+    data = {}
+    for name in fields:
+        if name == "location":
+            data[name] = destination.location.code or None
+        elif name == "country":
+            data[name] = destination.location.name or None
+        elif name in ("created_at", "updated_at"):
+            data[name] = getattr(destination, name).isoformat()
+        else:
+            data[name] = getattr(destination, name)
+    return data
+
+
+def _list_state(request):
+    """(max updated_at, row count) for the user's list, computed once per request."""
+    if not hasattr(request, "_destination_list_state"):
+        state = Destination.objects.filter(user=request.user).aggregate(
+            last=Max("updated_at"), count=Count("id")
+        )
+        request._destination_list_state = (state["last"], state["count"])
+    return request._destination_list_state
+
+
+def _list_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    last, count = _list_state(request)
+    stamp = last.isoformat() if last else "-"
+    raw = f"{request.user.pk}:{stamp}:{count}:{request.GET.urlencode()}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _list_last_modified(request):
+    if not request.user.is_authenticated:
+        return None
+    return _aware(_list_state(request)[0])
+
+
+def _aware(value):
+    """
+    Stored timestamps are naive local time (USE_TZ = False), which
+    condition() would read as UTC; attach the current time zone.
+    """
+    if value is None or timezone.is_aware(value):
+        return value
+    return timezone.make_aware(value)
+
+
+def _detail_row(request, pk):
+    """The requested destination (or None), fetched once per request."""
+    if not hasattr(request, "_destination_detail"):
+        request._destination_detail = (
+            Destination.objects.filter(pk=pk, user=request.user).first()
+            if request.user.is_authenticated else None
+        )
+    return request._destination_detail
+
+
+def _detail_etag(request, pk):
+    destination = _detail_row(request, pk)
+    if destination is None:
+        return None
+    raw = f"{destination.pk}:{destination.updated_at.isoformat()}:{request.GET.urlencode()}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _detail_last_modified(request, pk):
+    destination = _detail_row(request, pk)
+    return _aware(destination.updated_at) if destination else None
+
+
+# ==============================
+# 📄 READ ENDPOINTS
+# ==============================
+@api_login_required
+@require_GET
+@condition(etag_func=_list_etag, last_modified_func=_list_last_modified)
+def destination_list_api(request):
+    """
+    GET /api/destinations/?fields=&after=&before=&size=
+    Keyset-paginated like the HTML list; 304 when the list is unchanged.
+    """
+    fields = parse_fields(request.GET.get("fields"))
+    page = paginate_destinations(
+        Destination.objects.filter(user=request.user),
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        page_size=parse_page_size(
+            request.GET.get("size"),
+            default=getattr(settings, "DESTINATIONS_PAGE_SIZE", 25),
+        ),
+    )
+    return JsonResponse({
+        "results": [serialize(d, fields) for d in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    })
+
+
+@api_login_required
+@require_GET
+def destination_sync_api(request):
+    """
+    GET /api/destinations/sync/?cursor=&size=&fields=
+    Destinations changed and ids deleted since `cursor` (omit it for a
+    first full sync). Call again with the returned cursor while `more`;
+    on `reset` drop local data first, the cursor was too old.
+    """
+    rows, deleted, cursor, more, reset = changes_since(
+        request.user,
+        request.GET.get("cursor"),
+        parse_page_size(request.GET.get("size"), default=MAX_PAGE_SIZE),
+    )
+    fields = parse_fields(request.GET.get("fields"))
+    return JsonResponse({
+        "changed": [serialize(d, fields) for d in rows],
+        "deleted": deleted,
+        "cursor": cursor,
+        "more": more,
+        "reset": reset,
+    })
+
+
+@api_login_required
+@require_GET
+@condition(etag_func=_detail_etag, last_modified_func=_detail_last_modified)
+def destination_detail_api(request, pk):
+    """GET /api/destinations/<pk>/ with ETag/Last-Modified from the row; 304 when unchanged."""
+    destination = _detail_row(request, pk)
+    if destination is None:
+        return JsonResponse({"error": "Not found."}, status=404)
+    return JsonResponse(serialize(destination, parse_fields(request.GET.get("fields"))))
+
+
+# ==============================
+# 🔤 TYPEAHEAD
+# ==============================
+TYPEAHEAD_LIMIT = 10
+
+
+@api_login_required
+@require_GET
+def typeahead_api(request):
+    """
+    GET /api/typeahead/?q=&country=
+    Countries from the in-memory prefix index; cities already in the
+    user's destinations first, then gazetteer matches (both optionally
+    limited to one country).
+    """
+    prefix = request.GET.get("q", "").strip()
+    if not prefix:
+        return JsonResponse({"countries": [], "cities": []})
+
+    own = Destination.objects.filter(user=request.user, city__istartswith=prefix)
+    country = request.GET.get("country")
+    if country:
+        own = own.filter(location=country)
+    cities = list(own.order_by("city").values_list("city", flat=True).distinct()[:TYPEAHEAD_LIMIT])
+    for city in complete_city(prefix, country, limit=TYPEAHEAD_LIMIT):
+        if len(cities) >= TYPEAHEAD_LIMIT:
+            break
+        if city not in cities:
+            cities.append(city)
+
+    response = JsonResponse({
+        "countries": match_countries(prefix, limit=TYPEAHEAD_LIMIT),
+        "cities": cities,
+    })
+    response["Cache-Control"] = "private, max-age=60"
+    return response
+
+
+# ==============================
+# 🧺 BATCH MUTATIONS
+# ==============================
+class BatchError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _clean_partial(row, existing):
+    """Validate an update: unspecified fields keep their current values."""
+    merged = {name: row.get(name, getattr(existing, name)) for name in IMPORT_FIELDS}
+    if hasattr(merged["location"], "code"):
+        merged["location"] = merged["location"].code
+    return clean_row(merged)
+
+
+def _parse_id(value):
+    """An id from a JSON body: an int or a string of digits ("4"); None if neither."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+def _operations(payload, name):
+    value = payload.get(name)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise BatchError({name: "Expected a list."})
+    return value
+
+
+def apply_batch(user, payload):
+    """
+    Apply {"create": [...], "update": [{"id": .., ...}], "delete": [ids]}
+    for `user` in one transaction. Any invalid operation rolls back the
+    whole batch and raises BatchError with per-operation messages.
+    """
+    creates = _operations(payload, "create")
+    updates = _operations(payload, "update")
+    deletes = _operations(payload, "delete")
+    if len(creates) + len(updates) + len(deletes) > MAX_BATCH_OPERATIONS:
+        raise BatchError({"batch": f"At most {MAX_BATCH_OPERATIONS} operations per request."})
+
+    deletes = [_parse_id(pk) for pk in deletes]
+    if None in deletes:
+        raise BatchError({"delete": "Expected a list of ids."})
+    update_ids = [_parse_id(row.get("id")) if isinstance(row, dict) else None for row in updates]
+
+    errors = {}
+    # One operation per row: an update and a delete of the same id (or the
+    # same delete twice) would count the row's stats twice.
+    seen = set()
+    for pk in deletes:
+        if pk in seen:
+            errors[f"delete.{pk}"] = "Listed more than once."
+        seen.add(pk)
+    for index, pk in enumerate(update_ids):
+        if pk in seen:
+            errors[f"update.{index}"] = "Also deleted in this batch."
+    if errors:
+        raise BatchError(errors)
+
+    delta = StatsDelta()
+    with atomic_for(user):
+        new_rows = []
+        for index, row in enumerate(creates):
+            if not isinstance(row, dict):
+                errors[f"create.{index}"] = "Expected an object."
+                continue
+            try:
+                destination = Destination(user=user, **clean_row(row))
+                destination.refresh_search_text()
+            except (ValidationError, AttributeError) as exc:
+                errors[f"create.{index}"] = getattr(exc, "message_dict", str(exc))
+                continue
+            new_rows.append(destination)
+            delta.created(destination.status, destination.location)
+
+        existing = Destination.objects.filter(user=user).in_bulk([pk for pk in update_ids if pk is not None])
+        changed = []
+        for index, (row, pk) in enumerate(zip(updates, update_ids)):
+            if pk is None:
+                errors[f"update.{index}"] = "Expected an object with a numeric id."
+                continue
+            destination = existing.get(pk)
+            if destination is None:
+                errors[f"update.{index}"] = "Not found."
+                continue
+            old_status, old_location = destination.status, destination.location
+            try:
+                cleaned = _clean_partial(row, destination)
+            except ValidationError as exc:
+                errors[f"update.{index}"] = exc.message_dict
+                continue
+            for name, value in cleaned.items():
+                setattr(destination, name, value)
+            destination.updated_at = timezone.now()
+            destination.refresh_search_text()
+            changed.append(destination)
+            delta.changed(old_status, old_location, destination.status, destination.location)
+
+        doomed = list(
+            Destination.objects.filter(user=user, pk__in=deletes).values_list("pk", "status", "location")
+        )
+        missing = set(deletes) - {pk for pk, _, _ in doomed}
+        for pk in missing:
+            errors[f"delete.{pk}"] = "Not found."
+
+        if errors:
+            raise BatchError(errors)
+
+        created = Destination.objects.bulk_create(new_rows)
+        Destination.objects.bulk_update(changed, [*IMPORT_FIELDS, "updated_at", "search_text"])
+        Destination.objects.filter(user=user, pk__in=[pk for pk, _, _ in doomed]).delete()
+        record_tombstones(user, [pk for pk, _, _ in doomed])
+        for _, status, location in doomed:
+            delta.deleted(status, location)
+        apply_delta(user, delta)
+        transaction.on_commit(lambda: bump_list_version(user.pk), using=shard_for(user))
+
+    return {
+        "created": [serialize(d) for d in created],
+        "updated": [serialize(d) for d in changed],
+        "deleted": [pk for pk, _, _ in doomed],
+    }
+
+
+@api_login_required
+@require_POST
+def destination_batch_api(request):
+    """POST /api/destinations/batch/ — many creates/updates/deletes in one round-trip."""
+    try:
+        payload = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Body must be JSON."}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({"error": "Body must be a JSON object."}, status=400)
+
+    try:
+        result = apply_batch(request.user, payload)
+    except BatchError as exc:
+        return JsonResponse({"errors": exc.errors}, status=400)
+    return JsonResponse(result)
@@ -0,0 +1,231 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import alogin
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.vary import vary_on_headers
+
+from .bulk import bulk_context
+from .cache import aget_cached_list, aget_list_version, aset_cached_list, fill_naturaltime, list_cache_key
+from .forms import CustomAuthenticationForm, DestinationForm
+from .fragments import FRAGMENT_HEADER, form_status, form_template, row_fragment, wants_fragment
+from .hashing import HashingBusy
+from .models import Destination
+from .pagination import apaginate_destinations, parse_page_size
+from .rows import destination_rows
+from .sharding import atomic_for
+from .stats import record_changed, record_created, record_deleted
+from .sync import record_tombstones
+from .throttle import areset_login_throttle, athrottle_login, login_refused
+
+
+# ============================
+# ⚡ ASYNC DESTINATION VIEWS (ASGI)
+# ============================
+# Drop-in async versions of the destination CRUD views in views.py, used
+# when ASYNC_VIEWS is on (see accounts/urls.py). Reads use the async ORM
+# directly; writes that must share a transaction with the stats update run
+# in one sync_to_async call, since the async ORM has no transaction API.
+
+
+async def _auser(request):
+    """
+    Resolve the user asynchronously and pin it on the request, so templates
+    reading `user` (auth context processor) don't trigger a sync DB lookup.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
+async def _aget_destination(pk, user):
+    try:
+        return await Destination.objects.aget(pk=pk, user=user)
+    except Destination.DoesNotExist:
+        raise Http404("No Destination matches the given query.")
+
+
+@sync_to_async
+def _save_created(user, destination):
+    with atomic_for(user):
+        destination.save()
+        record_created(user, destination)
+
+
+@sync_to_async
+def _save_updated(user, form, old_status, old_location):
+    with atomic_for(user):
+        destination = form.save()
+        record_changed(user, old_status, old_location, destination)
+    return destination
+
+
+@sync_to_async
+def _delete(user, destination):
+    pk = destination.pk
+    with atomic_for(user):
+        destination.delete()
+        record_deleted(user, destination)
+        record_tombstones(user, [pk])
+
+
+@csrf_protect
+async def login_view(request):
+    """
+    Async login_view. Credential checking (the PBKDF2 hash) runs in a
+    worker thread so it never blocks the event loop; throttling and the
+    hashing pool limits apply as in views.login_view.
+    """
+    await _auser(request)
+    if request.method == "POST":
+        refused = await athrottle_login(request, request.POST.get("username", ""))
+        if refused:
+            return login_refused(request, 429, refused[1])
+        form = CustomAuthenticationForm(request, data=request.POST)
+        try:
+            valid = await sync_to_async(form.is_valid)()
+        except HashingBusy:
+            return login_refused(request, 503, 1)
+        if valid:
+            user = form.get_user()
+            await areset_login_throttle(user.get_username())
+            await alogin(request, user)
+            messages.success(request, f"👋 Welcome back, {user.username}!")
+            next_page = request.GET.get("next", "destination_list")
+            return redirect(next_page)
+        else:
+            messages.error(request, "❌ Invalid username or password.")
+    else:
+        form = CustomAuthenticationForm()
+
+    return render(request, "login.html", {"form": form})
+
+
+@login_required
+async def destination_list(request):
+    """
+    Async destination_list: same keyset pages and versioned table cache.
+    """
+    user = await _auser(request)
+    page_size = parse_page_size(
+        request.GET.get("size"),
+        default=getattr(settings, "DESTINATIONS_PAGE_SIZE", 25),
+    )
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+
+    version = await aget_list_version(user.pk)
+    cache_key = list_cache_key(user.pk, version, after, before, page_size)
+    table_html = await aget_cached_list(cache_key)
+    if table_html is None:
+        page = await apaginate_destinations(
+            destination_rows(Destination.objects.filter(user=user)),
+            after=after,
+            before=before,
+            page_size=page_size,
+        )
+        table_html = render_to_string(
+            "destinations/_destination_table.html",
+            {"destinations": page, "page": page, "page_size": page_size},
+        )
+        await aset_cached_list(cache_key, table_html)
+
+    return render(
+        request,
+        "destinations/destination_list.html",
+        {
+            "table_html": mark_safe(fill_naturaltime(table_html)),
+            "page_size": page_size,
+            **bulk_context(),
+        },
+    )
+
+
+@login_required
+@csrf_protect
+@vary_on_headers(FRAGMENT_HEADER)
+async def destination_create(request):
+    """
+    Async destination_create.
+    """
+    if request.method == "POST":
+        form = DestinationForm(request.POST)
+        if form.is_valid():
+            destination = form.save(commit=False)
+            destination.user = await _auser(request)
+            await _save_created(destination.user, destination)
+            messages.success(request, f"✅ '{destination.name}' added successfully!")
+            if wants_fragment(request):
+                return await sync_to_async(row_fragment)(request, "create", destination.pk, destination)
+            return redirect("destination_list")
+        else:
+            messages.error(request, "⚠️ Please correct the form errors below.")
+    else:
+        form = DestinationForm()
+
+    return render(request, form_template(request), {"form": form}, status=form_status(request, form))
+
+
+@login_required
+@csrf_protect
+@vary_on_headers(FRAGMENT_HEADER)
+async def destination_update(request, pk):
+    """
+    Async destination_update.
+    """
+    user = await _auser(request)
+    destination = await _aget_destination(pk, user)
+
+    if request.method == "POST":
+        old_status, old_location = destination.status, destination.location
+        form = DestinationForm(request.POST, instance=destination)
+        if form.is_valid():
+            updated_destination = await _save_updated(user, form, old_status, old_location)
+            messages.success(
+                request,
+                f"✏️ '{updated_destination.name}' updated successfully!",
+            )
+            if wants_fragment(request):
+                return await sync_to_async(row_fragment)(
+                    request, "update", updated_destination.pk, updated_destination
+                )
+            return redirect("destination_list")
+        else:
+            messages.error(request, "⚠️ Please correct the errors below.")
+    else:
+        form = DestinationForm(instance=destination)
+
+    return render(
+        request,
+        form_template(request),
+        {"form": form, "destination": destination},
+        status=form_status(request, form),
+    )
+
+
+@login_required
+@csrf_protect
+@vary_on_headers(FRAGMENT_HEADER)
+async def destination_delete(request, pk):
+    """
+    Async destination_delete.
+    """
+    user = await _auser(request)
+    destination = await _aget_destination(pk, user)
+    if request.method == "POST":
+        name = destination.name
+        await _delete(user, destination)
+        messages.success(request, f"🗑 '{name}' deleted successfully.")
+        if wants_fragment(request):
+            return await sync_to_async(row_fragment)(request, "delete", pk)
+        return redirect("destination_list")
+
+    return render(
+        request,
+        "destinations/destination_confirm_delete.html",
+        {"destination": destination},
+    )
@@ -0,0 +1,29 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import aget_cached_user, aset_cached_user, get_cached_user, set_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that serves get_user() (run by AuthenticationMiddleware on
+    every request) from the cache. authenticate() is unchanged; the session
+    auth hash is still checked, against the HMAC cached in place of the
+    password, and the entry is invalidated whenever the User is saved (see
+    accounts.models). Enabled only with a shared cache (see settings).
+    """
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                set_cached_user(user)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        user = await aget_cached_user(user_id)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await aset_cached_user(user)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,27 @@
+import math
+
+
+# ==============================
+# ⏱ BENCHMARK HELPERS
+# ==============================
+# Shared by the bench_* management commands.
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an unsorted list (0 when empty)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """Latency percentiles (ms) and throughput for one benchmark run."""
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
@@ -0,0 +1,169 @@
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Concat
+from django.utils import timezone, translation
+from django.utils.safestring import mark_safe
+from django_countries import countries
+
+from .cache import bump_list_version, deferred_list_invalidation
+from .country_index import country_codes, country_options_html
+from .gazetteer import get_gazetteer
+from .models import Destination
+from .sharding import atomic_for, route_to
+from .stats import StatsDelta, apply_delta
+from .sync import record_tombstones
+
+
+# ==============================
+# 🧺 BULK ACTIONS ON THE LIST
+# ==============================
+# One set-based statement per action, scoped to the user's rows. The old
+# status/location of the selected rows is read once so the travel stats
+# can be adjusted with a single delta, and the list cache is bumped once
+# per batch rather than once per row. The admin runs the same actions over
+# any queryset (across users) in primary-key batches of MAX_BULK_IDS.
+# With a gazetteer loaded, "Set country" then re-spells the cities whose
+# canonical name differs in the new country, one bulk_update per batch.
+
+BULK_ACTIONS = {
+    "set_status": "Set status",
+    "set_country": "Set country",
+    "delete": "Delete",
+}
+MAX_BULK_IDS = 500
+
+
+def _search_text_for_country(code):
+    """SQL equivalent of build_search_text() for rows all moving to `code`."""
+    suffix = ""
+    if code:
+        with translation.override("en"):
+            suffix = f" {countries.name(code)} {code}"
+    return Concat(
+        F("name"),
+        Case(When(city__gt="", then=Concat(Value(" "), F("city"))), default=Value("")),
+        Value(suffix),
+    )
+
+
+def bulk_context():
+    """Template context for the bulk-action toolbar (_bulk_actions.html)."""
+    return {
+        "bulk_actions": BULK_ACTIONS,
+        "status_choices": Destination.STATUS_CHOICES,
+        "country_options": mark_safe(country_options_html()),
+    }
+
+
+def clean_bulk_value(action, value):
+    """Validate the action's argument; returns the value to store."""
+    if action == "set_status":
+        if value not in dict(Destination.STATUS_CHOICES):
+            raise ValidationError("Choose a valid status.")
+        return value
+    if action == "set_country":
+        value = (value or "").upper()
+        if value and value not in country_codes():
+            raise ValidationError("Choose a valid country.")
+        return value or None
+    if action == "delete":
+        return None
+    raise ValidationError("Choose a bulk action.")
+
+
+def apply_bulk_action(user, action, ids, value=None):
+    """
+    Apply `action` to the user's destinations with the given ids and return
+    how many rows it touched. Ids that aren't the user's are ignored.
+    """
+    value = clean_bulk_value(action, value)
+    try:
+        ids = {int(pk) for pk in ids}
+    except (TypeError, ValueError):
+        raise ValidationError("Invalid selection.")
+    if not ids:
+        return 0
+    if len(ids) > MAX_BULK_IDS:
+        raise ValidationError(f"Select at most {MAX_BULK_IDS} destinations at a time.")
+
+    with deferred_list_invalidation(), atomic_for(user):
+        return _apply(Destination.objects.filter(user=user, pk__in=ids), action, value)
+
+
+def apply_queryset_action(queryset, action, value=None, batch_size=MAX_BULK_IDS):
+    """
+    Apply `action` to every destination in `queryset`, whoever owns it, one
+    transaction per `batch_size` rows (walked by primary key, so rows that
+    stop matching the queryset's filters are not revisited). Returns how
+    many rows it touched. With sharding, `queryset` is one shard's
+    (.using()) and the owners' stats there are updated.
+    """
+    value = clean_bulk_value(action, value)
+    db = queryset.db
+    queryset = queryset.order_by("pk").values_list("pk", flat=True)
+    touched, last_pk = 0, 0
+    while True:
+        with deferred_list_invalidation(), route_to(db), transaction.atomic(using=db):
+            ids = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not ids:
+                return touched
+            last_pk = ids[-1]
+            touched += _apply(Destination.objects.using(db).filter(pk__in=ids), action, value)
+
+
+def _apply(rows, action, value):
+    """One set-based statement for `rows` plus one stats delta per owner."""
+    before = list(rows.select_for_update().values_list("pk", "user_id", "status", "location"))
+    if not before:
+        return 0
+
+    deltas = defaultdict(StatsDelta)
+    if action == "delete":
+        rows.delete()
+        deleted = defaultdict(list)
+        for pk, user_id, status, location in before:
+            deltas[user_id].deleted(status, location)
+            deleted[user_id].append(pk)
+        for user_id, ids in deleted.items():
+            record_tombstones(user_id, ids)
+    elif action == "set_status":
+        rows.update(status=value, updated_at=timezone.now())
+        for _, user_id, status, location in before:
+            deltas[user_id].changed(status, location, value, location)
+    else:
+        rows.update(
+            location=value,
+            search_text=_search_text_for_country(value),
+            updated_at=timezone.now(),
+        )
+        _canonicalize_cities(rows)
+        for _, user_id, status, location in before:
+            deltas[user_id].changed(status, location, status, value)
+
+    for user_id, delta in deltas.items():
+        apply_delta(user_id, delta)
+        # QuerySet.update() sends no signals, so bump the list explicitly;
+        # deferred_list_invalidation() folds this and any per-row
+        # post_delete bumps into one.
+        bump_list_version(user_id)
+    return len(before)
+
+
+def _canonicalize_cities(rows):
+    """
+    Re-spell the cities of `rows` for their new country, row by row like
+    `load_gazetteer --canonicalize-existing` (the set-based update above
+    only rewrites the country part of search_text).
+    """
+    if get_gazetteer() is None:
+        return  # canonical_city() would only trim, and saved cities already are
+    changed = []
+    for destination in rows.exclude(city__isnull=True).exclude(city="").only("pk", "name", "city", "location"):
+        before = destination.city
+        destination.refresh_search_text()
+        if destination.city != before:
+            changed.append(destination)
+    rows.bulk_update(changed, ["city", "search_text"])
@@ -0,0 +1,184 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.humanize.templatetags.humanize import naturaltime
+from django.core.cache import cache
+from django.utils.html import escape
+
+
+# ==============================
+# 🗂 PER-USER DESTINATION LIST CACHE
+# ==============================
+# Each user has a version counter. Rendered list fragments are stored under
+# keys that include that version, so bumping the counter (from the
+# Destination post_save/post_delete receivers) makes every cached page for
+# that user unreachable at once — no key scans or explicit deletes.
+#
+# A bump only reaches the process that made it unless the cache is shared,
+# so with locmem (SHARED_CACHE off) another worker would keep serving its
+# stale copy: the rendered lists are then neither read nor stored.
+
+_NATURALTIME_RE = re.compile(r"<!--naturaltime:([0-9T:.+\- ]+)-->")
+_deferred_bumps = ContextVar("deferred_list_bumps", default=None)
+
+
+def _version_key(user_id):
+    return f"destinations:version:{user_id}"
+
+
+def get_list_version(user_id):
+    """Return the current list version for a user, creating one if missing."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed with a timestamp so an evicted counter never reuses old versions.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_list_version(user_id):
+    """Async variant of get_list_version."""
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_list_version(user_id):
+    """Invalidate every cached list page for a user."""
+    pending = _deferred_bumps.get()
+    if pending is not None:
+        pending.add(user_id)
+        return
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+@contextmanager
+def deferred_list_invalidation():
+    """
+    Collapse every bump_list_version() inside the block (e.g. one per row
+    from the post_delete receiver) into a single bump per user at exit.
+    """
+    pending = set()
+    token = _deferred_bumps.set(pending)
+    try:
+        yield
+    finally:
+        _deferred_bumps.reset(token)
+        for user_id in pending:
+            bump_list_version(user_id)
+
+
+def list_cache_key(user_id, version, *parts):
+    suffix = ":".join(str(p or "") for p in parts)
+    return f"destinations:list:{user_id}:{version}:{suffix}"
+
+
+def get_cached_list(key):
+    if not settings.SHARED_CACHE:
+        return None
+    return cache.get(key)
+
+
+def set_cached_list(key, value):
+    if settings.SHARED_CACHE:
+        cache.set(key, value, timeout=getattr(settings, "DESTINATIONS_CACHE_TIMEOUT", 600))
+
+
+async def aget_cached_list(key):
+    if not settings.SHARED_CACHE:
+        return None
+    return await cache.aget(key)
+
+
+async def aset_cached_list(key, value):
+    if settings.SHARED_CACHE:
+        await cache.aset(key, value, timeout=getattr(settings, "DESTINATIONS_CACHE_TIMEOUT", 600))
+
+
+# ==============================
+# 👤 AUTH USER CACHE
+# ==============================
+# accounts.backends.CachedModelBackend resolves request.user from here, so
+# with the cached_db session engine an authenticated page needs no session
+# or user query once both are warm. Entries are dropped on User save
+# (which covers password changes and last_login), delete and logout.
+#
+# Only the columns requests read are cached — never the password hash. The
+# session check needs just the HMAC derived from it, which is stored
+# instead. The rebuilt User has every other field deferred: reading one
+# loads it, and saving it (e.g. the profile form) writes only loaded fields.
+
+USER_CACHE_FIELDS = ("id", "username", "email", "first_name", "last_name", "is_active", "is_staff", "is_superuser")
+
+
+def _user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def _user_timeout():
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300)
+
+
+def _user_entry(user):
+    return {field: getattr(user, field) for field in USER_CACHE_FIELDS}, user.get_session_auth_hash()
+
+
+def _user_from_entry(entry):
+    if entry is None:
+        return None
+    values, session_auth_hash = entry
+    # from_db() takes the values in model field order.
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    user = User.from_db(User.objects.db, fields, [values[field] for field in fields])
+    user.get_session_auth_hash = lambda: session_auth_hash
+    return user
+
+
+def get_cached_user(user_id):
+    return _user_from_entry(cache.get(_user_key(user_id)))
+
+
+def set_cached_user(user):
+    cache.set(_user_key(user.pk), _user_entry(user), timeout=_user_timeout())
+
+
+async def aget_cached_user(user_id):
+    return _user_from_entry(await cache.aget(_user_key(user_id)))
+
+
+async def aset_cached_user(user):
+    await cache.aset(_user_key(user.pk), _user_entry(user), timeout=_user_timeout())
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+# ==============================
+# ⏱ RELATIVE TIME PLACEHOLDERS
+# ==============================
+def naturaltime_marker(value):
+    """Placeholder for naturaltime(value), resolved by fill_naturaltime()."""
+    return f"<!--naturaltime:{value.isoformat()}-->"
+
+
+def _render_naturaltime(match):
+    return str(escape(naturaltime(datetime.fromisoformat(match.group(1)))))
+
+
+def fill_naturaltime(html):
+    """Replace naturaltime placeholders with text relative to *now*."""
+    return _NATURALTIME_RE.sub(_render_naturaltime, html)
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+# ==============================
+# 🩺 DEPLOYMENT CHECKS
+# ==============================
+# Login throttling counts attempts in the cache. With locmem each worker
+# keeps its own counts, so N workers let N times the configured burst
+# through and a refill on one worker doesn't reach the others. Outside
+# DEBUG (where runserver is one process) this warns on every manage.py
+# command that runs checks (migrate, check, runserver).
+
+@register(Tags.security)
+def check_throttle_cache(app_configs, **kwargs):
+    throttled = getattr(settings, "LOGIN_THROTTLE_IP", None) or getattr(settings, "LOGIN_THROTTLE_USERNAME", None)
+    if not throttled or settings.SHARED_CACHE or settings.DEBUG:
+        return []
+    return [Warning(
+        "Login throttling counts attempts in the per-process locmem cache.",
+        hint="Set CACHE_BACKEND=redis (or file) so every worker shares the counters.",
+        id="accounts.W001",
+    )]
@@ -0,0 +1,110 @@
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+
+from django.utils import translation
+from django.utils.html import escape
+from django_countries import countries
+
+
+# ==============================
+# 🌍 MEMOIZED COUNTRY CHOICES
+# ==============================
+# Country lists are static per language, so the sorted choices, the rendered
+# <option> markup and the typeahead prefix index are built once per
+# language per process and reused by every request.
+
+BLANK_LABEL = "Select a country"
+
+
+def _language():
+    return translation.get_language() or "en"
+
+
+def fold(text):
+    """Case- and accent-insensitive form used for prefix matching."""
+    decomposed = unicodedata.normalize("NFKD", str(text).casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=None)
+def _sorted_countries(language):
+    with translation.override(language):
+        return tuple(sorted(((code, str(name)) for code, name in countries), key=lambda c: fold(c[1])))
+
+
+def sorted_country_choices(language=None):
+    """(code, name) pairs sorted A–Z by localized name."""
+    return _sorted_countries(language or _language())
+
+
+def country_choices():
+    """Choices for DestinationForm.location: placeholder + sorted countries."""
+    return [("", BLANK_LABEL), *sorted_country_choices()]
+
+
+@lru_cache(maxsize=None)
+def _country_names(language):
+    return dict(_sorted_countries(language))
+
+
+def country_names(language=None):
+    """{code: localized name} for the active language (shared, don't mutate)."""
+    return _country_names(language or _language())
+
+
+@lru_cache(maxsize=None)
+def country_codes():
+    return frozenset(code for code, _ in countries)
+
+
+@lru_cache(maxsize=None)
+def _options_html(language):
+    options = [f'<option value="">{escape(BLANK_LABEL)}</option>']
+    options += [
+        f'<option value="{code}">{escape(name)}</option>'
+        for code, name in _sorted_countries(language)
+    ]
+    return "".join(options)
+
+
+def country_options_html(selected=None):
+    """Pre-rendered <option> list for the active language with `selected` marked."""
+    html = _options_html(_language())
+    code = str(selected or "")
+    target = f'<option value="{escape(code)}">'
+    return html.replace(target, target[:-1] + " selected>", 1)
+
+
+# ==============================
+# 🔤 TYPEAHEAD PREFIX INDEX
+# ==============================
+@lru_cache(maxsize=None)
+def _prefix_index(language):
+    """Sorted (folded word, code) entries: every word of every name, plus the code."""
+    entries = set()
+    for code, name in _sorted_countries(language):
+        entries.add((code.casefold(), code))
+        for word in fold(name).replace("-", " ").split():
+            entries.add((word, code))
+        entries.add((fold(name), code))
+    return tuple(sorted(entries))
+
+
+def match_countries(prefix, limit=10, language=None):
+    """Countries whose name (any word) or code starts with `prefix`."""
+    language = language or _language()
+    needle = fold(prefix).strip()
+    if not needle:
+        return []
+    index = _prefix_index(language)
+    names = country_names(language)
+    found = []
+    position = bisect_left(index, (needle, ""))
+    while position < len(index) and index[position][0].startswith(needle):
+        code = index[position][1]
+        if code not in found:
+            found.append(code)
+        position += 1
+    found.sort(key=lambda code: (not fold(names[code]).startswith(needle), fold(names[code])))
+    return [{"code": code, "name": names[code]} for code in found[:limit]]
@@ -2,8 +2,11 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from .models import Destination, UserProfile
-from django_countries import countries
-from django_countries.widgets import CountrySelectWidget
+from django.forms.utils import flatatt
+from django.utils.safestring import mark_safe
+from django_countries.widgets import CountrySelectWidget, LazySelect
+
+from .country_index import country_choices, country_codes, country_options_html
 
 
 # ==============================
@@ -67,14 +70,36 @@ class CustomAuthenticationForm(AuthenticationForm):
     )
 
 
+# ==============================
+# 🌍 COUNTRY SELECT (cached options)
+# ==============================
+class _CachedOptionsSelect(LazySelect):
+    """Renders <select> with pre-built option markup instead of ~250 option templates."""
+    def render(self, name, value, attrs=None, renderer=None):
+        final_attrs = self.build_attrs(self.attrs, attrs)
+        final_attrs["name"] = name
+        selected = value[0] if isinstance(value, (list, tuple)) and value else value
+        return mark_safe(f"<select{flatatt(final_attrs)}>{country_options_html(selected)}</select>")
+
+
+class CachedCountrySelectWidget(CountrySelectWidget, _CachedOptionsSelect):
+    """CountrySelectWidget (flag preview included) backed by cached option HTML."""
+
+
+class CountryChoiceField(forms.ChoiceField):
+    """Country choice with per-language memoized choices and O(1) validation."""
+    def valid_value(self, value):
+        return value in country_codes()
+
+
 # ==============================
 # 🌍 DESTINATION FORM (Sorted Country List)
 # ==============================
 class DestinationForm(forms.ModelForm):
     """Form for adding or updating travel destinations."""
-    location = forms.ChoiceField(
-        choices=[("", "Select a country")] + sorted(countries, key=lambda c: c[1]),  # A–Z list + default placeholder
-        widget=CountrySelectWidget(attrs={
+    location = CountryChoiceField(
+        choices=country_choices,  # A–Z list in the active language + default placeholder
+        widget=CachedCountrySelectWidget(attrs={
             "class": "form-select"
         }),
         required=False,
@@ -83,18 +108,25 @@ class DestinationForm(forms.ModelForm):
 
     class Meta:
         model = Destination
-        fields = ["name", "location", "status"]
+        fields = ["name", "location", "city", "status"]
         widgets = {
             "name": forms.TextInput(attrs={
                 "class": "form-control",
                 "placeholder": "Enter destination name"
             }),
+            "city": forms.TextInput(attrs={
+                "class": "form-control",
+                "placeholder": "Optional city, e.g. Tokyo",
+                "list": "city-suggestions",
+                "autocomplete": "off",
+            }),
             "status": forms.Select(attrs={
                 "class": "form-select"
             }),
         }
         labels = {
             "name": "Destination Name",
+            "city": "City",
             "status": "Status",
         }
 
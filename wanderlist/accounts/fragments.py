@@ -0,0 +1,49 @@
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from .cache import fill_naturaltime
+from .rows import DestinationRow
+
+
+# ==============================
+# 🧩 PARTIAL-PAGE RESPONSES
+# ==============================
+# When the list page's script sends "X-Fragment: 1", the destination CRUD
+# views answer with just the pieces that changed instead of redirecting to
+# a full list render:
+#   • GET create/edit     -> the bare <form> (shown in a modal)
+#   • invalid POST        -> the bare <form> with errors, status 422
+#   • successful POST     -> <template data-fragment="row"> holding the new
+#                            <tr> (empty for a delete) + the messages
+# Without the header the views behave exactly as before.
+
+FRAGMENT_HEADER = "X-Fragment"
+FORM_PAGE = "destinations/destination_form.html"
+FORM_FRAGMENT = "destinations/_destination_form.html"
+
+
+def wants_fragment(request):
+    return request.headers.get(FRAGMENT_HEADER) == "1"
+
+
+def form_template(request):
+    return FORM_FRAGMENT if wants_fragment(request) else FORM_PAGE
+
+
+def form_status(request, form):
+    """422 for a fragment request whose form didn't validate, else 200."""
+    return 422 if wants_fragment(request) and form.is_bound and form.errors else 200
+
+
+def row_fragment(request, action, pk, destination=None):
+    """Response carrying the changed row (None for a delete) plus messages."""
+    html = render_to_string(
+        "destinations/_fragment.html",
+        {
+            "action": action,
+            "pk": pk,
+            "destination": DestinationRow.from_instance(destination) if destination else None,
+        },
+        request=request,
+    )
+    return HttpResponse(fill_naturaltime(html))
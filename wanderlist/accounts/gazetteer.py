@@ -0,0 +1,284 @@
+import heapq
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+from .country_index import fold
+
+
+# ==============================
+# 🏙️ OFFLINE CITY GAZETTEER
+# ==============================
+# `manage.py load_gazetteer` turns a GeoNames dump (cities15000.txt or the
+# .zip) into one read-only index file (GAZETTEER_PATH). Every worker
+# memory-maps that file instead of loading the cities into its heap, so the
+# OS page cache holds a single shared copy and a lookup touches only the
+# handful of pages its binary search visits.
+#
+# File layout (little-endian):
+#   header   magic, place count/offset, names offset, three key sections
+#   places   (name offset, population, name length, country) per city
+#   names    canonical UTF-8 names, back to back
+#   keys     sorted key sections, each: (n+1) uint32 key offsets,
+#            n uint32 place ids, then the key bytes back to back
+#              • by-country: b"JP" + folded name   (autocomplete per country)
+#              • global:     folded name
+#              • top:        [b"JP"] + 1–3 character prefix, repeated for
+#                            its TOP_PER_PREFIX most populous cities
+# Short prefixes match too many names to rank by scanning, so they are
+# answered from the precomputed "top" section instead.
+# Folded names (see country_index.fold) include each city's ASCII and
+# alternate names, so "tokyo", "Tokyo " and "東京" all reach "Tokyo".
+
+MAGIC = b"WLGAZ01\0"
+HEADER = struct.Struct("<8sIIIIIIIII")
+PLACE = struct.Struct("<IIH2s")
+UINT32 = struct.Struct("<I")
+MAX_SCAN = 400  # prefix entries examined per autocomplete lookup
+TOP_PREFIX_LENGTH = 3
+TOP_PER_PREFIX = 20
+
+
+def normalize_key(text):
+    """Folded, whitespace-collapsed form of a city name used as index key."""
+    return " ".join(fold(text).split())
+
+
+def clean_city(text):
+    """Trimmed, whitespace-collapsed city as typed (fallback when not in the gazetteer)."""
+    return " ".join(str(text).split())
+
+
+class _KeySection:
+    def __init__(self, buffer, start, count):
+        self.buffer = buffer
+        self.count = count
+        self.offsets = start
+        self.places = start + (count + 1) * 4
+        self.blob = self.places + count * 4
+
+    def key(self, index):
+        start, end = struct.unpack_from("<II", self.buffer, self.offsets + index * 4)
+        return self.buffer[self.blob + start:self.blob + end]
+
+    def place(self, index):
+        return UINT32.unpack_from(self.buffer, self.places + index * 4)[0]
+
+    def lower_bound(self, needle):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < needle:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def with_prefix(self, prefix, limit=MAX_SCAN):
+        """Place ids of keys starting with `prefix`, in key order."""
+        index = self.lower_bound(prefix)
+        end = min(self.count, index + limit)
+        while index < end and self.key(index).startswith(prefix):
+            yield self.place(index)
+            index += 1
+
+    def exact(self, key):
+        index = self.lower_bound(key)
+        while index < self.count and self.key(index) == key:
+            yield self.place(index)
+            index += 1
+
+
+class Gazetteer:
+    """Read-only view over a memory-mapped index file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as handle:
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.place_count, self.places_offset, self.names_offset, *sections) = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a gazetteer index.")
+        by_country_count, by_country_offset, global_count, global_offset, top_count, top_offset = sections
+        self.by_country = _KeySection(self.buffer, by_country_offset, by_country_count)
+        self.by_name = _KeySection(self.buffer, global_offset, global_count)
+        self.top = _KeySection(self.buffer, top_offset, top_count)
+
+    def place(self, place_id):
+        """(name, country, population) of a place id."""
+        name_offset, population, length, country = PLACE.unpack_from(
+            self.buffer, self.places_offset + place_id * PLACE.size
+        )
+        start = self.names_offset + name_offset
+        return self.buffer[start:start + length].decode(), country.decode().strip(), population
+
+    def _section(self, country):
+        scope = _scope(country) if country else b""
+        return (self.by_country if scope else self.by_name), scope
+
+    def canonical(self, city, country=None):
+        """Canonical name for an exact (folded) match, most populous first; None if unknown."""
+        section, scope = self._section(country)
+        key = scope + normalize_key(city).encode()
+        best = None
+        for place_id in section.exact(key):
+            name, _, population = self.place(place_id)
+            if best is None or population > best[1]:
+                best = (name, population)
+        return best[0] if best else None
+
+    def complete(self, prefix, country=None, limit=10):
+        """City names starting with `prefix` (any name or alias), most populous first."""
+        needle = normalize_key(prefix)
+        if not needle:
+            return []
+        section, scope = self._section(country)
+        if len(needle) <= TOP_PREFIX_LENGTH:
+            candidates = self.top.exact(scope + needle.encode())
+        else:
+            candidates = section.with_prefix(scope + needle.encode())
+        places = {}
+        for place_id in candidates:
+            if place_id not in places:
+                places[place_id] = self.place(place_id)
+        # Cities whose own name matches come before alias-only matches.
+        ranked = sorted(
+            places.values(),
+            key=lambda place: (not normalize_key(place[0]).startswith(needle), -place[2], place[0]),
+        )
+        names = []
+        for name, _, _ in ranked:
+            if name not in names:
+                names.append(name)
+                if len(names) == limit:
+                    break
+        return names
+
+    def close(self):
+        self.buffer.close()
+
+
+# ==============================
+# 📂 PER-PROCESS HANDLE
+# ==============================
+_lock = threading.Lock()
+_loaded = {"key": None, "gazetteer": None}
+
+
+def gazetteer_path():
+    return getattr(settings, "GAZETTEER_PATH", None)
+
+
+def get_gazetteer():
+    """The mapped index for GAZETTEER_PATH, reopened when the file is replaced; None if absent."""
+    path = gazetteer_path()
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        stat = None
+    key = (str(path), stat.st_ino, stat.st_mtime_ns) if stat else None
+    if key == _loaded["key"]:
+        return _loaded["gazetteer"]
+    with _lock:
+        if key != _loaded["key"]:
+            # The old mapping stays valid for readers still holding it; it is
+            # unmapped once they drop their references.
+            _loaded["gazetteer"] = Gazetteer(path) if key else None
+            _loaded["key"] = key
+        return _loaded["gazetteer"]
+
+
+def canonical_city(city, country=None):
+    """Gazetteer spelling of `city` in `country` if known, else the trimmed input."""
+    if not city:
+        return city
+    cleaned = clean_city(city)
+    gazetteer = get_gazetteer()
+    if gazetteer is None or not cleaned:
+        return cleaned
+    return gazetteer.canonical(cleaned, getattr(country, "code", country)) or cleaned
+
+
+def complete_city(prefix, country=None, limit=10):
+    gazetteer = get_gazetteer()
+    if gazetteer is None:
+        return []
+    return gazetteer.complete(prefix, getattr(country, "code", country), limit)
+
+
+# ==============================
+# 🏗️ BUILDING THE INDEX
+# ==============================
+def write_index(path, places):
+    """
+    Write an index for `places`, an iterable of (name, country, population,
+    aliases). The file is written next to `path` and renamed into place, so
+    running workers never see a half-written index.
+    """
+    names = bytearray()
+    place_rows = []
+    by_country, by_name = set(), set()
+    top = defaultdict(list)  # prefix key -> min-heap of (population, place id)
+    for place_id, (name, country, population, aliases) in enumerate(places):
+        encoded = name.encode()[:0xFFFF]
+        scope = _scope(country)
+        population = min(int(population or 0), 0xFFFFFFFF)
+        place_rows.append(PLACE.pack(len(names), population, len(encoded), scope))
+        names += encoded
+        prefixes = set()
+        for alias in {name, *aliases}:
+            key = normalize_key(alias)
+            if key:
+                by_country.add((scope + key.encode(), place_id))
+                by_name.add((key.encode(), place_id))
+                prefixes.update(key[:length] for length in range(1, TOP_PREFIX_LENGTH + 1))
+        for prefix in prefixes:
+            for top_key in (prefix.encode(), scope + prefix.encode()):
+                heap = top[top_key]
+                if len(heap) < TOP_PER_PREFIX:
+                    heapq.heappush(heap, (population, place_id))
+                elif population > heap[0][0]:
+                    heapq.heapreplace(heap, (population, place_id))
+
+    top_entries = sorted((key, place_id) for key, heap in top.items() for _, place_id in heap)
+    key_sections = [sorted(by_country), sorted(by_name), top_entries]
+    packed = [_pack_keys(entries) for entries in key_sections]
+    places_offset = HEADER.size
+    names_offset = places_offset + len(place_rows) * PLACE.size
+    offsets = [names_offset + len(names)]
+    for section in packed:
+        offsets.append(offsets[-1] + len(section))
+
+    temporary = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(temporary, "wb") as handle:
+        handle.write(HEADER.pack(
+            MAGIC, len(place_rows), places_offset, names_offset,
+            *(value for entries, offset in zip(key_sections, offsets) for value in (len(entries), offset)),
+        ))
+        handle.writelines(place_rows)
+        handle.write(names)
+        handle.writelines(packed)
+    os.replace(temporary, path)
+    return {"places": len(place_rows), "keys": len(by_name), "bytes": offsets[-1]}
+
+
+def _scope(country):
+    """Fixed two-byte country prefix of by-country keys."""
+    return str(country).upper().encode()[:2].ljust(2)
+
+
+def _pack_keys(entries):
+    offsets, blob = [0], bytearray()
+    for key, _ in entries:
+        blob += key
+        offsets.append(len(blob))
+    return b"".join((
+        struct.pack(f"<{len(offsets)}I", *offsets),
+        struct.pack(f"<{len(entries)}I", *(place_id for _, place_id in entries)),
+        bytes(blob),
+    ))
@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from .metrics import LOGIN_REJECTIONS, PASSWORD_HASH_SECONDS, PASSWORD_HASH_WAIT_SECONDS
+
+
+# ==============================
+# 🔑 BOUNDED PASSWORD HASHING
+# ==============================
+# A pbkdf2_sha256 hash at 1,000,000 iterations costs a core for a good
+# fraction of a second. Every hash (verify, encode and the dummy hash
+# ModelBackend runs for unknown usernames) therefore runs on a small
+# per-process pool: at most PASSWORD_HASH_WORKERS at once, at most
+# PASSWORD_HASH_QUEUE_SIZE waiting, and a caller that can't start within
+# PASSWORD_HASH_QUEUE_TIMEOUT seconds gets HashingBusy instead of piling
+# onto the CPU. hashlib releases the GIL, so the pool hashes in parallel
+# while request threads serving other pages keep their share of the CPU.
+# PASSWORD_HASH_WORKERS = 0 hashes inline, unbounded (the Django default).
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+_local = threading.local()  # .in_pool is set on the pool's own threads
+
+
+class HashingBusy(Exception):
+    """The hashing pool is saturated; the caller should answer 503."""
+
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = settings.PASSWORD_HASH_WORKERS
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+            _slots = threading.BoundedSemaphore(workers + getattr(settings, "PASSWORD_HASH_QUEUE_SIZE", 8))
+    return _executor, _slots
+
+
+def run_bounded(operation, function, *args):
+    """Run `function(*args)` on the hashing pool and wait for its result."""
+    # verify() calls encode() itself; that nested call is already on the pool.
+    if getattr(settings, "PASSWORD_HASH_WORKERS", 0) <= 0 or getattr(_local, "in_pool", False):
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation)
+
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        LOGIN_REJECTIONS.inc("hash_queue_full")
+        raise HashingBusy()
+    queued = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        PASSWORD_HASH_WAIT_SECONDS.observe(started - queued, operation)
+        _local.in_pool = True
+        try:
+            return function(*args)
+        finally:
+            _local.in_pool = False
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, operation)
+
+    future = executor.submit(job)
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=getattr(settings, "PASSWORD_HASH_QUEUE_TIMEOUT", 1.0))
+    except FutureTimeout:
+        # Still queued: give up now. Already hashing: let it finish.
+        if future.cancel():
+            LOGIN_REJECTIONS.inc("hash_queue_timeout")
+            raise HashingBusy()
+        return future.result()
+
+
+class BoundedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """The stock pbkdf2_sha256 hasher (same hashes), run through run_bounded()."""
+
+    def encode(self, password, salt, iterations=None):
+        return run_bounded("encode", super().encode, password, salt, iterations)
+
+    def verify(self, password, encoded):
+        return run_bounded("verify", super().verify, password, encoded)
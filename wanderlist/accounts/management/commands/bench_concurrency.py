@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.benchmarks import summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure requests/second of running servers under many slow clients. "
+        "Example: compare `gunicorn wanderlist.wsgi` with "
+        "`ASYNC_VIEWS=True uvicorn wanderlist.asgi:application` by passing "
+        "--target wsgi=http://127.0.0.1:8000/destinations/ "
+        "--target asgi=http://127.0.0.1:8001/destinations/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True, help="label=URL (repeatable).")
+        parser.add_argument("--clients", type=int, default=200, help="Concurrent clients.")
+        parser.add_argument("--duration", type=float, default=20.0, help="Seconds per target.")
+        parser.add_argument(
+            "--slow",
+            type=float,
+            default=0.5,
+            help="Seconds each client spends trickling its request headers.",
+        )
+        parser.add_argument("--sessionid", help="Session cookie for login_required pages.")
+        parser.add_argument("--json", dest="json_path", help="Write results to this JSON file.")
+
+    def handle(self, *args, **options):
+        results = {}
+        for target in options["target"]:
+            label, _, url = target.partition("=")
+            if not url:
+                raise CommandError(f"--target must be label=URL, got {target!r}")
+            self.stdout.write(f"⏱ {label}: {options['clients']} clients for {options['duration']}s ...")
+            results[label] = asyncio.run(self._run(url, options))
+            self.stdout.write(f"   {results[label]}")
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as handle:
+                json.dump(results, handle, indent=2)
+
+    async def _run(self, url, options):
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        headers = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: close"]
+        if options["sessionid"]:
+            headers.append(f"Cookie: sessionid={options['sessionid']}")
+        request = ("\r\n".join(headers) + "\r\n\r\n").encode()
+
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + options["duration"]
+
+        async def client():
+            nonlocal errors
+            chunks = [request[i:i + 16] for i in range(0, len(request), 16)]
+            pause = options["slow"] / len(chunks)
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    reader, writer = await asyncio.open_connection(host, port)
+                    for chunk in chunks:
+                        writer.write(chunk)
+                        await writer.drain()
+                        await asyncio.sleep(pause)
+                    status = await reader.readline()
+                    await reader.read()
+                    writer.close()
+                except OSError:
+                    errors += 1
+                    continue
+                if b" 200 " in status or b" 302 " in status:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(options["clients"])))
+        summary = summarize(latencies, time.perf_counter() - started)
+        summary["errors"] = errors
+        return summary
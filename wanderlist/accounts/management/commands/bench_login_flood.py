@@ -0,0 +1,121 @@
+import json
+import os
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts.benchmarks import summarize
+
+# Throttling and the hashing pool switched off: every POST hashes inline.
+UNPROTECTED = {"LOGIN_THROTTLE_IP": None, "LOGIN_THROTTLE_USERNAME": None, "PASSWORD_HASH_WORKERS": 0}
+MODES = ("unprotected", "protected")
+READ_PAGES = ("destination_list", "profile")
+
+
+class Command(BaseCommand):
+    help = (
+        "Flood /login/ with wrong passwords from many threads and IPs while "
+        "logged-in readers load the destination list and profile pages, "
+        "in-process. Compares reader latency with throttling and the bounded "
+        "hashing pool off (unprotected) and on (protected)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="bench_user_", help="Seeded username prefix.")
+        parser.add_argument("--attackers", type=int, default=16, help="Concurrent login-flood threads.")
+        parser.add_argument("--attack-ips", type=int, default=8, help="Distinct client IPs the flood comes from.")
+        parser.add_argument("--readers", type=int, default=4, help="Concurrent logged-in reader threads.")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode.")
+        parser.add_argument("--mode", action="append", choices=MODES, help="Modes to run (default: both).")
+        parser.add_argument("--json", dest="json_path", help="Write results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if "testserver" not in settings.ALLOWED_HOSTS and "*" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+        users = list(User.objects.filter(username__startswith=options["prefix"]).order_by("pk")[:50])
+        if not users:
+            raise CommandError("No seeded users found; run `manage.py seed_destinations` first.")
+
+        results = {"idle": self._run(0, users, options, flood=False)}
+        self._print("idle", results["idle"])
+        for number, mode in enumerate(options["mode"] or MODES, start=1):
+            overrides = UNPROTECTED if mode == "unprotected" else {}
+            with override_settings(**overrides):
+                results[mode] = self._run(number, users, options, flood=True)
+            self._print(mode, results[mode])
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✅ Results written to {options['json_path']}"))
+
+    def _run(self, number, users, options, flood):
+        stop = threading.Event()
+        read_latencies, read_errors = [], 0
+        attack_statuses = {}
+        lock = threading.Lock()
+
+        def reader(index):
+            nonlocal read_errors
+            client = Client(raise_request_exception=False)
+            client.force_login(users[index % len(users)])
+            urls = [reverse(name) for name in READ_PAGES]
+            try:
+                while not stop.is_set():
+                    for url in urls:
+                        started = time.perf_counter()
+                        response = client.get(url)
+                        elapsed = time.perf_counter() - started
+                        with lock:
+                            if response.status_code == 200:
+                                read_latencies.append(elapsed)
+                            else:
+                                read_errors += 1
+            finally:
+                close_old_connections()
+
+        def attacker(index):
+            rng = random.Random(index)
+            client = Client(raise_request_exception=False)
+            url = reverse("login")
+            try:
+                while not stop.is_set():
+                    # Fresh addresses per mode so buckets from a previous mode don't carry over.
+                    address = rng.randrange(options["attack_ips"])
+                    ip = f"10.{number}.{address // 256}.{address % 256}"
+                    username = rng.choice(users).username if rng.random() < 0.5 else f"nobody{rng.randrange(10**6)}"
+                    response = client.post(url, {"username": username, "password": os.urandom(6).hex()}, REMOTE_ADDR=ip)
+                    with lock:
+                        attack_statuses[response.status_code] = attack_statuses.get(response.status_code, 0) + 1
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=reader, args=(i,)) for i in range(options["readers"])]
+        if flood:
+            threads += [threading.Thread(target=attacker, args=(i,)) for i in range(options["attackers"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options["duration"])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        summary = summarize(read_latencies, elapsed)
+        summary["read_errors"] = read_errors
+        summary["login_statuses"] = {str(status): n for status, n in sorted(attack_statuses.items())}
+        return summary
+
+    def _print(self, label, result):
+        self.stdout.write(
+            f"{label:<12} readers: p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+            f"p99 {result['p99_ms']:>8.2f}ms  {result['rps']:>7.1f} req/s   logins: {result['login_statuses']}"
+        )
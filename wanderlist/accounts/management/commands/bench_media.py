@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from accounts.benchmarks import summarize
+from accounts.views import media_file
+
+BENCH_DIR = "bench_media"
+MODES = ("stream", "readall", "offload")
+MEMORY_REQUESTS = 20
+
+
+def _read_all(request, path):
+    """The naive fallback media_file replaces: whole file in memory."""
+    with open(os.path.join(request.media_root, path), "rb") as handle:
+        return HttpResponse(handle.read(), content_type="image/jpeg")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark serving large media files to concurrent clients in-process: "
+        "streaming (media_file), read-whole-file (the old fallback) and proxy "
+        "offload (X-Accel-Redirect). Reports latency, req/s, MB/s and peak memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--files", type=int, default=8)
+        parser.add_argument("--size-mb", type=float, default=5.0, help="Size of each generated file.")
+        parser.add_argument("--clients", type=int, default=16, help="Concurrent clients (threads).")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per mode.")
+        parser.add_argument("--mode", action="append", choices=MODES, help="Modes to run (default: all).")
+        parser.add_argument("--json", dest="json_path", help="Write results to this JSON file.")
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp(prefix="wanderlist-media-")
+        try:
+            names = self._make_files(root, options["files"], int(options["size_mb"] * 1024 * 1024))
+            results = {}
+            for mode in options["mode"] or MODES:
+                settings_override = {"MEDIA_ROOT": root, "MEDIA_OFFLOAD": "x-accel-redirect" if mode == "offload" else ""}
+                with override_settings(**settings_override):
+                    results[mode] = self._run(mode, root, names, options)
+                r = results[mode]
+                self.stdout.write(
+                    f"{mode:<8} p50 {r['p50_ms']:>8.2f}ms  p95 {r['p95_ms']:>8.2f}ms  "
+                    f"{r['rps']:>7.1f} req/s  {r['mb_per_s']:>8.1f} MB/s  peak {r['peak_memory_mb']:>7.1f} MB"
+                )
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✅ Results written to {options['json_path']}"))
+
+    def _make_files(self, root, count, size):
+        os.makedirs(os.path.join(root, BENCH_DIR))
+        names = []
+        for index in range(count):
+            name = f"{BENCH_DIR}/{index}.jpg"
+            with open(os.path.join(root, name), "wb") as handle:
+                for _ in range(0, size, 1024 * 1024):
+                    handle.write(os.urandom(min(1024 * 1024, size)))
+                handle.truncate(size)
+            names.append(name)
+        return names
+
+    def _request(self, mode, root, name):
+        request = RequestFactory().get(f"/media/{name}")
+        # Staff skips the owner lookup, so no database is needed.
+        request.user = User(username="bench", is_staff=True)
+        request.media_root = root
+        view = _read_all if mode == "readall" else media_file
+        response = view(request, path=name)
+        sent = 0
+        if response.streaming:
+            for chunk in response.streaming_content:
+                sent += len(chunk)
+        else:
+            sent = len(response.content)
+        response.close()
+        return sent
+
+    def _pass(self, mode, root, names, count, clients):
+        def one(index):
+            started = time.perf_counter()
+            sent = self._request(mode, root, names[index % len(names)])
+            return time.perf_counter() - started, sent
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            outcomes = list(pool.map(one, range(count)))
+        return outcomes, time.perf_counter() - started
+
+    def _run(self, mode, root, names, options):
+        outcomes, elapsed = self._pass(mode, root, names, options["requests"], options["clients"])
+
+        # Separate pass: tracemalloc would skew the timings above.
+        tracemalloc.start()
+        self._pass(mode, root, names, min(options["requests"], MEMORY_REQUESTS), options["clients"])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        summary = summarize([latency for latency, _ in outcomes], elapsed)
+        sent = sum(size for _, size in outcomes)
+        summary["mb_per_s"] = round(sent / elapsed / 1024 / 1024, 1) if elapsed else 0.0
+        summary["peak_memory_mb"] = round(peak / 1024 / 1024, 1)
+        return summary
@@ -0,0 +1,209 @@
+import gc
+import json
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+from accounts.benchmarks import summarize
+from accounts.models import Destination
+from accounts.rows import destination_rows
+from accounts.sharding import atomic_for, route_for_user
+
+# destinations/_destination_row.html as it was before accounts/rows.py,
+# rendering model instances; kept verbatim as the baseline.
+INSTANCE_ROW_TEMPLATE = """{% load tz %}
+{% load destination_tags %}
+<tr id="destination-{{ destination.pk }}">
+  <!-- Bulk selection (see _bulk_actions.html) -->
+  <td>
+    <input type="checkbox" name="ids" value="{{ destination.pk }}" form="bulk-form"
+           class="form-check-input" aria-label="Select {{ destination.name }}">
+  </td>
+
+  <!-- Destination Name -->
+  <td>
+    <strong>{{ destination.name|default:"Unnamed Destination" }}</strong>
+  </td>
+
+  <!-- Country (Full Name) -->
+  <td>
+    {% if destination.location %}
+      {{ destination.location.name|default:"Unknown" }}
+    {% else %}
+      <span class="text-muted">Not specified</span>
+    {% endif %}
+  </td>
+
+  <!-- Status -->
+  <td>
+    {% if destination.status == "Wishlist" %}
+      <span class="badge bg-warning text-dark px-3 py-2">Wishlist</span>
+    {% elif destination.status == "Vacation" %}
+      <span class="badge bg-info text-dark px-3 py-2">Vacation</span>
+    {% elif destination.status == "Visited" %}
+      <span class="badge bg-success px-3 py-2">Visited</span>
+    {% else %}
+      <span class="badge bg-secondary px-3 py-2">Unknown</span>
+    {% endif %}
+  </td>
+
+  <!-- Created (Always Philippine Local Time) -->
+  <td>
+    {% timezone "Asia/Manila" %}
+      {{ destination.created_at|date:"M d, Y • h:i A" }}
+    {% endtimezone %}
+    <br>
+    <small class="text-muted">
+      ({{ destination.created_at|naturaltime_marker }})
+    </small>
+  </td>
+
+  <!-- Updated (Show latest if changed, otherwise same as created) -->
+  <td>
+    {% timezone "Asia/Manila" %}
+      {% if destination.updated_at and destination.updated_at|date:"U" != destination.created_at|date:"U" %}
+        <span class="text-success fw-semibold">
+          {{ destination.updated_at|date:"M d, Y • h:i A" }}
+        </span>
+        <br>
+        <small class="text-muted">
+          ({{ destination.updated_at|naturaltime_marker }})
+        </small>
+      {% else %}
+        <span class="text-muted">
+          {{ destination.created_at|date:"M d, Y • h:i A" }}
+        </span>
+        <br>
+        <small class="text-muted">
+          (Same as created)
+        </small>
+      {% endif %}
+    {% endtimezone %}
+  </td>
+
+  <!-- Actions -->
+  <td>
+    <a href="{% url 'destination_update' destination.pk %}" class="btn btn-sm btn-outline-primary me-2" data-fragment-edit>
+      ✏️ Edit
+    </a>
+    <a href="{% url 'destination_delete' destination.pk %}"
+       class="btn btn-sm btn-outline-danger" data-fragment-delete
+       onclick="return confirm('Are you sure you want to delete this destination?');">
+      🗑 Delete
+    </a>
+  </td>
+</tr>
+"""
+STATUSES = [status for status, _ in Destination.STATUS_CHOICES]
+CODES = ["JP", "PH", "FR", "IT", "KR", "TH", "AU", "PT", None]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the destination table's read path on model instances with "
+        "the compact rows of accounts/rows.py: memory per row and fetch + "
+        "render time for one large list (default 10,000 rows, seeded for a "
+        "dedicated user on first run)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Rows to fetch and render per run.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per path.")
+        parser.add_argument("--username", default="bench_rows", help="Owner of the benchmark rows.")
+        parser.add_argument("--output", help="Also write the results as JSON here.")
+
+    def handle(self, *args, **options):
+        user = self._seed(options["username"], options["rows"])
+        size = options["rows"]
+        engine = engines.all()[0]  # the project's one DjangoTemplates engine
+        # Both row templates are inlined in a loop, so {% include %} overhead doesn't count.
+        row_source = engine.get_template("destinations/_destination_row.html").template.source
+        loop = "{{% for destination in destinations %}}{}{{% endfor %}}"
+        paths = {
+            "instances": (
+                lambda: list(self._ordered(Destination.objects.filter(user=user))[:size]),
+                engine.from_string(loop.format(INSTANCE_ROW_TEMPLATE)),
+            ),
+            "rows": (
+                lambda: list(self._ordered(destination_rows(Destination.objects.filter(user=user)))[:size]),
+                engine.from_string(loop.format(row_source)),
+            ),
+        }
+
+        results = {}
+        with route_for_user(user):
+            for label, (fetch, template) in paths.items():
+                results[label] = self._run(fetch, template, options["repeat"])
+                self._print(label, results[label])
+
+        base, lean = results["instances"], results["rows"]
+        self.stdout.write(
+            f"\n📉 rows vs instances: {lean['bytes_per_row'] / base['bytes_per_row']:.0%} of the memory per row, "
+            f"{lean['p50_ms'] / base['p50_ms']:.0%} of the p50 fetch + render time"
+        )
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump({"rows": size, "vendor": settings.DATABASES["default"]["ENGINE"], "results": results},
+                          handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"✅ Results written to {options['output']}"))
+
+    def _ordered(self, queryset):
+        return queryset.order_by("-updated_at", "-created_at", "-pk")
+
+    def _seed(self, username, rows):
+        user, _ = User.objects.get_or_create(username=username)
+        with route_for_user(user):
+            missing = rows - Destination.objects.filter(user=user).count()
+            if missing > 0:
+                batch = []
+                for n in range(missing):
+                    destination = Destination(
+                        user=user,
+                        name=f"Bench destination {n}",
+                        location=CODES[n % len(CODES)],
+                        status=STATUSES[n % len(STATUSES)],
+                    )
+                    destination.refresh_search_text()
+                    batch.append(destination)
+                with atomic_for(user):
+                    Destination.objects.bulk_create(batch, batch_size=2000)
+                self.stdout.write(f"🌱 Seeded {missing} destination(s) for {username}")
+        return user
+
+    def _run(self, fetch, template, repeat):
+        # Memory: what the fetched list keeps alive, and the peak while the
+        # table renders (this is where instances build a Country per access).
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        items = fetch()
+        retained = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.reset_peak()
+        template.render({"destinations": items})
+        peak = tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        count = len(items)
+        del items
+
+        # Timing runs without tracemalloc, which would distort it.
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            template.render({"destinations": fetch()})
+            latencies.append(time.perf_counter() - t0)
+        summary = summarize(latencies, time.perf_counter() - started)
+        summary["rows"] = count
+        summary["bytes_per_row"] = round(retained / count, 1) if count else 0
+        summary["render_peak_kb"] = round(peak / 1024, 1)
+        return summary
+
+    def _print(self, label, r):
+        self.stdout.write(
+            f"{label:<10} {r['rows']} rows  p50 {r['p50_ms']:>9.2f}ms  p95 {r['p95_ms']:>9.2f}ms  "
+            f"{r['bytes_per_row']:>8.1f} B/row  render peak {r['render_peak_kb']:>10.1f} KiB"
+        )
@@ -0,0 +1,171 @@
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.benchmarks import summarize
+from accounts.management.commands.seed_destinations import BENCH_PASSWORD
+from accounts.models import Destination
+from accounts.sharding import route_for_user, shard_summary
+
+# (label, url name, needs a destination pk, method)
+SCENARIOS = [
+    ("home", "home", False, "get"),
+    ("about", "about", False, "get"),
+    ("login_page", "login", False, "get"),
+    ("login_post", "login", False, "post"),
+    ("register_page", "register", False, "get"),
+    ("profile", "profile", False, "get"),
+    ("destination_list", "destination_list", False, "get"),
+    ("destination_create_form", "destination_create", False, "get"),
+    ("destination_update_form", "destination_update", True, "get"),
+    ("destination_delete_confirm", "destination_delete", True, "get"),
+    ("destination_search", "destination_search", False, "get"),
+    ("travel_stats", "travel_stats", False, "get"),
+    ("destination_export", "destination_export", False, "get"),
+    ("api_destination_list", "api_destination_list", False, "get"),
+    ("api_destination_detail", "api_destination_detail", True, "get"),
+    ("api_typeahead", "api_typeahead", False, "get"),
+]
+MEMORY_SAMPLES = 10
+QUERY_STRINGS = {
+    "destination_search": {"q": "tok"},
+    "api_typeahead": {"q": "ja"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the accounts views in-process against seeded data "
+        "(see seed_destinations). Reports p50/p95/p99 latency, throughput, "
+        "queries per request and peak memory; saves JSON and can compare "
+        "against a previous run with --baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+        parser.add_argument("--prefix", default="bench_user_", help="Seeded username prefix.")
+        parser.add_argument("--users", type=int, default=20, help="How many seeded users to rotate through.")
+        parser.add_argument("--only", action="append", help="Run only these scenario labels.")
+        parser.add_argument("--output", default="bench-results.json")
+        parser.add_argument("--baseline", help="Previous results JSON to compare against.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Test client requests use the 'testserver' host.
+        if "testserver" not in settings.ALLOWED_HOSTS and "*" not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "testserver"]
+
+        users = list(
+            User.objects.filter(username__startswith=options["prefix"]).order_by("pk")[: options["users"]]
+        )
+        if not users:
+            raise CommandError("No seeded users found; run `manage.py seed_destinations` first.")
+
+        rng = random.Random(options["seed"])
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            with route_for_user(user):
+                pk = Destination.objects.filter(user=user).values_list("pk", flat=True).first()
+            clients.append((user, client, pk))
+
+        results = {}
+        for label, url_name, needs_pk, method in SCENARIOS:
+            if options["only"] and label not in options["only"]:
+                continue
+            results[label] = self._run(label, url_name, needs_pk, method, clients, rng, options["requests"])
+            self._print(label, results[label])
+
+        report = {
+            "meta": {
+                "vendor": connection.vendor,
+                "python": platform.python_version(),
+                "requests_per_scenario": options["requests"],
+                "destinations": sum(shard["destinations"] for shard in shard_summary().values()),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        with open(options["output"], "w") as handle:
+            json.dump(report, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"✅ Results written to {options['output']}"))
+
+        if options["baseline"]:
+            self._compare(options["baseline"], results)
+
+    def _request(self, label, url_name, needs_pk, method, clients, rng):
+        user, client, pk = rng.choice(clients)
+        if needs_pk and pk is None:
+            return None
+        url = reverse(url_name, args=[pk] if needs_pk else [])
+        if method == "post":
+            # A different client address each time, so login throttling doesn't kick in.
+            address = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+            return Client().post(url, {"username": user.username, "password": BENCH_PASSWORD}, REMOTE_ADDR=address)
+        response = client.get(url, QUERY_STRINGS.get(label, {}))
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+    def _run(self, label, url_name, needs_pk, method, clients, rng, count):
+        latencies, queries, statuses = [], [], {}
+        started = time.perf_counter()
+        for _ in range(count):
+            with CaptureQueriesContext(connection) as captured:
+                t0 = time.perf_counter()
+                response = self._request(label, url_name, needs_pk, method, clients, rng)
+                latency = time.perf_counter() - t0
+            if response is None:
+                continue
+            latencies.append(latency)
+            queries.append(len(captured))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - started
+
+        # Memory is sampled in a separate, shorter pass: tracemalloc slows
+        # allocation-heavy code enough to distort the latency numbers above.
+        tracemalloc.start()
+        for _ in range(min(count, MEMORY_SAMPLES)):
+            self._request(label, url_name, needs_pk, method, clients, rng)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        summary = summarize(latencies, elapsed)
+        summary["queries_avg"] = round(sum(queries) / len(queries), 2) if queries else 0
+        summary["queries_max"] = max(queries, default=0)
+        summary["peak_memory_kb"] = round(peak / 1024, 1)
+        summary["statuses"] = {str(code): n for code, n in statuses.items()}
+        return summary
+
+    def _print(self, label, r):
+        self.stdout.write(
+            f"{label:<28} p50 {r['p50_ms']:>8.2f}ms  p95 {r['p95_ms']:>8.2f}ms  "
+            f"p99 {r['p99_ms']:>8.2f}ms  {r['rps']:>8.1f} req/s  "
+            f"{r['queries_avg']:>5} q/req  {r['peak_memory_kb']:>9.1f} KiB"
+        )
+
+    def _compare(self, path, results):
+        with open(path) as handle:
+            baseline = json.load(handle)["results"]
+        self.stdout.write("\n📈 Compared with baseline (p95, queries):")
+        for label, current in results.items():
+            before = baseline.get(label)
+            if not before:
+                continue
+            change = (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+            self.stdout.write(style(
+                f"{label:<28} p95 {before['p95_ms']:.2f} → {current['p95_ms']:.2f}ms ({change:+.1f}%)  "
+                f"queries {before['queries_avg']} → {current['queries_avg']}"
+            ))
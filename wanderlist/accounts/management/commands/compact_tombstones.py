@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from accounts.sync import compact_tombstones, retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete destination tombstones older than DESTINATION_TOMBSTONE_RETENTION_DAYS "
+        "on every shard. Sync cursors older than that already get a full reset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=float, help="Override the retention window.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        window = timedelta(days=options["days"]) if options["days"] is not None else retention()
+        deleted = compact_tombstones(window, options["batch_size"])
+        for alias, count in deleted.items():
+            self.stdout.write(f"{alias}: {count} tombstone(s) deleted")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Compacted {sum(deleted.values())} tombstone(s) older than {window.total_seconds() / 86400:g} day(s)."
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserProfile
+from accounts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Generate missing profile picture thumbnails (e.g. after a full worker queue)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Regenerate even if thumbnails exist.")
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.exclude(profile_picture="").exclude(profile_picture__isnull=True)
+        if not options["all"]:
+            profiles = profiles.filter(picture_hash="")
+
+        done = 0
+        # Ids up front: generate_thumbnails() closes stale connections, and
+        # with them an open server-side cursor.
+        for profile_id in list(profiles.values_list("pk", flat=True)):
+            if generate_thumbnails(profile_id):
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f"✅ Generated thumbnails for {done} profile(s)."))
@@ -0,0 +1,116 @@
+import csv
+import io
+import sys
+import time
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.cache import bump_list_version
+from accounts.gazetteer import Gazetteer, gazetteer_path, write_index
+from accounts.models import Destination
+
+# GeoNames "geoname" table columns (https://download.geonames.org/export/dump/)
+NAME, ASCII_NAME, ALTERNATE_NAMES, FEATURE_CLASS, COUNTRY, POPULATION = 1, 2, 3, 6, 8, 14
+MAX_ALIAS_LENGTH = 100
+
+
+def _open_dump(path):
+    """Text stream over a GeoNames .txt dump, or the .txt inside its .zip."""
+    if zipfile.is_zipfile(path):
+        archive = zipfile.ZipFile(path)
+        members = [name for name in archive.namelist() if name.endswith(".txt") and "readme" not in name.lower()]
+        if len(members) != 1:
+            raise CommandError(f"Expected one .txt dump in {path}, found {members or 'none'}.")
+        return io.TextIOWrapper(archive.open(members[0]), encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the offline city gazetteer index (GAZETTEER_PATH) from a GeoNames "
+        "dump such as cities15000.zip, and optionally canonicalize existing "
+        "Destination.city values against it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dump", nargs="?", help="GeoNames cities*.txt or .zip (omit with --canonicalize-existing only).")
+        parser.add_argument("--output", help="Index file to write (default: GAZETTEER_PATH).")
+        parser.add_argument("--min-population", type=int, default=0)
+        parser.add_argument("--no-alternate-names", action="store_true", help="Index only name and asciiname.")
+        parser.add_argument(
+            "--canonicalize-existing",
+            action="store_true",
+            help="Rewrite stored cities to their gazetteer spelling.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options["dump"] and not options["canonicalize_existing"]:
+            raise CommandError("Give a GeoNames dump to load and/or --canonicalize-existing.")
+
+        if options["dump"]:
+            output = options["output"] or gazetteer_path()
+            if not output:
+                raise CommandError("Set GAZETTEER_PATH or pass --output.")
+            csv.field_size_limit(sys.maxsize)
+            with _open_dump(options["dump"]) as dump:
+                places = list(self._places(dump, options))
+            if not places:
+                raise CommandError("No populated places found in the dump.")
+            stats = write_index(output, places)
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Indexed {stats['places']} cities under {stats['keys']} names "
+                f"({stats['bytes'] / 1024 / 1024:.1f} MB) → {output}"
+            ))
+            self._report_speed(output)
+
+        if options["canonicalize_existing"]:
+            self._canonicalize(options["batch_size"])
+
+    def _places(self, dump, options):
+        for row in csv.reader(dump, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if len(row) <= POPULATION or row[FEATURE_CLASS] != "P":
+                continue
+            population = int(row[POPULATION] or 0)
+            if population < options["min_population"]:
+                continue
+            aliases = {row[ASCII_NAME]}
+            if not options["no_alternate_names"] and row[ALTERNATE_NAMES]:
+                aliases.update(
+                    alias for alias in row[ALTERNATE_NAMES].split(",")
+                    if alias and len(alias) <= MAX_ALIAS_LENGTH and "://" not in alias
+                )
+            yield row[NAME], row[COUNTRY], population, aliases
+
+    def _report_speed(self, path):
+        gazetteer = Gazetteer(path)
+        samples = ("to", "par", "new y", "san")
+        started = time.perf_counter()
+        for prefix in samples:
+            gazetteer.complete(prefix)
+            gazetteer.canonical(prefix)
+        elapsed = (time.perf_counter() - started) / len(samples)
+        gazetteer.close()
+        self.stdout.write(f"Lookup + autocomplete: {elapsed * 1000:.3f} ms per prefix")
+
+    def _canonicalize(self, batch_size):
+        changed, users, total = [], set(), 0
+        rows = Destination.objects.exclude(city__isnull=True).exclude(city="").order_by("pk")
+        with transaction.atomic():
+            for destination in rows.iterator(chunk_size=batch_size):
+                before = destination.city
+                destination.refresh_search_text()
+                if destination.city != before:
+                    changed.append(destination)
+                    users.add(destination.user_id)
+                    total += 1
+                if len(changed) >= batch_size:
+                    Destination.objects.bulk_update(changed, ["city", "search_text"])
+                    changed.clear()
+            Destination.objects.bulk_update(changed, ["city", "search_text"])
+        # bulk_update skips post_save, so invalidate the affected lists here.
+        for user_id in users:
+            bump_list_version(user_id)
+        self.stdout.write(self.style.SUCCESS(f"✅ Canonicalized {total} city value(s) for {len(users)} user(s)."))
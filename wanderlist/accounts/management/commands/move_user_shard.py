@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import UserShard
+from accounts.sharding import hashed_shard, move_user, shard_aliases, shard_for, sharding_enabled
+
+
+class Command(BaseCommand):
+    help = (
+        "Move users' destinations and travel stats between shard databases "
+        "while they stay online (writes are refused only for the final sync). "
+        "--to moves the given users to one shard; --rebalance moves each user "
+        "to the shard its id hashes to under the current DATABASE_SHARD_URLS; "
+        "--pin records every unplaced user's current shard in the directory "
+        "(run it before adding shards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="*", help="Users to move (default with --rebalance/--pin: all).")
+        parser.add_argument("--to", dest="target", help="Target shard alias, e.g. shard_1.")
+        parser.add_argument("--from", dest="source", help="Read the rows from this alias instead (e.g. default when first enabling sharding).")
+        parser.add_argument("--rebalance", action="store_true")
+        parser.add_argument("--pin", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError("No shards configured; set DATABASE_SHARD_URLS.")
+        aliases = set(shard_aliases())
+        if options["source"] and options["source"] not in aliases | {"default"}:
+            raise CommandError(f"Unknown source database {options['source']}.")
+        if options["target"] and options["target"] not in aliases:
+            raise CommandError(f"Unknown shard {options['target']}; choose from {', '.join(sorted(aliases))}.")
+        if sum(bool(options[name]) for name in ("target", "rebalance", "pin")) != 1:
+            raise CommandError("Give exactly one of --to, --rebalance or --pin.")
+        if not options["pin"] and not settings.SHARED_CACHE:
+            # The write freeze reaches web processes through the cache only.
+            raise CommandError("Moving users needs a shared CACHE_BACKEND (file or redis), not locmem.")
+        if options["target"] and not options["usernames"]:
+            raise CommandError("Name the users to move with --to.")
+
+        users = User.objects.order_by("pk")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+        user_ids = users.values_list("pk", flat=True)
+
+        if options["pin"]:
+            placed = set(UserShard.objects.values_list("user_id", flat=True))
+            pinned = UserShard.objects.bulk_create(
+                (UserShard(user_id=pk, shard=hashed_shard(pk)) for pk in user_ids.iterator() if pk not in placed),
+                batch_size=options["batch_size"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"✅ Pinned {len(pinned)} user(s) to their current shard."))
+            return
+
+        started = time.perf_counter()
+        users_moved = rows_moved = 0
+        for pk in user_ids.iterator():
+            target = options["target"] or hashed_shard(pk)
+            source = options["source"] or shard_for(pk)
+            if source == target:
+                continue
+            rows = move_user(
+                pk, target, source=source, batch_size=options["batch_size"],
+                log=lambda message, pk=pk: self.stdout.write(f"user {pk}: {message}"),
+            )
+            users_moved += 1
+            rows_moved += rows
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Moved {users_moved} user(s), {rows_moved} destination(s) in {time.perf_counter() - started:.1f}s."
+        ))
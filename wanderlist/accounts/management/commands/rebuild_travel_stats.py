@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserCountryStats, UserTravelStats
+from accounts.sharding import atomic_for, route_for_user
+from accounts.stats import compute_user_stats, rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or with --check, verify) the denormalized per-user travel stats."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", action="append", dest="users", help="Username to process (repeatable).")
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report users whose stored stats drift from their destinations.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by("pk")
+        if options["users"]:
+            users = users.filter(username__in=options["users"])
+
+        checked = drifted = 0
+        for user_id, username in users.values_list("pk", "username").iterator(chunk_size=500):
+            checked += 1
+            with route_for_user(user_id):
+                if options["check"]:
+                    if self._drifted(user_id):
+                        drifted += 1
+                        self.stdout.write(self.style.WARNING(f"⚠️ {username}: stats out of date"))
+                    continue
+                with atomic_for(user_id):
+                    rebuild_user_stats(user_id)
+
+        if options["check"]:
+            self.stdout.write(f"Checked {checked} user(s), {drifted} out of date.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt travel stats for {checked} user(s)."))
+
+    def _drifted(self, user_id):
+        expected, countries = compute_user_stats(user_id)
+        stored = UserTravelStats.objects.filter(user_id=user_id).values(*expected).first()
+        if stored is None:
+            return expected["total_count"] > 0
+        stored.pop("last_activity_at")
+        expected.pop("last_activity_at")
+        stored_countries = dict(
+            UserCountryStats.objects.filter(user_id=user_id).values_list("country", "visited_count")
+        )
+        return stored != expected or stored_countries != countries
@@ -0,0 +1,64 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.snapshot import BATCH_SIZE, Checkpoint, open_dump, reconcile_profiles, reset_sequences, restore_accounts
+
+
+class Command(BaseCommand):
+    help = (
+        "Restore users, profiles and destinations from an NDJSON dump "
+        "(dump_accounts or `dumpdata --format jsonl`) or a dumpdata JSON "
+        "array such as data.json, in bulk_create batches. Resumable with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dump", help="Dump file (.ndjson, .jsonl, .json, optionally .gz) or - for stdin.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <dump>.checkpoint).")
+        parser.add_argument("--resume", action="store_true", help="Skip the records the last run committed.")
+        parser.add_argument("--skip-stats", action="store_true", help="Don't rebuild travel stats afterwards.")
+
+    def handle(self, *args, **options):
+        path = options["dump"]
+        checkpoint = None
+        if path != "-":
+            checkpoint = Checkpoint(options["checkpoint"] or f"{path}.checkpoint", path)
+        elif options["resume"]:
+            raise CommandError("--resume needs a dump file, not stdin.")
+
+        skip = 0
+        if options["resume"]:
+            try:
+                skip = checkpoint.load()
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(f"↪️ Resuming after {skip} record(s)")
+
+        started = time.perf_counter()
+
+        def on_batch(records):
+            if checkpoint is not None:
+                checkpoint.save(records)
+
+        try:
+            stream = nullcontext(sys.stdin) if path == "-" else open_dump(path, "r")
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with stream as records:
+            counts = restore_accounts(records, skip=skip, batch_size=options["batch_size"], on_batch=on_batch)
+
+        reset_sequences()
+        created, updated = reconcile_profiles()
+        summary = ", ".join(f"{n} {label}" for label, n in counts.items())
+        self.stdout.write(f"Inserted {summary}; profiles: {created} created, {updated} synced")
+
+        if not options["skip_stats"] and User.objects.exists():
+            call_command("rebuild_travel_stats", stdout=self.stdout)
+        if checkpoint is not None:
+            checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(f"✅ Restored in {time.perf_counter() - started:.1f}s"))
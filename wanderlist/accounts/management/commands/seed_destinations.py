@@ -0,0 +1,102 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django_countries import countries
+
+from accounts.models import Destination, UserProfile
+from accounts.sharding import atomic_for, route_for_user, shard_for
+from accounts.stats import rebuild_user_stats
+
+BENCH_PASSWORD = "wanderlist-bench"
+CITIES = ["Tokyo", "Paris", "Boracay", "Cebu", "Kyoto", "Lisbon", "Rome", "Seoul", "Bangkok", "Sydney"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic users and destinations for load tests, e.g. "
+        "`seed_destinations --users 10000 --destinations 1000000`. "
+        "Seeded users are named <prefix><n> with password 'wanderlist-bench'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--destinations", type=int, default=10000, help="Total rows across all users.")
+        parser.add_argument("--prefix", default="bench_user_")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducible data.")
+        parser.add_argument("--skew", type=float, default=1.2, help="Zipf-like skew of rows per user (0 = uniform).")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        users = self._seed_users(options)
+        self.stdout.write(f"👤 {len(users)} users ready")
+
+        codes = [code for code, _ in countries]
+        statuses = [status for status, _ in Destination.STATUS_CHOICES]
+        # Heavier users first so a few "power users" own large lists.
+        weights = [1 / (rank + 1) ** options["skew"] for rank in range(len(users))]
+
+        shards = {user_id: shard_for(user_id) for user_id in users}
+        remaining = options["destinations"]
+        batch_size = options["batch_size"]
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            owners = rng.choices(users, weights=weights, k=size)
+            batches = {}
+            for index, user_id in enumerate(owners):
+                destination = Destination(
+                    user_id=user_id,
+                    name=f"Destination {remaining - index}",
+                    location=rng.choice(codes),
+                    city=rng.choice(CITIES) if rng.random() < 0.6 else None,
+                    status=rng.choice(statuses),
+                )
+                destination.refresh_search_text()
+                batches.setdefault(shards[user_id], []).append(destination)
+            for alias, batch in batches.items():
+                with transaction.atomic(using=alias):
+                    Destination.objects.using(alias).bulk_create(batch)
+            remaining -= size
+            self.stdout.write(f"   … {options['destinations'] - remaining} destinations")
+
+        for user_id in users:
+            with route_for_user(user_id), atomic_for(user_id):
+                rebuild_user_stats(user_id)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ Seeded in {elapsed:.1f}s"))
+
+    def _seed_users(self, options):
+        prefix = options["prefix"]
+        existing = set(User.objects.filter(username__startswith=prefix).values_list("username", flat=True))
+        password = make_password(BENCH_PASSWORD)  # hash once, reuse for every user
+        new_users = [
+            User(username=f"{prefix}{n}", email=f"{prefix}{n}@example.com", password=password)
+            for n in range(options["users"])
+            if f"{prefix}{n}" not in existing
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(new_users, batch_size=options["batch_size"])
+            seeded = list(
+                User.objects.filter(username__startswith=prefix)
+                .order_by("pk")
+                .values_list("pk", "username", "email")
+            )
+            # bulk_create skips post_save, so create the missing profiles here.
+            with_profile = set(
+                UserProfile.objects.filter(user__username__startswith=prefix).values_list("user_id", flat=True)
+            )
+            UserProfile.objects.bulk_create(
+                [
+                    UserProfile(user_id=pk, username=username, email=email)
+                    for pk, username, email in seeded
+                    if pk not in with_profile
+                ],
+                batch_size=options["batch_size"],
+            )
+        return [pk for pk, _, _ in seeded][: options["users"]]
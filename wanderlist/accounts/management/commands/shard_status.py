@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.sharding import shard_summary
+
+
+class Command(BaseCommand):
+    help = "Destination and owner counts per shard, queried on all shards in parallel."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        summary = shard_summary()
+        for alias, counts in summary.items():
+            statuses = ", ".join(f"{status} {n}" for status, n in sorted(counts["statuses"].items())) or "—"
+            self.stdout.write(f"{alias:<10} {counts['destinations']:>10} destinations  {counts['users']:>8} users   {statuses}")
+        total = sum(counts["destinations"] for counts in summary.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {total} destinations on {len(summary)} shard(s) ({(time.perf_counter() - started) * 1000:.0f} ms)"
+        ))
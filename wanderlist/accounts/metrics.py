@@ -0,0 +1,256 @@
+import heapq
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================
+# 📊 IN-PROCESS REQUEST METRICS
+# ==============================
+# RequestMetricsMiddleware opens a RequestSample for a sampled fraction of
+# requests (METRICS_SAMPLE_RATE). While it is active, every DB query (via an
+# execute wrapper installed on each new connection) and every top-level
+# template render adds its time to the sample. On the way out the sample is
+# folded into fixed-bucket histograms labelled by URL name, which the
+# /metrics/ endpoint renders in Prometheus text format. Requests slower than
+# METRICS_SLOW_REQUEST_MS are logged with their slowest queries.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+SLOW_QUERY_SLOTS = 5
+
+_current = ContextVar("request_sample", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple; safe across threads."""
+
+    def __init__(self, name, help_text, buckets, labels=("view",)):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        with self._lock:
+            snapshot = {key: ([*counts], total, n) for key, (counts, total, n) in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, n) in sorted(snapshot.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            running = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                running += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {n}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=("view",)):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def collect(self):
+        with self._lock:
+            snapshot = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(snapshot.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUESTS = Counter("wanderlist_requests_total", "Sampled requests by view and status.", ("view", "status"))
+REQUEST_SECONDS = Histogram("wanderlist_request_duration_seconds", "Wall time per request.", DURATION_BUCKETS)
+DB_SECONDS = Histogram("wanderlist_db_duration_seconds", "Time spent in SQL per request.", DURATION_BUCKETS)
+DB_QUERIES = Histogram("wanderlist_db_queries", "SQL queries per request.", QUERY_COUNT_BUCKETS)
+TEMPLATE_SECONDS = Histogram("wanderlist_template_duration_seconds", "Template render time per request.", DURATION_BUCKETS)
+RESPONSE_BYTES = Histogram("wanderlist_response_bytes", "Response body size (non-streaming).", SIZE_BUCKETS)
+
+# Recorded for every request, not just sampled ones (accounts.hashing / throttle)
+PASSWORD_HASH_SECONDS = Histogram(
+    "wanderlist_password_hash_duration_seconds", "Time per password hash.", DURATION_BUCKETS, ("operation",)
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "wanderlist_password_hash_wait_seconds", "Time queued for the hashing pool.", DURATION_BUCKETS, ("operation",)
+)
+LOGIN_REJECTIONS = Counter(
+    "wanderlist_login_rejections_total", "Logins refused before or instead of hashing.", ("reason",)
+)
+
+REGISTRY = (
+    REQUESTS, REQUEST_SECONDS, DB_SECONDS, DB_QUERIES, TEMPLATE_SECONDS, RESPONSE_BYTES,
+    PASSWORD_HASH_SECONDS, PASSWORD_HASH_WAIT_SECONDS, LOGIN_REJECTIONS,
+)
+
+
+def render_metrics():
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    for metric in REGISTRY:
+        metric.reset()
+
+
+# ==============================
+# ⏱️ PER-REQUEST SAMPLE
+# ==============================
+class RequestSample:
+    __slots__ = ("started", "queries", "db_seconds", "template_seconds", "template_depth", "slowest")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.slowest = []  # min-heap of (seconds, sql), at most SLOW_QUERY_SLOTS long
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        entry = (seconds, sql)
+        if len(self.slowest) < SLOW_QUERY_SLOTS:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+def sample_rate():
+    return getattr(settings, "METRICS_SAMPLE_RATE", 1.0)
+
+
+def start_sample():
+    """Begin a sample for this request (or None if it isn't sampled)."""
+    rate = sample_rate()
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return None, None
+    sample = RequestSample()
+    return sample, _current.set(sample)
+
+
+def finish_sample(sample, token, request, response):
+    _current.reset(token)
+    elapsed = time.perf_counter() - sample.started
+    match = getattr(request, "resolver_match", None)
+    view = (match.view_name if match else None) or "unresolved"
+
+    REQUESTS.inc(view, str(response.status_code))
+    REQUEST_SECONDS.observe(elapsed, view)
+    DB_SECONDS.observe(sample.db_seconds, view)
+    DB_QUERIES.observe(sample.queries, view)
+    TEMPLATE_SECONDS.observe(sample.template_seconds, view)
+    if not response.streaming:
+        RESPONSE_BYTES.observe(len(response.content), view)
+
+    threshold = getattr(settings, "METRICS_SLOW_REQUEST_MS", 500)
+    if threshold is not None and elapsed * 1000 >= threshold:
+        top = "\n".join(
+            f"  {seconds * 1000:8.2f}ms  {sql[:300]}"
+            for seconds, sql in sorted(sample.slowest, reverse=True)
+        )
+        logger.warning(
+            "Slow request %s %s (%s): %.1fms total, %d queries in %.1fms, templates %.1fms\n%s",
+            request.method, request.path, view, elapsed * 1000,
+            sample.queries, sample.db_seconds * 1000, sample.template_seconds * 1000, top,
+        )
+
+
+# ==============================
+# 🗄️ DB + TEMPLATE HOOKS
+# ==============================
+def _record_query(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.add_query(sql, time.perf_counter() - started)
+
+
+def _install_query_wrapper(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_wrapper, dispatch_uid="accounts.metrics.query_wrapper")
+for _connection in connections.all(initialized_only=True):
+    _install_query_wrapper(None, _connection)
+
+
+class _TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        sample = _current.get()
+        if sample is None:
+            return super().render(context, request)
+        # Only the outermost render is timed; nested render_to_string calls
+        # (e.g. from template tags) are already inside its measurement.
+        sample.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_depth -= 1
+            if sample.template_depth == 0:
+                sample.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report render time to the active sample."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return _TimedTemplate(template.template, self)
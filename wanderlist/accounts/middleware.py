@@ -0,0 +1,142 @@
+import asyncio
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject, empty
+
+from .metrics import finish_sample, start_sample
+from .routers import PIN_COOKIE, begin_request, end_request, is_pinned, pin_cookie_value, pin_seconds
+from .sharding import ShardMoving, route_for_user
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+
+def _resolved_user_id(request):
+    """
+    request.user's pk for the shard router under ASGI, or None while it is
+    still the lazy, unloaded user and the caller is on the event loop (the
+    async views resolve it with `await request.auser()` before their queries).
+    """
+    user = request.user
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass  # sync code (e.g. in sync_to_async): loading it is fine
+        else:
+            return None
+    return user.pk
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, SQL count/time, template time and response size per
+    URL name into accounts.metrics. Place it first in MIDDLEWARE so session
+    and auth lookups are included in the measurement.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        sample, token = start_sample()
+        if sample is None:
+            return self.get_response(request)
+        response = self.get_response(request)
+        finish_sample(sample, token, request, response)
+        return response
+
+    async def __acall__(self, request):
+        sample, token = start_sample()
+        if sample is None:
+            return await self.get_response(request)
+        response = await self.get_response(request)
+        finish_sample(sample, token, request, response)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Enable replica reads (accounts.routers) for the request, pinned to the
+    primary if this browser wrote within the last REPLICA_PIN_SECONDS.
+    Unsafe methods (POST, PUT, PATCH, DELETE) read from the primary
+    throughout: the values they read before writing (e.g. the old status
+    behind a stats delta) must not come from a lagging replica.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = begin_request(self._pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            state = end_request(token)
+        return self._pin(response, state)
+
+    async def __acall__(self, request):
+        # Sync views run in a copy of this context, sharing the same
+        # RoutingState object, so their writes still set state.wrote.
+        token = begin_request(self._pinned(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = end_request(token)
+        return self._pin(response, state)
+
+    def _pinned(self, request):
+        return request.method not in SAFE_METHODS or is_pinned(request.COOKIES.get(PIN_COOKIE))
+
+    def _pin(self, response, state):
+        if state.wrote:
+            response.set_cookie(PIN_COOKIE, pin_cookie_value(), max_age=pin_seconds(), httponly=True, samesite="Lax")
+        return response
+
+
+class ShardRoutingMiddleware:
+    """
+    Scope the request's sharded queries to request.user's shard
+    (accounts.sharding). Goes after AuthenticationMiddleware. A write while
+    the user's rows are being moved becomes a 503 with Retry-After.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with route_for_user(lambda: request.user.pk):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with route_for_user(lambda: _resolved_user_id(request)):
+            return await self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, ShardMoving):
+            response = HttpResponse("Your destinations are being moved; try again in a moment.", status=503)
+            response["Retry-After"] = str(max(1, int(getattr(settings, "SHARD_MOVE_GRACE_SECONDS", 2))))
+            return response
+        return None
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 23:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_destination_city'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['user', '-updated_at', '-created_at', '-id'], name='dest_user_recent_idx'),
+        ),
+    ]
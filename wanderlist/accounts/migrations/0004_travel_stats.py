@@ -0,0 +1,94 @@
+# Generated by Django 5.2.6 on 2026-10-18 23:56
+
+import django.db.models.deletion
+import django_countries.fields
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+# Frozen copy of the aggregation in accounts.stats.compute_user_stats as of
+# this migration, so later edits there can't change what it does.
+
+STATUS_FIELDS = {
+    "Wishlist": "wishlist_count",
+    "Visited": "visited_count",
+    "Vacation": "vacation_count",
+}
+
+
+def backfill_travel_stats(apps, schema_editor):
+    """Stats rows for every user with destinations on this database (each shard migrates its own)."""
+    alias = schema_editor.connection.alias
+    Destination = apps.get_model("accounts", "Destination")
+    UserTravelStats = apps.get_model("accounts", "UserTravelStats")
+    UserCountryStats = apps.get_model("accounts", "UserCountryStats")
+    rows = Destination.objects.using(alias)
+
+    stats = {}
+    by_status = rows.values_list("user_id", "status").annotate(n=Count("id"), last=Max("updated_at")).order_by()
+    for user_id, status, n, last in by_status.iterator():
+        user = stats.setdefault(user_id, {"total_count": 0, "last_activity_at": last})
+        user["total_count"] += n
+        if status in STATUS_FIELDS:
+            user[STATUS_FIELDS[status]] = user.get(STATUS_FIELDS[status], 0) + n
+        if last and (user["last_activity_at"] is None or last > user["last_activity_at"]):
+            user["last_activity_at"] = last
+    UserTravelStats.objects.using(alias).bulk_create(
+        (UserTravelStats(user_id=user_id, **values) for user_id, values in stats.items()),
+        batch_size=1000,
+    )
+
+    visited = (
+        rows.filter(status="Visited")
+        .exclude(location__isnull=True)
+        .exclude(location="")
+        .values_list("user_id", "location")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    UserCountryStats.objects.using(alias).bulk_create(
+        (UserCountryStats(user_id=user_id, country=code, visited_count=n) for user_id, code, n in visited.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_destination_user_recent_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTravelStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('wishlist_count', models.PositiveIntegerField(default=0)),
+                ('visited_count', models.PositiveIntegerField(default=0)),
+                ('vacation_count', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='travel_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Travel Stats',
+                'verbose_name_plural': 'Travel Stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserCountryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', django_countries.fields.CountryField(max_length=2)),
+                ('visited_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='country_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Country Stats',
+                'verbose_name_plural': 'Country Stats',
+                'constraints': [models.UniqueConstraint(fields=('user', 'country'), name='unique_user_country_stats')],
+            },
+        ),
+        migrations.RunPython(backfill_travel_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:02
+
+from django.db import migrations, models
+from django.utils import translation
+from django_countries import countries
+
+# Frozen copies of accounts.models.build_search_text and the index DDL in
+# accounts.search as of this migration, so later edits there can't change
+# what it does.
+
+FTS_TABLE = "accounts_destination_fts"
+
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS dest_search_tsv_idx ON accounts_destination "
+    "USING GIN (to_tsvector('simple', search_text))",
+    "CREATE INDEX IF NOT EXISTS dest_search_trgm_idx ON accounts_destination "
+    "USING GIN (search_text gin_trgm_ops)",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS dest_search_trgm_idx",
+    "DROP INDEX IF EXISTS dest_search_tsv_idx",
+]
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "search_text, content='accounts_destination', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_text ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def build_search_text(name, city, location):
+    code = getattr(location, "code", location) or ""
+    with translation.override("en"):
+        country = str(countries.name(code)) if code else ""
+    return " ".join(part for part in (name, city, country, code) if part)
+
+
+def _run(schema_editor, statements):
+    vendor = schema_editor.connection.vendor
+    for sql in statements.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def populate_search_text(apps, schema_editor):
+    Destination = apps.get_model("accounts", "Destination")
+    rows = Destination.objects.using(schema_editor.connection.alias)
+    batch = []
+    for destination in rows.only("name", "city", "location").iterator(chunk_size=2000):
+        destination.search_text = build_search_text(destination.name, destination.city, destination.location)
+        batch.append(destination)
+        if len(batch) >= 2000:
+            rows.bulk_update(batch, ["search_text"])
+            batch = []
+    rows.bulk_update(batch, ["search_text"])
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRES_INSTALL, "sqlite": SQLITE_INSTALL})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRES_UNINSTALL, "sqlite": SQLITE_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_userprofile_picture_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
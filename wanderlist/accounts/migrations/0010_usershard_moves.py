@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_destination_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usershard',
+            name='moves',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:10
+
+from django.db import migrations
+
+# Frozen SQLite FTS DDL. The FTS5 table gains an indexed user_id column
+# (read from accounts_destination like search_text), so a search can match
+# `user_id : <id> AND search_text : (...)` and FTS5 intersects the query
+# with the user's own postings instead of every user's matches.
+FTS_TABLE = "accounts_destination_fts"
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "search_text, user_id, content='accounts_destination', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text, user_id) VALUES (new.id, new.search_text, new.user_id); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text, user_id) "
+    f"VALUES ('delete', old.id, old.search_text, old.user_id); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF search_text, user_id ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text, user_id) "
+    f"VALUES ('delete', old.id, old.search_text, old.user_id); "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text, user_id) VALUES (new.id, new.search_text, new.user_id); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+# The 0006 layout, for migrating back.
+SQLITE_PREVIOUS = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "search_text, content='accounts_destination', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF search_text ON accounts_destination BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def _run(schema_editor, statements):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in statements:
+            schema_editor.execute(sql)
+
+
+def add_owner_column(apps, schema_editor):
+    _run(schema_editor, SQLITE_DROP + SQLITE_INSTALL)
+
+
+def drop_owner_column(apps, schema_editor):
+    _run(schema_editor, SQLITE_DROP + SQLITE_PREVIOUS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_usershard_moves'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_owner_column, drop_owner_column),
+    ]
@@ -1,9 +1,18 @@
-from django.db import models
+from functools import lru_cache
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django_countries import countries
 from django_countries.fields import CountryField  # 🌍 Country dropdown
-from django.utils import timezone
+from django.utils import timezone, translation
+
+from .cache import bump_list_version, invalidate_cached_user
+from .gazetteer import canonical_city
+from .serving import clean_name
+from .thumbnails import variant_names, variant_urls
 
 
 # ==============================
@@ -14,24 +23,105 @@ class UserProfile(models.Model):
     username = models.CharField(max_length=150, blank=True, null=True)
     email = models.EmailField(max_length=150, blank=True, null=True)
     profile_picture = models.ImageField(upload_to="profile_pics/", blank=True, null=True)
+    # SHA-256 of the picture once its thumbnails exist (see thumbnails.py)
+    picture_hash = models.CharField(max_length=64, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.username or self.user.username}'s Profile"
 
+    def owns_media(self, name):
+        """
+        True if `name` (normalized, relative to MEDIA_ROOT) is exactly this
+        profile's picture or one of its thumbnails.
+        """
+        if not name or clean_name(name) != name:
+            return False
+        if self.profile_picture and name == self.profile_picture.name:
+            return True
+        return bool(self.picture_hash) and name in variant_names(self.picture_hash)
+
+    def _srcset(self, ext):
+        if not self.picture_hash:
+            return ""
+        urls = variant_urls(self.picture_hash, ext)
+        return ", ".join(f"{url} {size}w" for size, url in urls.items())
+
+    @property
+    def thumbnail_url(self):
+        """130px JPEG thumbnail, or the original until thumbnails are ready."""
+        if self.picture_hash:
+            return variant_urls(self.picture_hash, "jpg")[130]
+        return self.profile_picture.url if self.profile_picture else ""
+
+    @property
+    def thumbnail_srcset(self):
+        return self._srcset("jpg")
+
+    @property
+    def thumbnail_webp_srcset(self):
+        return self._srcset("webp")
+
+
+PROFILE_SYNC_FIELDS = ("username", "email")
+
 
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
-    profile, _ = UserProfile.objects.get_or_create(user=instance)
-    profile.username = instance.username
-    profile.email = instance.email
-    profile.save()
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Drop the cached request.user (see accounts.backends) after any change."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_user_cache_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_cached_user(user.pk)
+
+
+@receiver(post_save, sender=User)
+def create_or_update_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Keep the profile's copy of username/email in sync, writing only on change.
+    Saves that touch neither field (e.g. the last_login update on every
+    login) cost nothing.
+    """
+    if update_fields is not None and not set(PROFILE_SYNC_FIELDS) & set(update_fields):
+        return
+
+    values = {field: getattr(instance, field) for field in PROFILE_SYNC_FIELDS}
+    if created:
+        # Single INSERT ... ON CONFLICT (user_id) DO UPDATE
+        UserProfile.objects.bulk_create(
+            [UserProfile(user=instance, **values)],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=list(PROFILE_SYNC_FIELDS),
+        )
+    else:
+        # Single UPDATE that matches no row when nothing changed
+        UserProfile.objects.filter(user=instance).exclude(**values).update(
+            updated_at=timezone.now(), **values
+        )
 
 
 # ==============================
 # 🌍 DESTINATION MODEL
 # ==============================
+@lru_cache(maxsize=None)
+def _english_country_name(code):
+    with translation.override("en"):
+        return str(countries.name(code))
+
+
+def build_search_text(name, city, location):
+    """Searchable document for a destination: name, city, country name and code."""
+    code = getattr(location, "code", location) or ""
+    country = _english_country_name(code) if code else ""
+    return " ".join(part for part in (name, city, country, code) if part)
+
+
 class Destination(models.Model):
     STATUS_CHOICES = [
         ("Wishlist", "Wishlist"),
@@ -39,10 +129,13 @@ class Destination(models.Model):
         ("Vacation", "Vacation"),
     ]
 
+    # No DB-level constraint: with sharding the row may live on another
+    # database than auth_user (see accounts/sharding.py).
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name="destinations"
+        related_name="destinations",
+        db_constraint=False,
     )
 
     name = models.CharField(
@@ -74,16 +167,152 @@ class Destination(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # 🔎 Denormalized search document, indexed by accounts/search.py
+    search_text = models.TextField(blank=True, default="", editable=False)
+
     def __str__(self):
         country_name = getattr(self.location, "name", "Unknown")
         return f"{self.name} - {country_name}"
 
+    def refresh_search_text(self):
+        """
+        Canonicalize city and recompute search_text (needed before
+        bulk_create/bulk_update).
+        """
+        self.city = canonical_city(self.city, self.location)
+        self.search_text = build_search_text(self.name, self.city, self.location)
+
     def save(self, *args, **kwargs):
-        """Ensure updated_at always updates."""
+        """Ensure updated_at always updates, city is canonical and search_text stays current."""
         self.updated_at = timezone.now()
+        self.refresh_search_text()
         super().save(*args, **kwargs)
 
     class Meta:
         ordering = ["-updated_at", "-created_at"]
         verbose_name = "Destination"
         verbose_name_plural = "Destinations"
+        indexes = [
+            # 🔖 Backs keyset pagination of each user's list (see pagination.py)
+            models.Index(
+                fields=["user", "-updated_at", "-created_at", "-id"],
+                name="dest_user_recent_idx",
+            ),
+            # 🛠️ Back the admin's status/country filters, newest id first
+            models.Index(fields=["status", "-id"], name="dest_status_idx"),
+            models.Index(fields=["location", "-id"], name="dest_location_idx"),
+        ]
+
+
+# ==============================
+# 📊 PER-USER TRAVEL STATS (denormalized)
+# ==============================
+class UserTravelStats(models.Model):
+    """
+    Running per-user totals kept in step with Destination writes
+    (see accounts/stats.py), so the stats dashboard never aggregates.
+    Rebuild with `manage.py rebuild_travel_stats`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="travel_stats", db_constraint=False)
+    total_count = models.PositiveIntegerField(default=0)
+    wishlist_count = models.PositiveIntegerField(default=0)
+    visited_count = models.PositiveIntegerField(default=0)
+    vacation_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.user.username}'s Travel Stats"
+
+    class Meta:
+        verbose_name = "Travel Stats"
+        verbose_name_plural = "Travel Stats"
+
+
+class UserCountryStats(models.Model):
+    """Per-user, per-country count of Visited destinations."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="country_stats", db_constraint=False)
+    country = CountryField()
+    visited_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.country}"
+
+    class Meta:
+        verbose_name = "Country Stats"
+        verbose_name_plural = "Country Stats"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "country"], name="unique_user_country_stats"),
+        ]
+
+
+# ==============================
+# 🪦 DELETED DESTINATIONS (for delta sync)
+# ==============================
+class DestinationTombstone(models.Model):
+    """
+    Marker left by every Destination delete so sync clients learn about it
+    (see accounts/sync.py). Compacted after DESTINATION_TOMBSTONE_RETENTION_DAYS
+    by `manage.py compact_tombstones`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_constraint=False)
+    destination_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"destination {self.destination_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        verbose_name = "Destination Tombstone"
+        verbose_name_plural = "Destination Tombstones"
+        indexes = [
+            # 🔖 Backs the sync keyset (user, deleted_at, id) and compaction by age
+            models.Index(fields=["user", "deleted_at", "id"], name="tombstone_user_sync_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_at_idx"),
+        ]
+
+
+@receiver(post_save, sender=Destination)
+@receiver(post_delete, sender=Destination)
+def invalidate_destination_list_cache(sender, instance, using, **kwargs):
+    """
+    Bump the owner's list version so cached pages are re-rendered — once the
+    write commits, so a request racing the transaction can't cache the old
+    rows under the new version.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_list_version(user_id), using=using)
+
+
+# ==============================
+# 🧭 SHARD DIRECTORY
+# ==============================
+class UserShard(models.Model):
+    """
+    Which shard database holds a user's destinations and stats, for users
+    placed explicitly (moved or pinned); everyone else lives where the
+    hash of their id puts them. Always read from "default".
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="shard")
+    shard = models.CharField(max_length=50)
+    # True while manage.py move_user_shard copies the last changes: writes are refused.
+    moving = models.BooleanField(default=False)
+    # Completed moves. Moved rows get new ids, so sync cursors issued before
+    # a move are refused even if the user ends up back on the same shard.
+    moves = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"user {self.user_id} → {self.shard}"
+
+    class Meta:
+        verbose_name = "User Shard"
+        verbose_name_plural = "User Shards"
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_rows(sender, instance, **kwargs):
+    """The CASCADE collector only looks on "default"; clear the user's shard too."""
+    from .sharding import delete_user_rows, sharding_enabled
+
+    if sharding_enabled():
+        delete_user_rows(instance.pk)
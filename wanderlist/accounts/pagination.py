@@ -0,0 +1,173 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# ==============================
+# 🔖 KEYSET (CURSOR) PAGINATION
+# ==============================
+# Pages are addressed by the sort key of their boundary row instead of an
+# OFFSET, so page N is a single index range scan on
+# (user, updated_at, created_at, id) and no COUNT(*) is ever issued.
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor string cannot be decoded."""
+
+
+def encode_cursor(destination):
+    """Build an opaque cursor from a row's (updated_at, created_at, pk)."""
+    payload = [
+        destination.updated_at.isoformat(),
+        destination.created_at.isoformat(),
+        destination.pk,
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Turn an opaque cursor back into (updated_at, created_at, pk)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        return (
+            datetime.fromisoformat(updated_at),
+            datetime.fromisoformat(created_at),
+            int(pk),
+        )
+    except (ValueError, TypeError, json.JSONDecodeError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _seek(key, direction):
+    """
+    Row-value comparison (updated_at, created_at, id) </> key as a Q.
+    The leading updated_at <=/>= bound is implied by the OR, but planners
+    only turn a plain range into an index seek: without it the scan starts
+    at the user's newest row and discards everything before the cursor.
+    """
+    updated_at, created_at, pk = key
+    op = "lt" if direction == "after" else "gt"
+    return Q(**{f"updated_at__{op}e": updated_at}) & (
+        Q(**{f"updated_at__{op}": updated_at})
+        | Q(updated_at=updated_at, **{f"created_at__{op}": created_at})
+        | Q(updated_at=updated_at, created_at=created_at, **{f"pk__{op}": pk})
+    )
+
+
+class KeysetPage:
+    """One page of rows plus the cursors needed to move around it."""
+
+    def __init__(self, items, has_next, has_previous):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = encode_cursor(items[-1]) if items and has_next else None
+        self.previous_cursor = encode_cursor(items[0]) if items and has_previous else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a user-supplied page size to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _page_query(queryset, after, before, page_size):
+    """Return (sliced queryset, direction) for the requested page."""
+    ordering = ("-updated_at", "-created_at", "-pk")
+    try:
+        if before:
+            key = decode_cursor(before)
+            rows = queryset.filter(_seek(key, "before")).order_by("updated_at", "created_at", "pk")
+            return rows[: page_size + 1], "before"
+        if after:
+            key = decode_cursor(after)
+            return queryset.filter(_seek(key, "after")).order_by(*ordering)[: page_size + 1], "after"
+    except InvalidCursor:
+        pass
+    return queryset.order_by(*ordering)[: page_size + 1], "first"
+
+
+def _build_page(rows, direction, page_size):
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == "before":
+        return KeysetPage(rows[::-1], has_next=True, has_previous=more)
+    return KeysetPage(rows, has_next=more, has_previous=direction == "after")
+
+
+def paginate_destinations(queryset, after=None, before=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return a KeysetPage of `queryset` ordered newest-first.
+    `after` moves forward from a cursor, `before` moves backward.
+    Invalid cursors fall back to the first page.
+    """
+    query, direction = _page_query(queryset, after, before, page_size)
+    return _build_page(list(query), direction, page_size)
+
+
+async def apaginate_destinations(queryset, after=None, before=None, page_size=DEFAULT_PAGE_SIZE):
+    """Async variant of paginate_destinations using async iteration."""
+    query, direction = _page_query(queryset, after, before, page_size)
+    return _build_page([row async for row in query], direction, page_size)
+
+
+# ==============================
+# 📐 ESTIMATED COUNTS (admin changelists)
+# ==============================
+# COUNT(*) on Postgres scans every matching row, so an OFFSET paginator
+# over millions of destinations gets slower as the table grows. Above
+# EXACT_COUNT_LIMIT rows the count is read from the planner instead:
+# pg_class.reltuples for the whole table, the EXPLAIN row estimate when
+# filters apply. Other backends (SQLite in development) count exactly.
+
+EXACT_COUNT_LIMIT = 10000
+
+
+def estimated_count(queryset):
+    """Planner estimate of queryset.count() on Postgres, else None."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    if not queryset.query.where and not queryset.query.distinct:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # -1 until the table is first analyzed
+        return row[0] if row and row[0] >= 0 else None
+    plan = json.loads(queryset.explain(format="json"))
+    if isinstance(plan, list):  # raw EXPLAIN output is a one-element array
+        plan = plan[0]
+    return int(plan["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count is the planner estimate once it passes EXACT_COUNT_LIMIT."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is None or estimate < EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
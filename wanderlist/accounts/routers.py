@@ -0,0 +1,90 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+
+# ==============================
+# 🗄️ PRIMARY / READ-REPLICA ROUTING
+# ==============================
+# Reads of the accounts models (destination lists, profiles, stats) go to a
+# random replica_* alias; everything else, all writes and anything inside a
+# transaction stay on "default". Routing only applies inside requests (see
+# ReplicaPinningMiddleware) — management commands always use the primary.
+#
+# Read-your-writes: once a request writes, the rest of it reads from the
+# primary, and the middleware sets a short-lived cookie so the same
+# browser keeps reading from the primary for REPLICA_PIN_SECONDS while the
+# replicas catch up.
+
+REPLICA_APPS = {"accounts"}
+PIN_COOKIE = "db_pin"
+
+_state = ContextVar("replica_routing", default=None)
+
+
+class RoutingState:
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+def begin_request(pinned):
+    return _state.set(RoutingState(pinned))
+
+
+def end_request(token):
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def pin_seconds():
+    return getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+
+def pin_cookie_value():
+    return str(int(time.time()) + pin_seconds())
+
+
+def is_pinned(cookie):
+    try:
+        return int(cookie) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+class PrimaryReplicaRouter:
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or state.wrote or not self.replicas:
+            return "default"
+        if model._meta.app_label not in REPLICA_APPS:
+            return "default"
+        if connections["default"].in_atomic_block:
+            return "default"
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.app_label in REPLICA_APPS:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects may come from either.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,102 @@
+from zoneinfo import ZoneInfo
+
+from django.db.models.query import ValuesListIterable
+from django.utils import dateformat, timezone
+
+from .country_index import country_names
+
+
+# ==============================
+# 🪶 COMPACT DESTINATION ROWS
+# ==============================
+# The list table only shows a handful of columns, so it doesn't need model
+# instances: destination_rows() selects just those columns as tuples and
+# turns each into a DestinationRow (__slots__, no model state, no Country
+# object per access). Country names come from a code→name dict built once
+# per language, and the date strings and status badge are computed once
+# per row instead of by template filters on every use.
+#
+# Rows are read-only; anything that edits a destination still loads the
+# model. Views that already hold an instance (fragments, search) wrap it
+# with DestinationRow.from_instance() so every table row renders from the
+# same template.
+
+ROW_FIELDS = ("pk", "name", "location", "status", "created_at", "updated_at")
+DISPLAY_TIME_ZONE = ZoneInfo("Asia/Manila")  # the list always shows Philippine time
+DISPLAY_FORMAT = "M d, Y • h:i A"
+STATUS_BADGES = {
+    "Wishlist": "bg-warning text-dark",
+    "Vacation": "bg-info text-dark",
+    "Visited": "bg-success",
+}
+UNKNOWN_BADGE = "bg-secondary"
+
+
+def display_time(value):
+    """value formatted as the list shows it ("M d, Y • h:i A", Manila time)."""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value, DISPLAY_TIME_ZONE)
+    return dateformat.format(value, DISPLAY_FORMAT)
+
+
+class DestinationRow:
+    """One row of the destination table, with its display strings precomputed."""
+
+    __slots__ = (
+        "pk", "name", "location", "country_name", "status", "status_label", "badge",
+        "created_at", "updated_at", "created_display", "updated_display", "edited",
+    )
+
+    def __init__(self, pk, name, location, status, created_at, updated_at, names):
+        self.pk = pk
+        self.name = name or "Unnamed Destination"
+        self.location = location or ""
+        self.country_name = (names.get(location) or "Unknown") if location else ""
+        self.status = status
+        self.status_label = status if status in STATUS_BADGES else "Unknown"
+        self.badge = STATUS_BADGES.get(status, UNKNOWN_BADGE)
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.created_display = display_time(created_at)
+        # Same second as created: the row was never edited.
+        self.edited = bool(updated_at) and updated_at.replace(microsecond=0) != created_at.replace(microsecond=0)
+        self.updated_display = display_time(updated_at) if self.edited else self.created_display
+
+    @classmethod
+    def from_instance(cls, destination, names=None):
+        return cls(
+            destination.pk,
+            destination.name,
+            getattr(destination.location, "code", None),
+            destination.status,
+            destination.created_at,
+            destination.updated_at,
+            names if names is not None else country_names(),
+        )
+
+    def __str__(self):
+        return f"{self.name} - {self.country_name or 'Unknown'}"
+
+
+class DestinationRowIterable(ValuesListIterable):
+    """Iterate a values_list(*ROW_FIELDS) query as DestinationRow objects."""
+
+    def __iter__(self):
+        names = country_names()
+        for values in super().__iter__():
+            yield DestinationRow(*values, names)
+
+
+def destination_rows(queryset):
+    """
+    `queryset` reduced to the table's columns, yielding DestinationRow.
+    It stays a queryset: filter, order, slice or paginate it as before.
+    """
+    rows = queryset.values_list(*ROW_FIELDS)
+    rows._iterable_class = DestinationRowIterable
+    return rows
+
+
+def rows_from_instances(destinations):
+    names = country_names()
+    return [DestinationRow.from_instance(destination, names) for destination in destinations]
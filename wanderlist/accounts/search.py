@@ -0,0 +1,137 @@
+import re
+
+from django.db import connections
+
+from .models import Destination
+from .sharding import shard_for
+
+
+# ==============================
+# 🔎 DESTINATION SEARCH
+# ==============================
+# Destination.search_text holds "name city country-name code". It is indexed
+# per database vendor:
+#   • PostgreSQL: GIN over to_tsvector('simple', search_text) for ranked
+#     full-text matches plus a pg_trgm GIN index for typo-tolerant matches.
+#   • SQLite: an external-content FTS5 table kept in sync by triggers (so
+#     bulk_create and QuerySet.update stay indexed too), queried with
+#     prefix terms and ranked by bm25. It indexes user_id as well, so a
+#     user's search is one FTS5 query whose cost follows that user's rows.
+# Other backends fall back to icontains. The indexes, triggers and FTS
+# table are created by migration 0006 (restored on SQLite by 0008, and
+# given the user_id column by 0011). The backend is that of the database
+# holding the user's rows (their shard), not necessarily "default".
+
+FTS_TABLE = "accounts_destination_fts"
+
+
+# ==============================
+# 🔍 QUERYING
+# ==============================
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _search_document():
+    """
+    to_tsvector('simple', search_text), written exactly as dest_search_tsv_idx
+    is defined. SearchVector("search_text") would compile to
+    to_tsvector(..., COALESCE(search_text, '')), which the planner can't
+    match to that index.
+    """
+    from django.contrib.postgres.search import SearchVectorField
+    from django.db.models import F, Func
+
+    return Func(F("search_text"), template="to_tsvector('simple', %(expressions)s)", output_field=SearchVectorField())
+
+
+def _fts5_query(text, user_id=None):
+    """
+    Turn free text into an FTS5 query: every word as a quoted prefix term
+    on search_text, plus the owner when `user_id` is given. Empty if the
+    text has no words.
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return ""
+    match = "search_text : (" + " ".join(f'"{word}"*' for word in words) + ")"
+    if user_id is not None:
+        match = f'user_id : "{int(user_id)}" AND {match}'
+    return match
+
+
+def search_destinations(user, text, limit=25, offset=0):
+    """
+    Return up to `limit` of the user's destinations matching `text`,
+    best match first. Callers fetch limit+1 to detect a next page.
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    vendor = connections[shard_for(user)].vendor
+
+    if vendor == "postgresql":
+        # Needs django.contrib.postgres (added to INSTALLED_APPS on Postgres)
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+        from django.db.models import F, Q
+        from django.db.models.functions import Greatest
+
+        vector = _search_document()
+        query = SearchQuery(text, config="simple", search_type="websearch")
+        return list(
+            Destination.objects.filter(user=user)
+            .annotate(_vector=vector)
+            .filter(Q(_vector=query) | Q(search_text__trigram_word_similar=text))
+            .annotate(rank=Greatest(SearchRank(vector, query), TrigramWordSimilarity(text, "search_text")))
+            .order_by(F("rank").desc(), "-updated_at")[offset:offset + limit]
+        )
+
+    if vendor == "sqlite":
+        match = _fts5_query(text, user.pk)
+        if not match:
+            return []
+        # The owner is matched inside FTS5 (and again on d.user_id); bm25
+        # gives the always-matching user_id column no weight.
+        return list(Destination.objects.raw(
+            f"SELECT d.* FROM {FTS_TABLE} f "
+            f"JOIN accounts_destination d ON d.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND d.user_id = %s "
+            f"ORDER BY bm25({FTS_TABLE}, 1.0, 0.0), d.updated_at DESC LIMIT %s OFFSET %s",
+            [match, user.pk, limit, offset],
+        ))
+
+    return list(
+        Destination.objects.filter(user=user, search_text__icontains=text)
+        .order_by("-updated_at")[offset:offset + limit]
+    )
+
+
+def match_destinations(queryset, text):
+    """
+    Filter `queryset` (any user's rows) to those matching `text` through the
+    same indexes, without ranking; used by the admin changelist search.
+    """
+    text = (text or "").strip()
+    if not text:
+        return queryset
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        from django.contrib.postgres.search import SearchQuery
+        from django.db.models import Q
+
+        query = SearchQuery(text, config="simple", search_type="websearch")
+        return queryset.annotate(_vector=_search_document()).filter(
+            Q(_vector=query) | Q(search_text__trigram_word_similar=text)
+        )
+
+    if vendor == "sqlite":
+        from django.db.models.expressions import RawSQL
+
+        match = _fts5_query(text)
+        if not match:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        )
+
+    return queryset.filter(search_text__icontains=text)
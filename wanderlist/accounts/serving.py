@@ -0,0 +1,205 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+
+# ==============================
+# 📤 FILE RESPONSES
+# ==============================
+# serve_file() answers a GET/HEAD for a file on local disk the way a static
+# file server would: ETag/Last-Modified with 304s, single byte ranges (206,
+# If-Range; a range that can't be satisfied is ignored and the whole file
+# sent, as RFC 9110 allows), precompressed .br/.gz sidecars chosen from
+# Accept-Encoding, and streaming in fixed-size blocks via FileResponse so
+# large files never sit in memory. offload_file() instead hands the transfer
+# to a fronting nginx (X-Accel-Redirect) or Apache/lighttpd (X-Sendfile).
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _FileRange:
+    """File-like view of bytes [start, start + length) for FileResponse."""
+
+    def __init__(self, handle, start, length):
+        self.handle = handle
+        self.remaining = length
+        handle.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.handle.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.handle.close()
+
+
+def clean_name(name):
+    """
+    `name` as a normalized path relative to a storage root, or None if it is
+    absolute or has a ".." segment. Ownership checks compare exact names, so
+    they must never see "thumbs/x/../../other.jpg".
+    """
+    if not name or name.startswith("/") or "\\" in name or "\0" in name:
+        return None
+    if ".." in name.split("/"):
+        return None
+    name = posixpath.normpath(name)
+    return None if name == "." else name
+
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _parse_range(header, size):
+    """(start, end) inclusive for a single satisfiable range, else None (send the whole file)."""
+    match = _RANGE_RE.match(header.replace(" ", ""))
+    if not match:
+        return None  # multiple or malformed ranges: send the whole file
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+def _if_range_passes(request, etag, last_modified):
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith(('"', "W/")):
+        return etag in parse_etags(value) and not value.startswith("W/")
+    since = parse_http_date_safe(value)
+    return since is not None and int(last_modified) <= since
+
+
+def serve_file(request, path, *, cache_control=None, precompressed=False, content_type=None, headers=None):
+    """
+    Stream `path` (an absolute filesystem path) with conditional and Range
+    support. With `precompressed`, a `path.br`/`path.gz` sidecar is sent to
+    clients that accept it. Extra `headers` are added to every response.
+    """
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404("File not found.")
+    if not os.path.isfile(path):
+        raise Http404("File not found.")
+
+    if content_type is None:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    common = dict(headers or {})
+    if cache_control:
+        common["Cache-Control"] = cache_control
+
+    # Range requests always get the identity encoding so offsets are stable.
+    encoding, serve_path = None, path
+    if precompressed:
+        common["Vary"] = "Accept-Encoding"
+        if "Range" not in request.headers:
+            accepted = _accepted_encodings(request)
+            for coding, suffix in ENCODINGS:
+                if coding in accepted and os.path.isfile(path + suffix):
+                    encoding, serve_path = coding, path + suffix
+                    stat = os.stat(serve_path)
+                    break
+
+    etag = file_etag(stat)
+    if encoding:
+        etag = f'{etag[:-1]}-{encoding}"'
+    common["ETag"] = etag
+    common["Last-Modified"] = http_date(stat.st_mtime)
+    common["Accept-Ranges"] = "bytes"
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        for name, value in common.items():
+            conditional[name] = value
+        return conditional
+
+    size = stat.st_size
+    byte_range = None
+    if encoding is None and "Range" in request.headers and _if_range_passes(request, etag, stat.st_mtime):
+        byte_range = _parse_range(request.headers["Range"], size)
+
+    handle = open(serve_path, "rb")
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(
+            _FileRange(handle, start, end - start + 1),
+            status=206, content_type=content_type, filename=os.path.basename(path),
+        )
+        response.block_size = CHUNK_SIZE
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = FileResponse(handle, content_type=content_type, filename=os.path.basename(path))
+        response.block_size = CHUNK_SIZE
+        response["Content-Length"] = str(size)
+        if encoding:
+            response["Content-Encoding"] = encoding
+    for name, value in common.items():
+        response[name] = value
+    return response
+
+
+OFFLOAD_MODES = ("x-accel-redirect", "x-sendfile")
+
+
+def offload_file(mode, name, root, *, accel_prefix, cache_control=None, content_type=None):
+    """
+    Empty response telling the proxy to send `name` (relative to `root`)
+    itself; the proxy then handles Range and conditional requests. `name`
+    is resolved with safe_join() first, so ".." segments or an absolute
+    path can't point the proxy outside `root` (404 instead).
+    """
+    if mode not in OFFLOAD_MODES:
+        raise ValueError(f"Unknown offload mode {mode!r}; expected one of {OFFLOAD_MODES}.")
+    try:
+        full_path = safe_join(root, name)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+    response = HttpResponse(content_type=content_type or mimetypes.guess_type(name)[0] or "application/octet-stream")
+    if mode == "x-accel-redirect":
+        relative = os.path.relpath(full_path, os.path.abspath(root)).replace(os.sep, "/")
+        response["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + quote(relative)
+    else:
+        response["X-Sendfile"] = full_path
+    if cache_control:
+        response["Cache-Control"] = cache_control
+    return response
@@ -0,0 +1,333 @@
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.models import Count, F
+
+from .cache import bump_list_version, deferred_list_invalidation
+from .models import Destination, DestinationTombstone, UserCountryStats, UserShard, UserTravelStats
+
+
+# ==============================
+# 🧩 USER-SHARDED DATABASES
+# ==============================
+# With DATABASE_SHARD_URLS set, each user's destinations and travel stats
+# live on one shard_N database: the one named in the UserShard directory
+# (on "default") if the user was placed explicitly, otherwise the one a
+# stable hash of the user id picks. Users, profiles, sessions and the
+# directory itself stay on "default".
+#
+# Every view works on request.user's rows only, so routing needs no
+# changes to the queries: ShardRoutingMiddleware scopes the request to
+# its user and UserShardRouter sends the sharded models to that user's
+# shard (saves of a row go to its owner's shard via the instance hint).
+# Code working across users picks a shard itself: .using(alias),
+# route_to(alias)/route_for_user(user), or fan_out() over all shards.
+# Queries with no user and no shard in scope go to "default".
+#
+# Without shards the router isn't installed and shard_for() is always
+# "default", so the helpers below are safe to call unconditionally.
+
+SHARDED_MODELS = {Destination, DestinationTombstone, UserTravelStats, UserCountryStats}
+DIRECTORY_KEY = "shard_entry:{}"
+
+_scope = ContextVar("shard_scope", default=None)
+
+
+class ShardMoving(Exception):
+    """Raised on a write for a user whose rows are being moved to another shard."""
+
+    def __init__(self, user_id):
+        super().__init__(f"Destinations of user {user_id} are moving to another shard.")
+        self.user_id = user_id
+
+
+def shard_aliases():
+    """Configured shard aliases in shard_N order, or ["default"] without sharding."""
+    aliases = sorted(
+        (alias for alias in settings.DATABASES if alias.startswith("shard_")),
+        key=lambda alias: int(alias.rpartition("_")[2]),
+    )
+    return aliases or ["default"]
+
+
+def sharding_enabled():
+    return shard_aliases() != ["default"]
+
+
+def hashed_shard(user_id, aliases=None):
+    """Shard a user lives on when the directory has no entry (crc32 is stable across processes)."""
+    aliases = aliases or shard_aliases()
+    return aliases[zlib.crc32(str(user_id).encode()) % len(aliases)]
+
+
+def shard_entry(user_id):
+    """(alias, moving, moves) for a user, cached for SHARD_DIRECTORY_TTL seconds."""
+    if not sharding_enabled():
+        return "default", False, 0
+    key = DIRECTORY_KEY.format(user_id)
+    entry = cache.get(key)
+    if entry is None:
+        row = (
+            UserShard.objects.using("default").filter(user_id=user_id)
+            .values_list("shard", "moving", "moves").first()
+        )
+        entry = tuple(row) if row else (hashed_shard(user_id), False, 0)
+        cache.set(key, entry, getattr(settings, "SHARD_DIRECTORY_TTL", 300))
+    return entry
+
+
+def shard_for(user):
+    """Database alias holding `user`'s (a User or its pk) destinations and stats."""
+    return shard_entry(getattr(user, "pk", user))[0]
+
+
+def set_directory(user_id, alias, moving=False, moved=False):
+    """Point user_id at `alias`; `moved` counts a completed move."""
+    entries = UserShard.objects.using("default")
+    row, _ = entries.update_or_create(user_id=user_id, defaults={"shard": alias, "moving": moving})
+    if moved:
+        entries.filter(pk=user_id).update(moves=F("moves") + 1)
+        row.refresh_from_db(fields=["moves"])
+    cache.set(
+        DIRECTORY_KEY.format(user_id), (alias, moving, row.moves), getattr(settings, "SHARD_DIRECTORY_TTL", 300)
+    )
+
+
+def forget_directory(user_ids):
+    """Drop cached directory entries, e.g. after writing UserShard rows in bulk."""
+    cache.delete_many([DIRECTORY_KEY.format(user_id) for user_id in user_ids])
+
+
+def atomic_for(user):
+    """transaction.atomic() on the database that holds `user`'s rows."""
+    return transaction.atomic(using=shard_for(user))
+
+
+# ==============================
+# 🎯 ROUTING SCOPE
+# ==============================
+class _Scope:
+    __slots__ = ("alias", "user", "entry")
+
+    def __init__(self, alias=None, user=None):
+        self.alias = alias  # explicit shard, wins over everything
+        self.user = user    # user id, or a callable returning it (resolved lazily)
+        self.entry = None
+
+    def user_id(self):
+        if callable(self.user):
+            user_id = self.user()
+            if user_id is None:
+                return None  # not known yet (see ShardRoutingMiddleware); ask again next query
+            self.user = user_id
+        return self.user
+
+    def user_entry(self):
+        if self.entry is None and self.user_id() is not None:
+            self.entry = shard_entry(self.user_id())
+        return self.entry
+
+
+@contextmanager
+def _scoped(scope):
+    token = _scope.set(scope)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def route_to(alias):
+    """Send sharded-model queries in the block to `alias`."""
+    return _scoped(_Scope(alias=alias))
+
+
+def route_for_user(user):
+    """Send sharded-model queries in the block to the shard of `user` (a User, pk or callable)."""
+    return _scoped(_Scope(user=user if callable(user) else getattr(user, "pk", user)))
+
+
+class UserShardRouter:
+    """Place Destination/UserTravelStats/UserCountryStats on their owner's shard."""
+
+    def _route(self, model, hints, write):
+        if model not in SHARDED_MODELS:
+            return None
+        scope = _scope.get()
+        if scope is not None and scope.alias:
+            return scope.alias
+        instance = hints.get("instance")
+        user_id = instance.pk if isinstance(instance, User) else getattr(instance, "user_id", None)
+        if user_id is not None:
+            same_user = scope is not None and scope.user_id() == user_id
+            entry = scope.user_entry() if same_user else shard_entry(user_id)
+        elif scope is not None:
+            user_id, entry = scope.user_id(), scope.user_entry()
+        else:
+            return None
+        if entry is None:
+            return None
+        if write and entry[1]:
+            raise ShardMoving(user_id)
+        return entry[0]
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints, write=False)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints, write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Rows point at auth_user on "default" from their shard.
+        if type(obj1) in SHARDED_MODELS or type(obj2) in SHARDED_MODELS:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Shards carry the full schema so migrations stay linear; only the
+        # sharded tables ever hold rows there.
+        if db.startswith("shard_"):
+            return True
+        return None
+
+
+# ==============================
+# 📡 FAN-OUT ACROSS SHARDS
+# ==============================
+def fan_out(function, aliases=None):
+    """
+    Call function(alias) for every shard in parallel threads and return
+    {alias: result}. Each thread opens (and closes) its own connection.
+    """
+    aliases = list(aliases or shard_aliases())
+    if len(aliases) == 1:
+        with route_to(aliases[0]):
+            return {aliases[0]: function(aliases[0])}
+
+    def run(alias):
+        try:
+            with route_to(alias):
+                return function(alias)
+        finally:
+            connections[alias].close()
+
+    with ThreadPoolExecutor(max_workers=len(aliases)) as pool:
+        return dict(zip(aliases, pool.map(run, aliases)))
+
+
+def shard_summary():
+    """Per-shard destination/owner counts and status totals, queried in parallel."""
+    def summarize(alias):
+        rows = Destination.objects.using(alias)
+        return {
+            "destinations": rows.count(),
+            "users": rows.values("user_id").distinct().count(),
+            "statuses": dict(rows.values_list("status").annotate(n=Count("id")).order_by()),
+        }
+
+    return fan_out(summarize)
+
+
+# ==============================
+# 🚚 MOVING A USER BETWEEN SHARDS
+# ==============================
+# Online: the rows are copied while the user keeps working on the source;
+# then the directory entry is flagged `moving` (writes get a 503 from
+# ShardRoutingMiddleware, reads carry on), in-flight requests get
+# SHARD_MOVE_GRACE_SECONDS to finish, the rows changed or deleted since
+# the first pass are synced, stats are rebuilt on the target and the entry
+# flips to the target. Only then are the source rows deleted.
+# Copies get new primary keys on the target (ids are per-database), so
+# URLs and list cursors pointing at old ids stop resolving after a move.
+# Web processes see the freeze only through the cached directory entry, so
+# a move needs a cache every process shares (SHARED_CACHE): with locmem
+# they would keep writing to the source and those writes would be lost.
+
+MOVE_FIELDS = [field.attname for field in Destination._meta.concrete_fields if not field.primary_key]
+
+
+def move_user(user_id, target, source=None, batch_size=1000, grace=None, log=None):
+    """Move a user's destinations and stats to `target`; returns the rows moved."""
+    from .stats import rebuild_user_stats
+
+    if not settings.SHARED_CACHE:
+        raise ImproperlyConfigured("Moving users between shards needs a shared CACHE_BACKEND.")
+    log = log or (lambda message: None)
+    source = source or shard_for(user_id)
+    if source == target:
+        return 0
+    if grace is None:
+        grace = getattr(settings, "SHARD_MOVE_GRACE_SECONDS", 2)
+
+    copied = {}  # source pk -> (target pk, updated_at)
+    _sync(user_id, source, target, copied, batch_size)
+    log(f"copied {len(copied)} row(s) from {source} to {target}; freezing writes")
+    set_directory(user_id, source, moving=True)
+    try:
+        time.sleep(grace)
+        _sync(user_id, source, target, copied, batch_size)
+        with route_to(target), transaction.atomic(using=target):
+            rebuild_user_stats(user_id)
+    except BaseException:
+        set_directory(user_id, source, moving=False)
+        raise
+    set_directory(user_id, target, moving=False, moved=True)
+    bump_list_version(user_id)
+    delete_user_rows(user_id, source)
+    log(f"moved {len(copied)} row(s) to {target}")
+    return len(copied)
+
+
+def _sync(user_id, source, target, copied, batch_size):
+    """Bring the target copy in line with the source: insert new, update changed, drop deleted."""
+    seen = set()
+    rows = Destination.objects.using(source).filter(user_id=user_id).order_by("pk").values("pk", *MOVE_FIELDS)
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        seen.add(row["pk"])
+        if copied.get(row["pk"], (None, None))[1] != row["updated_at"]:
+            batch.append(row)
+        if len(batch) >= batch_size:
+            _write(target, batch, copied)
+            batch = []
+    _write(target, batch, copied)
+
+    gone = [copied.pop(pk)[0] for pk in set(copied) - seen]
+    if gone:
+        Destination.objects.using(target).filter(pk__in=gone).delete()
+
+
+def _write(target, rows, copied):
+    if not rows:
+        return
+    fresh = [row for row in rows if row["pk"] not in copied]
+    with transaction.atomic(using=target):
+        for row in rows:
+            if row["pk"] in copied:
+                values = {name: row[name] for name in MOVE_FIELDS}
+                Destination.objects.using(target).filter(pk=copied[row["pk"]][0]).update(**values)
+                copied[row["pk"]] = (copied[row["pk"]][0], row["updated_at"])
+        created = Destination.objects.using(target).bulk_create(
+            Destination(**{name: row[name] for name in MOVE_FIELDS}) for row in fresh
+        )
+        # bulk_create stamps auto_now(_add) fields with the current time.
+        for row, destination in zip(fresh, created):
+            destination.created_at, destination.updated_at = row["created_at"], row["updated_at"]
+            copied[row["pk"]] = (destination.pk, row["updated_at"])
+        Destination.objects.using(target).bulk_update(created, ["created_at", "updated_at"])
+
+
+def delete_user_rows(user_id, alias=None):
+    """Delete a user's sharded rows from `alias` (default: their shard)."""
+    alias = alias or shard_for(user_id)
+    with deferred_list_invalidation(), route_to(alias), transaction.atomic(using=alias):
+        for model in (Destination, DestinationTombstone, UserCountryStats, UserTravelStats):
+            model.objects.using(alias).filter(user_id=user_id).delete()
@@ -0,0 +1,307 @@
+import gzip
+import json
+import os
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import DateTimeField, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import PROFILE_SYNC_FIELDS, Destination, UserProfile, UserShard
+from .sharding import forget_directory, shard_aliases, shard_for
+
+
+# ==============================
+# 💾 STREAMING DUMP / RESTORE
+# ==============================
+# Replaces dumpdata/loaddata on data.json for users, profiles and
+# destinations. Records use the dumpdata shape ({"model", "pk", "fields"}),
+# one per line (NDJSON, like `dumpdata --format jsonl`), so dumps are
+# written from server-side iterators and read back record by record.
+# Restores insert with bulk_create in one transaction per batch, so no
+# save()/post_save runs per row; the profile receiver's work is redone once
+# for all users by reconcile_profiles(). After every committed batch the
+# number of records consumed goes to a checkpoint file, and inserts ignore
+# rows that already exist, so an interrupted restore can be resumed or
+# simply rerun. Memory is bounded by the batch size, not the dump size.
+#
+# With shards, destinations are dumped from every shard and restored onto
+# their owner's shard. Ids are per shard, so the UserShard directory is
+# dumped and restored first: users then land on the shard they came from
+# and their ids can't collide with another shard's. Restore onto the same
+# shard layout the dump was taken from (merging shards would collide ids).
+
+MODELS = (User, UserShard, UserProfile, Destination)  # dependency order
+MODEL_LABELS = {model._meta.label_lower: model for model in MODELS}
+DERIVED_FIELDS = {Destination: {"search_text"}}  # recomputed on restore
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+
+_SEPARATORS = re.compile(r"[\s,\[\]]*")
+
+
+def open_dump(path, mode):
+    """Text handle for `path`, gzip-compressed for *.gz."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+# ==============================
+# 📤 DUMP
+# ==============================
+def dump_fields(model):
+    derived = DERIVED_FIELDS.get(model, set())
+    return [
+        field.name for field in model._meta.get_fields()
+        if field.concrete and not field.primary_key and field.name not in derived
+    ]
+
+
+def dump_accounts(stream, batch_size=BATCH_SIZE):
+    """Write every user, profile and destination to `stream` as NDJSON; returns counts per model."""
+    counts = {}
+    for model in MODELS:
+        counts[model._meta.label_lower] = 0
+        aliases = shard_aliases() if model is Destination else ["default"]
+        for alias in aliases:
+            queryset = model._default_manager.using(alias).order_by("pk")
+            if model is User:
+                queryset = queryset.prefetch_related("groups", "user_permissions")
+            counter = _Counted(queryset.iterator(chunk_size=batch_size))
+            serializers.serialize("jsonl", counter, stream=stream, fields=dump_fields(model))
+            counts[model._meta.label_lower] += counter.count
+    return counts
+
+
+class _Counted:
+    def __init__(self, iterable):
+        self.iterable = iterable
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.iterable:
+            self.count += 1
+            yield item
+
+
+# ==============================
+# 📥 RESTORE
+# ==============================
+def iter_records(stream):
+    """
+    Yield JSON objects from NDJSON or a dumpdata JSON array (data.json)
+    without reading the whole file: values are decoded one at a time from
+    a READ_SIZE-bounded buffer.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if position < len(buffer):
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield record
+                continue
+        elif eof:
+            return
+        chunk = stream.read(READ_SIZE)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+@contextmanager
+def preserved_timestamps(models=MODELS):
+    """
+    Let bulk_create keep the dumped created_at/updated_at instead of
+    auto_now/auto_now_add overwriting them (what loaddata's raw save does).
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield [(field.model, field.attname) for field in fields]
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Checkpoint:
+    """Records consumed by committed batches, kept next to the dump."""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+
+    def load(self):
+        try:
+            with open(self.path) as handle:
+                state = json.load(handle)
+        except FileNotFoundError:
+            return 0
+        if state.get("source") != self.source:
+            raise ValueError(f"{self.path} belongs to {state.get('source')}, not {self.source}.")
+        return state["records"]
+
+    def save(self, records):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as handle:
+            json.dump({"source": self.source, "records": records}, handle)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def restore_accounts(stream, *, skip=0, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Insert the users, profiles and destinations from `stream`, skipping the
+    first `skip` records. After each committed batch `on_batch(records)` is
+    called with the number of records consumed so far. Returns inserted
+    counts per model (rows that already existed are not counted).
+    """
+    counts = dict.fromkeys(MODEL_LABELS, 0)
+    pending, pending_model = [], None
+
+    def flush(consumed):
+        nonlocal pending
+        if pending:
+            with transaction.atomic():
+                counts[pending_model._meta.label_lower] += _insert(pending_model, pending, timestamp_fields)
+            pending = []
+        if on_batch is not None:
+            on_batch(consumed)
+
+    with preserved_timestamps() as timestamp_fields:
+        position = 0
+        for position, record in enumerate(iter_records(stream), start=1):
+            if position <= skip:
+                continue
+            model = MODEL_LABELS.get(str(record.get("model", "")).lower())
+            if model is None:
+                continue  # sessions, contenttypes, …: not restored
+            if model is not pending_model:
+                flush(position - 1)
+                pending_model = model
+            pending.append(record)
+            if len(pending) >= batch_size:
+                flush(position)
+        flush(max(position, skip))
+    return counts
+
+
+def _insert(model, records, timestamp_fields):
+    objects, m2m = [], []
+    now = timezone.now()
+    datetime_fields = [field for field in model._meta.concrete_fields if isinstance(field, DateTimeField)]
+    for deserialized in serializers.deserialize("python", records, ignorenonexistent=True):
+        instance = deserialized.object
+        for field_model, attname in timestamp_fields:
+            if field_model is model and getattr(instance, attname) is None:
+                setattr(instance, attname, now)  # old fixtures lack timestamps
+        if not settings.USE_TZ:
+            # dumpdata writes UTC ("...Z"); store local time like the app does.
+            for field in datetime_fields:
+                value = getattr(instance, field.attname)
+                if value is not None and timezone.is_aware(value):
+                    setattr(instance, field.attname, timezone.make_naive(value))
+        if model is Destination:
+            instance.refresh_search_text()
+        if model is UserShard:
+            instance.moving = False  # a dump taken mid-move must not freeze the user
+        objects.append(instance)
+        for name, values in (deserialized.m2m_data or {}).items():
+            through = model._meta.get_field(name).remote_field.through
+            source, target = _through_columns(through, model)
+            m2m.extend(through(**{source: instance.pk, target: value}) for value in values)
+
+    if model is Destination:
+        by_shard = {}
+        for instance in objects:
+            by_shard.setdefault(shard_for(instance.user_id), []).append(instance)
+    else:
+        by_shard = {"default": objects}
+    inserted = 0
+    for alias, rows in by_shard.items():
+        manager = model._default_manager.db_manager(alias)
+        with transaction.atomic(using=alias):
+            before = manager.filter(pk__in=[obj.pk for obj in rows]).count()
+            manager.bulk_create(rows, ignore_conflicts=True)
+            inserted += manager.filter(pk__in=[obj.pk for obj in rows]).count() - before
+    if model is UserShard:
+        forget_directory([obj.pk for obj in objects])
+    if m2m:
+        m2m[0].__class__.objects.bulk_create(m2m, ignore_conflicts=True)
+    return inserted
+
+
+def _through_columns(through, model):
+    source = target = None
+    for field in through._meta.concrete_fields:
+        if field.is_relation:
+            if field.related_model is model and source is None:
+                source = field.attname
+            else:
+                target = field.attname
+    return source, target
+
+
+# ==============================
+# 👤 AFTER THE RESTORE
+# ==============================
+def reconcile_profiles():
+    """
+    Do for every user at once what the post_save profile receiver does per
+    save: create missing profiles, then copy username/email where they
+    differ. Returns (created, updated).
+    """
+    profile_table = connection.ops.quote_name(UserProfile._meta.db_table)
+    user_table = connection.ops.quote_name(User._meta.db_table)
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {profile_table} "
+            f"(user_id, username, email, profile_picture, picture_hash, created_at, updated_at) "
+            f"SELECT u.id, u.username, u.email, '', '', %s, %s FROM {user_table} u "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {profile_table} p WHERE p.user_id = u.id)",
+            [now, now],
+        )
+        created = cursor.rowcount
+
+        users = User.objects.filter(pk=OuterRef("user_id"))
+        mismatched = Q()
+        for field in PROFILE_SYNC_FIELDS:
+            source = Subquery(users.values(field)[:1])
+            mismatched |= ~Q(**{field: source}) | Q(**{f"{field}__isnull": True})
+        updated = UserProfile.objects.filter(mismatched).update(
+            updated_at=now,
+            **{field: Subquery(users.values(field)[:1]) for field in PROFILE_SYNC_FIELDS},
+        )
+    return created, updated
+
+
+def reset_sequences():
+    """Move the id sequences past the restored explicit primary keys (Postgres/Oracle)."""
+    models = {"default": [model for model in MODELS if model is not Destination]}
+    for alias in shard_aliases():
+        models.setdefault(alias, []).append(Destination)
+    for alias, restored in models.items():
+        statements = connections[alias].ops.sequence_reset_sql(no_style(), restored)
+        if statements:
+            with connections[alias].cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
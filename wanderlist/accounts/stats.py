@@ -0,0 +1,149 @@
+from collections import Counter
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from .models import Destination, UserCountryStats, UserTravelStats
+
+
+# ==============================
+# 📊 INCREMENTAL TRAVEL STATS
+# ==============================
+# Callers run these inside the same transaction as the Destination write.
+# Every change is expressed as a delta and applied with F() expressions,
+# so concurrent requests never lose updates and nothing is re-aggregated.
+
+STATUS_FIELDS = {
+    "Wishlist": "wishlist_count",
+    "Visited": "visited_count",
+    "Vacation": "vacation_count",
+}
+
+
+def country_code(location):
+    """Normalize a CountryField value (Country object, code or None) to a code or None."""
+    code = getattr(location, "code", location)
+    return code or None
+
+
+class StatsDelta:
+    """Accumulated changes to one user's stats, applied in one pass."""
+
+    def __init__(self):
+        self.total = 0
+        self.statuses = Counter()
+        self.visited_countries = Counter()
+
+    def add(self, status, location, sign=1):
+        self.total += sign
+        self.statuses[status] += sign
+        code = country_code(location)
+        if status == "Visited" and code:
+            self.visited_countries[code] += sign
+
+    def created(self, status, location):
+        self.add(status, location, 1)
+
+    def deleted(self, status, location):
+        self.add(status, location, -1)
+
+    def changed(self, old_status, old_location, new_status, new_location):
+        self.deleted(old_status, old_location)
+        self.created(new_status, new_location)
+
+
+def apply_delta(user, delta):
+    """
+    Apply a StatsDelta to the user's (a User or its pk) stats rows with F()
+    updates. Call it after the Destination write: a user without a stats
+    row yet (e.g. data that predates this table) is rebuilt from scratch.
+    """
+    user_id = getattr(user, "pk", user)
+    updates = {"last_activity_at": timezone.now()}
+    if delta.total:
+        updates["total_count"] = F("total_count") + delta.total
+    for status, change in delta.statuses.items():
+        if change and status in STATUS_FIELDS:
+            updates[STATUS_FIELDS[status]] = F(STATUS_FIELDS[status]) + change
+
+    if not UserTravelStats.objects.filter(user_id=user_id).update(**updates):
+        rebuild_user_stats(user_id)
+        return
+
+    for code, change in delta.visited_countries.items():
+        if not change:
+            continue
+        rows = UserCountryStats.objects.filter(user_id=user_id, country=code)
+        if not rows.update(visited_count=F("visited_count") + change) and change > 0:
+            UserCountryStats.objects.update_or_create(
+                user_id=user_id, country=code, defaults={"visited_count": change}
+            )
+        if change < 0:
+            rows.filter(visited_count=0).delete()
+
+
+def record_created(user, destination):
+    delta = StatsDelta()
+    delta.created(destination.status, destination.location)
+    apply_delta(user, delta)
+
+
+def record_changed(user, old_status, old_location, destination):
+    delta = StatsDelta()
+    delta.changed(old_status, old_location, destination.status, destination.location)
+    apply_delta(user, delta)
+
+
+def record_deleted(user, destination):
+    delta = StatsDelta()
+    delta.deleted(destination.status, destination.location)
+    apply_delta(user, delta)
+
+
+# ==============================
+# 🔁 REBUILD FROM SCRATCH
+# ==============================
+def compute_user_stats(user_id):
+    """Aggregate a user's stats directly from Destination rows."""
+    rows = Destination.objects.filter(user_id=user_id)
+    by_status = dict(rows.values_list("status").annotate(n=Count("id")).order_by())
+    countries = dict(
+        rows.filter(status="Visited")
+        .exclude(location__isnull=True)
+        .exclude(location="")
+        .values_list("location")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    stats = {field: by_status.get(status, 0) for status, field in STATUS_FIELDS.items()}
+    stats["total_count"] = sum(by_status.values())
+    stats["last_activity_at"] = rows.aggregate(last=Max("updated_at"))["last"]
+    return stats, countries
+
+
+def rebuild_user_stats(user):
+    """
+    Overwrite a user's stats rows with freshly aggregated values.
+
+    Two first writes for a user can both find no stats row (apply_delta)
+    and both get here. The INSERT runs in a savepoint: the one that loses
+    on the unique user_id waits for the winner to commit, then aggregates
+    again, now seeing the winner's rows, and updates the row instead.
+    """
+    user_id = getattr(user, "pk", user)
+    stats, countries = compute_user_stats(user_id)
+    if not UserTravelStats.objects.filter(user_id=user_id).update(**stats):
+        db = router.db_for_write(UserTravelStats, instance=UserTravelStats(user_id=user_id))
+        try:
+            with transaction.atomic(using=db):
+                UserTravelStats.objects.create(user_id=user_id, **stats)
+        except IntegrityError:
+            stats, countries = compute_user_stats(user_id)
+            UserTravelStats.objects.filter(user_id=user_id).update(**stats)
+    UserCountryStats.objects.filter(user_id=user_id).delete()
+    UserCountryStats.objects.bulk_create(
+        UserCountryStats(user_id=user_id, country=code, visited_count=n)
+        for code, n in countries.items()
+    )
+    return stats, countries
@@ -0,0 +1,141 @@
+import gzip
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from PIL import Image, UnidentifiedImageError
+
+try:  # optional: `pip install brotli` to also emit .br sidecars
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================
+# 📦 PRODUCTION STATIC FILES
+# ==============================
+# On top of ManifestStaticFilesStorage's content-hashed names, collectstatic
+# also writes:
+#   • resized JPEG/PNG + WebP variants of every raster image, e.g.
+#     "images/paris-480w.webp" (see {% responsive_image %}), and a
+#     full-size WebP twin, "images/paris.webp", for CSS image-set()
+#   • .gz (and .br, with brotli installed) sidecars for text assets, which
+#     accounts.serving picks from Accept-Encoding.
+# The images are written before hashing and handed to the manifest step like
+# collected files, so they get hashed names and CSS url()/image-set()
+# references to them are rewritten like any other.
+
+RESPONSIVE_IMAGE_EXTENSIONS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG"}
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".xml", ".map"}
+MIN_COMPRESS_SIZE = 256
+
+
+def variant_name(name, width, ext=None):
+    """Logical name of a resized variant: images/paris.jpg -> images/paris-480w.jpg"""
+    root, original_ext = os.path.splitext(name)
+    return f"{root}-{width}w{ext or original_ext}"
+
+
+def webp_name(name):
+    """Logical name of the full-size WebP twin: images/paris.jpg -> images/paris.webp"""
+    return f"{os.path.splitext(name)[0]}.webp"
+
+
+def responsive_widths():
+    return tuple(getattr(settings, "RESPONSIVE_IMAGE_WIDTHS", (480, 960, 1600)))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Templates may reference files that aren't in the tree yet
+    # (favicon.png, the CSS background images); keep their plain URLs.
+    manifest_strict = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._missing = set()
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if name not in self._missing:
+                self._missing.add(name)
+                logger.warning("Static file %r not found; leaving its URL unhashed.", name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name in sorted(paths):
+                if os.path.splitext(name)[1].lower() in RESPONSIVE_IMAGE_EXTENSIONS:
+                    for variant in self._write_variants(name, collected=paths):
+                        paths[variant] = (self, variant)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        self._hashed_names = None
+
+        for hashed in set(self.hashed_files.values()):
+            if os.path.splitext(hashed)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                self._write_compressed(hashed)
+
+    def _write_variants(self, name, collected=()):
+        """
+        Write the unhashed variants of collected image `name` and yield their
+        names; a name that is itself a collected file is left alone.
+        """
+        fmt = RESPONSIVE_IMAGE_EXTENSIONS[os.path.splitext(name)[1].lower()]
+        try:
+            with self.open(name) as handle, Image.open(handle) as original:
+                original.load()
+                image = original.copy()
+        except (UnidentifiedImageError, OSError):
+            logger.warning("Skipping responsive variants for unreadable image %r.", name)
+            return
+
+        outputs = [(image, webp_name(name), "WEBP")]
+        for width in responsive_widths():
+            if width >= image.width:
+                continue
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.LANCZOS)
+            outputs += [(resized, variant_name(name, width), fmt), (resized, variant_name(name, width, ".webp"), "WEBP")]
+        for frame, variant, variant_fmt in outputs:
+            if variant in collected:
+                continue
+            if variant_fmt == "JPEG":
+                frame = frame.convert("RGB")
+            buffer = BytesIO()
+            frame.save(buffer, variant_fmt, quality=82, optimize=variant_fmt != "WEBP")
+            if self.exists(variant):
+                self.delete(variant)
+            self._save(variant, ContentFile(buffer.getvalue()))
+            yield variant
+
+    def _write_compressed(self, hashed):
+        path = self.path(hashed)
+        with open(path, "rb") as handle:
+            data = handle.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        compressed = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed[".br"] = brotli.compress(data, quality=11)
+        for suffix, payload in compressed.items():
+            # Only keep a sidecar when it actually saves bytes.
+            if len(payload) < len(data):
+                with open(path + suffix, "wb") as handle:
+                    handle.write(payload)
+
+    # -- used by accounts.serving --------------------------------------
+    def is_immutable(self, name):
+        """True for content-hashed names, which can be cached forever."""
+        hashed = getattr(self, "_hashed_names", None)
+        if hashed is None:
+            hashed = self._hashed_names = frozenset(self.hashed_files.values())
+        return name in hashed
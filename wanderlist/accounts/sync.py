@@ -0,0 +1,184 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Destination, DestinationTombstone
+from .pagination import MAX_PAGE_SIZE
+from .sharding import fan_out, shard_entry
+
+
+# ==============================
+# 🔄 DELTA SYNC
+# ==============================
+# Offline-capable clients keep a cursor and ask only for what changed since:
+# destinations by (updated_at, id) and deletions by the (deleted_at, id) of
+# the tombstones every delete path records. Both are keyset range scans on
+# (user, timestamp, id), so a sync costs what changed, not the list size.
+#
+# Rows written within SYNC_LAG_SECONDS are held back until the next sync:
+# updated_at is stamped before commit, so a slow transaction could otherwise
+# land behind a cursor that already moved past its timestamp.
+#
+# A cursor is refused (the client is told to reset and refetch everything)
+# when it is older than the tombstone retention window, since deletions it
+# never saw may have been compacted, or when the user's rows have been
+# moved between shards since (moved rows get new ids; the directory's move
+# counter catches a move there and back too).
+
+class InvalidSyncCursor(ValueError):
+    """Raised when a sync cursor cannot be decoded."""
+
+
+def retention():
+    return timedelta(days=getattr(settings, "DESTINATION_TOMBSTONE_RETENTION_DAYS", 30))
+
+
+def sync_lag():
+    return timedelta(seconds=getattr(settings, "SYNC_LAG_SECONDS", 2))
+
+
+def record_tombstones(user, destination_ids, deleted_at=None):
+    """Leave a tombstone per deleted destination id; call it in the delete's transaction."""
+    deleted_at = deleted_at or timezone.now()
+    user_id = getattr(user, "pk", user)
+    DestinationTombstone.objects.bulk_create(
+        DestinationTombstone(user_id=user_id, destination_id=pk, deleted_at=deleted_at)
+        for pk in destination_ids
+    )
+
+
+# ==============================
+# 🔖 CURSORS
+# ==============================
+def encode_sync_cursor(state):
+    """Opaque cursor for a sync position (see changes_since)."""
+    payload = {
+        "u": _stamp(state["rows"][0]), "i": state["rows"][1],
+        "d": _stamp(state["tombstones"][0]), "t": state["tombstones"][1],
+        "at": state["issued_at"].isoformat(), "s": state["shard"], "m": state["moves"],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return {
+            "rows": (_parse_stamp(payload["u"]), int(payload["i"])),
+            "tombstones": (_parse_stamp(payload["d"]), int(payload["t"])),
+            "issued_at": datetime.fromisoformat(payload["at"]),
+            "shard": str(payload["s"]),
+            "moves": int(payload["m"]),
+        }
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError) as exc:
+        raise InvalidSyncCursor(cursor) from exc
+
+
+def _stamp(value):
+    return value.isoformat() if value else None
+
+
+def _parse_stamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _after(field, position):
+    """
+    (field, id) > position as a Q; everything for the (None, 0) start
+    position. The redundant field >= stamp bound makes it an index range
+    starting at the cursor rather than a scan of the user's older rows.
+    """
+    stamp, pk = position
+    if stamp is None:
+        return Q()
+    return Q(**{f"{field}__gte": stamp}) & (Q(**{f"{field}__gt": stamp}) | Q(**{field: stamp, "pk__gt": pk}))
+
+
+def _page(queryset, field, position, horizon, size):
+    rows = list(
+        queryset.filter(_after(field, position), **{f"{field}__lte": horizon})
+        .order_by(field, "pk")[: size + 1]
+    )
+    return rows[:size], len(rows) > size
+
+
+def _start(now, shard, moves):
+    """Position of a client that has nothing: every row, no tombstones."""
+    return {
+        "rows": (None, 0),
+        "tombstones": (now - sync_lag(), 0),
+        "issued_at": now,
+        "shard": shard,
+        "moves": moves,
+    }
+
+
+# ==============================
+# 📬 WHAT CHANGED
+# ==============================
+def changes_since(user, cursor=None, size=MAX_PAGE_SIZE):
+    """
+    Return (changed destinations, deleted ids, next cursor, more, reset)
+    for `user` since `cursor` (None for a first full sync). With `more`
+    the client should call again right away with the next cursor. With
+    `reset` the cursor was refused: drop local state and apply this
+    response as a first sync.
+    """
+    now = timezone.now()
+    shard, _, moves = shard_entry(getattr(user, "pk", user))
+    reset = False
+    state = None
+    if cursor:
+        try:
+            state = decode_sync_cursor(cursor)
+        except InvalidSyncCursor:
+            reset = True
+        else:
+            placement = (state["shard"], state["moves"])
+            if state["issued_at"] < now - retention() or placement != (shard, moves):
+                state, reset = None, True
+    state = state or _start(now, shard, moves)
+
+    horizon = now - sync_lag()
+    rows, more_rows = _page(Destination.objects.filter(user=user), "updated_at", state["rows"], horizon, size)
+    tombstones, more_tombstones = _page(
+        DestinationTombstone.objects.filter(user=user), "deleted_at", state["tombstones"], horizon, size
+    )
+    more = more_rows or more_tombstones
+
+    next_state = {
+        "rows": (rows[-1].updated_at, rows[-1].pk) if rows else state["rows"],
+        "tombstones": (tombstones[-1].deleted_at, tombstones[-1].pk) if tombstones else state["tombstones"],
+        # Mid-way through a backlog keep the older stamp, so the retention
+        # check still covers tombstones not yet sent.
+        "issued_at": state["issued_at"] if more else now,
+        "shard": shard,
+        "moves": moves,
+    }
+    deleted = [tombstone.destination_id for tombstone in tombstones]
+    return rows, deleted, encode_sync_cursor(next_state), more, reset
+
+
+# ==============================
+# 🧹 COMPACTION
+# ==============================
+def compact_tombstones(older_than=None, batch_size=5000):
+    """Delete tombstones past the retention window on every shard; returns {alias: deleted}."""
+    cutoff = timezone.now() - (older_than if older_than is not None else retention())
+
+    def compact(alias):
+        deleted = 0
+        rows = DestinationTombstone.objects.using(alias)
+        while True:
+            ids = list(rows.filter(deleted_at__lt=cutoff).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += rows.filter(pk__in=ids).delete()[0]
+
+    return fan_out(compact)
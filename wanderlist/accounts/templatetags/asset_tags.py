@@ -0,0 +1,45 @@
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from accounts.storage import responsive_widths, variant_name, webp_name
+
+register = template.Library()
+
+
+def _srcset(name, ext=None):
+    """'url 480w, url 960w' for the variants collectstatic produced (may be empty)."""
+    hashed_files = getattr(staticfiles_storage, "hashed_files", {})
+    return ", ".join(
+        f"{static(variant_name(name, width, ext))} {width}w"
+        for width in responsive_widths()
+        if variant_name(name, width, ext) in hashed_files
+    )
+
+
+@register.simple_tag
+def responsive_image(name, alt="", sizes="100vw", **attrs):
+    """
+    <picture> for a static raster image with WebP and original-format
+    srcsets from the resized variants (or the full-size WebP twin when the
+    image is narrower than every width). In development (no manifest) it
+    degrades to a plain <img> of the original.
+    """
+    extra = format_html_join("", ' {}="{}"', attrs.items())
+    fallback = _srcset(name)
+    img = format_html(
+        '<img src="{}" alt="{}"{}{} loading="lazy" decoding="async">',
+        static(name),
+        alt,
+        format_html(' srcset="{}" sizes="{}"', fallback, sizes) if fallback else "",
+        extra,
+    )
+    webp = _srcset(name, ".webp")
+    if not webp and webp_name(name) in getattr(staticfiles_storage, "hashed_files", {}):
+        webp = static(webp_name(name))  # smaller than every width: the full-size twin
+    if not webp:
+        return img
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">{}</picture>', webp, sizes, img
+    )
@@ -0,0 +1,17 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from accounts.cache import naturaltime_marker as _naturaltime_marker
+
+register = template.Library()
+
+
+@register.filter
+def naturaltime_marker(value):
+    """
+    Like humanize's naturaltime, but leaves a placeholder that is filled in
+    when the (possibly cached) HTML is served, so "x minutes ago" stays fresh.
+    """
+    if not value:
+        return ""
+    return mark_safe(_naturaltime_marker(value))
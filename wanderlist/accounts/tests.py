@@ -0,0 +1,853 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .bulk import MAX_BULK_IDS, apply_bulk_action
+from .cache import get_list_version
+from .checks import check_throttle_cache
+from .country_index import country_codes, match_countries
+from .forms import DestinationForm
+from .gazetteer import canonical_city, complete_city, write_index
+from .models import Destination, DestinationTombstone, UserCountryStats, UserProfile, UserTravelStats
+from .routers import PIN_COOKIE, replica_aliases
+from .search import search_destinations
+from .sharding import move_user, shard_aliases, shard_for, sharding_enabled
+from .snapshot import Checkpoint, iter_records, open_dump, restore_accounts
+from .stats import rebuild_user_stats
+from .sync import compact_tombstones, decode_sync_cursor, encode_sync_cursor, record_tombstones
+from .thumbnails import THUMBNAIL_DIR, variant_name
+from .transfer import import_destinations
+
+
+# ==============================
+# 🗄️ READ REPLICAS
+# ==============================
+# Needs replicas configured, e.g.
+#   DATABASE_URL=sqlite:///db.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 \
+#   python manage.py test accounts
+# Replicas are TEST MIRRORs of "default": a separate connection to the same
+# test database. The tests commit (TransactionTestCase) so the replica sees
+# their rows, and so reads aren't kept on the primary by an open transaction.
+
+@skipUnless(replica_aliases(), "no DATABASE_REPLICA_URLS configured")
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {"default", *replica_aliases()}
+
+    def setUp(self):
+        cache.clear()  # rendered lists are cached; make every request query
+        self.user = User.objects.create_user("traveler", password="x")
+        self.destination = Destination.objects.create(user=self.user, name="Kyoto", location="JP")
+        self.client.force_login(self.user)
+
+    def _destination_reads(self, captured):
+        return [
+            query["sql"] for query in captured.captured_queries
+            if query["sql"].startswith("SELECT") and "accounts_destination" in query["sql"]
+        ]
+
+    def _replica_reads(self, request):
+        """Run request() and return the destination SELECTs each alias served."""
+        contexts = {alias: CaptureQueriesContext(connections[alias]) for alias in settings.DATABASES}
+        for context in contexts.values():
+            context.__enter__()
+        try:
+            response = request()
+        finally:
+            for context in contexts.values():
+                context.__exit__(None, None, None)
+        return response, {alias: self._destination_reads(context) for alias, context in contexts.items()}
+
+    def test_list_reads_from_a_replica(self):
+        _, reads = self._replica_reads(lambda: self.client.get(reverse("destination_list")))
+        self.assertFalse(reads["default"])
+        self.assertTrue(any(reads[alias] for alias in replica_aliases()))
+
+    def test_post_reads_from_the_primary_and_pins(self):
+        url = reverse("destination_update", args=[self.destination.pk])
+        response, reads = self._replica_reads(
+            lambda: self.client.post(url, {"name": "Kyoto", "location": "JP", "status": "Visited"})
+        )
+        self.assertTrue(reads["default"])
+        self.assertFalse(any(reads[alias] for alias in replica_aliases()))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_pinned_browser_reads_from_the_primary(self):
+        self.client.post(
+            reverse("destination_update", args=[self.destination.pk]),
+            {"name": "Kyoto", "location": "JP", "status": "Visited"},
+        )
+        _, reads = self._replica_reads(lambda: self.client.get(reverse("destination_list")))
+        self.assertTrue(reads["default"])
+        self.assertFalse(any(reads[alias] for alias in replica_aliases()))
+
+
+# ==============================
+# 🧮 QUERY BUDGETS
+# ==============================
+# Login, register and profile saves must not creep back to per-request
+# profile lookups (see the UserProfile post_save receiver). Counted as a
+# request runs them, in autocommit: inside TestCase's transaction the
+# BEGIN/COMMIT pairs become savepoints or disappear.
+
+class QueryBudgetTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()  # throttle buckets and cached users
+        self.user = User.objects.create_user("traveler", email="t@example.com", password="pw-correct-1")
+
+    def test_login(self):
+        # user, session insert + last_login, then the rotated session save
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse("login"), {"username": "traveler", "password": "pw-correct-1"})
+        self.assertRedirects(response, reverse("destination_list"), fetch_redirect_response=False)
+
+    def test_register(self):
+        data = {"username": "newbie", "email": "n@example.com", "password1": "Xk3!pq9zLm", "password2": "Xk3!pq9zLm"}
+        with self.assertNumQueries(14):
+            response = self.client.post(reverse("register"), data)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(UserProfile.objects.filter(user__username="newbie", email="n@example.com").exists())
+
+    def _login(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("profile"))  # the once-per-interval activity stamp
+
+    def test_profile_update(self):
+        self._login()
+        data = {"username": "wanderer", "email": "w@example.com"}
+        with self.assertNumQueries(6):
+            response = self.client.post(reverse("profile"), data)
+        self.assertRedirects(response, reverse("profile"), fetch_redirect_response=False)
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.username, profile.email), ("wanderer", "w@example.com"))
+
+    def test_unchanged_profile_writes_nothing(self):
+        self._login()
+        with self.assertNumQueries(4):
+            self.client.post(reverse("profile"), {"username": "traveler", "email": "t@example.com"})
+
+
+# ==============================
+# 🖼️ PRIVATE MEDIA
+# ==============================
+# A non-staff user may fetch only the exact files their profile owns; a
+# ".." path that merely starts like one of their thumbnails must not reach
+# another user's picture.
+
+class MediaOwnershipTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_OFFLOAD="")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.owner = User.objects.create_user("owner", password="x")
+        UserProfile.objects.filter(user=self.owner).update(picture_hash="ownhash")
+        self.thumb = variant_name("ownhash", 64, "jpg")
+        for name in (self.thumb, "victim.jpg"):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as handle:
+                handle.write(b"data")
+        self.client.force_login(self.owner)
+
+    def test_own_thumbnail_is_served(self):
+        response = self.client.get(f"/media/{self.thumb}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_traversal_out_of_own_prefix_is_refused(self):
+        response = self.client.get(f"/media/{THUMBNAIL_DIR}/ownhash_x/../../victim.jpg")
+        self.assertEqual(response.status_code, 404)
+
+    def test_owns_media_matches_exact_names_only(self):
+        profile = UserProfile.objects.get(user=self.owner)
+        self.assertTrue(profile.owns_media(self.thumb))
+        self.assertFalse(profile.owns_media(f"{THUMBNAIL_DIR}/ownhash_x/../../victim.jpg"))
+        self.assertFalse(profile.owns_media(f"{THUMBNAIL_DIR}/ownhash_999.jpg"))
+        self.assertFalse(profile.owns_media(f"/{self.thumb}"))
+
+
+# ==============================
+# 🧩 SHARD MOVES
+# ==============================
+# The sharded cases need shards configured, e.g.
+#   DATABASE_SHARD_URLS=sqlite:///s0.sqlite3,sqlite:///s1.sqlite3 python manage.py test accounts
+# The test runner's locmem cache is shared by everything in the one test
+# process, so SHARED_CACHE is switched on for them.
+
+class ShardMoveGuardTests(TestCase):
+    @override_settings(SHARED_CACHE=False)
+    def test_move_refused_without_a_shared_cache(self):
+        user = User.objects.create_user("mover", password="x")
+        with self.assertRaises(ImproperlyConfigured):
+            move_user(user.pk, "shard_1", source="shard_0")
+
+
+@skipUnless(sharding_enabled(), "no DATABASE_SHARD_URLS configured")
+@override_settings(SHARED_CACHE=True, SHARD_MOVE_GRACE_SECONDS=0)
+class ShardMoveTests(TransactionTestCase):
+    databases = {"default", *shard_aliases()}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("mover", password="x")
+        self.client.force_login(self.user)
+        self.source = shard_for(self.user)
+        self.target = next(alias for alias in shard_aliases() if alias != self.source)
+        for name in ("Kyoto", "Lima"):
+            self._add(name)
+
+    def _add(self, name):
+        return self.client.post(reverse("destination_create"), {"name": name, "location": "JP", "status": "Visited"})
+
+    def test_writes_during_a_move_are_refused_or_carried_over(self):
+        statuses = {}
+
+        def write_before_freeze(message):
+            if "freezing" in message:
+                statuses["copying"] = self._add("Quito").status_code
+
+        def write_while_frozen(seconds):
+            statuses["frozen"] = self._add("Oslo").status_code
+
+        with patch("accounts.sharding.time.sleep", write_while_frozen):
+            moved = move_user(self.user.pk, self.target, log=write_before_freeze)
+
+        self.assertEqual(statuses, {"copying": 302, "frozen": 503})
+        self.assertEqual(moved, 3)
+        self.assertEqual(shard_for(self.user), self.target)
+        names = set(Destination.objects.using(self.target).filter(user=self.user).values_list("name", flat=True))
+        self.assertEqual(names, {"Kyoto", "Lima", "Quito"})
+        self.assertFalse(Destination.objects.using(self.source).filter(user=self.user).exists())
+        self.assertEqual(UserTravelStats.objects.using(self.target).get(user=self.user).total_count, 3)
+        self.assertEqual(self._add("Oslo").status_code, 302)
+
+
+# ==============================
+# 🔌 JSON API
+# ==============================
+class DestinationApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("traveler", password="x")
+        self.kyoto = Destination.objects.create(user=self.user, name="Kyoto", location="JP", status="Visited")
+        self.lima = Destination.objects.create(user=self.user, name="Lima", location="PE", status="Wishlist")
+        rebuild_user_stats(self.user)
+        self.client.force_login(self.user)
+
+    def _batch(self, payload):
+        return self.client.post(reverse("api_destination_batch"), payload, content_type="application/json")
+
+    def test_unchanged_list_answers_304(self):
+        response = self.client.get(reverse("api_destination_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["name"] for row in response.json()["results"]], ["Lima", "Kyoto"])
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(reverse("api_destination_list"), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post(reverse("destination_update", args=[self.lima.pk]), {"name": "Lima", "location": "PE", "status": "Visited"})
+        self.assertEqual(self.client.get(reverse("api_destination_list"), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_keyset_cursors_walk_every_row_once(self):
+        for name in ("Quito", "Oslo", "Hanoi"):
+            Destination.objects.create(user=self.user, name=name, location="JP")
+        newest_first = list(
+            Destination.objects.filter(user=self.user)
+            .order_by("-updated_at", "-created_at", "-pk").values_list("name", flat=True)
+        )
+        url = reverse("api_destination_list")
+        pages, params = [], {"size": 2, "fields": "name"}
+        while True:
+            body = self.client.get(url, params).json()
+            pages.append([row["name"] for row in body["results"]])
+            if not body["next"]:
+                break
+            params = {"size": 2, "fields": "name", "after": body["next"]}
+        self.assertEqual([name for page in pages for name in page], newest_first)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+
+        back = self.client.get(url, {"size": 2, "fields": "name", "before": body["previous"]}).json()
+        self.assertEqual([row["name"] for row in back["results"]], pages[1])
+        garbled = self.client.get(url, {"size": 2, "fields": "name", "after": "not-a-cursor"}).json()
+        self.assertEqual([row["name"] for row in garbled["results"]], pages[0])
+
+    def test_detail_answers_304_and_hides_other_users_rows(self):
+        url = reverse("api_destination_detail", args=[self.kyoto.pk])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        other = Destination.objects.create(user=User.objects.create_user("other"), name="Oslo", location="NO")
+        self.assertEqual(self.client.get(reverse("api_destination_detail", args=[other.pk])).status_code, 404)
+
+    def test_batch_applies_every_operation(self):
+        response = self._batch({
+            "create": [{"name": "Quito", "location": "EC", "status": "Visited"}],
+            "update": [{"id": self.lima.pk, "status": "Visited"}],
+            "delete": [self.kyoto.pk],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["deleted"], [self.kyoto.pk])
+        rows = dict(Destination.objects.filter(user=self.user).values_list("name", "status"))
+        self.assertEqual(rows, {"Lima": "Visited", "Quito": "Visited"})
+        stats = UserTravelStats.objects.get(user=self.user)
+        self.assertEqual((stats.total_count, stats.visited_count), (2, 2))
+
+    def test_invalid_operation_rolls_back_the_batch(self):
+        response = self._batch({
+            "create": [{"name": "Quito", "location": "EC"}],
+            "update": [{"id": self.lima.pk, "status": "Nope"}],
+            "delete": [self.kyoto.pk],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("update.0", response.json()["errors"])
+        self.assertEqual(set(Destination.objects.filter(user=self.user).values_list("name", flat=True)), {"Kyoto", "Lima"})
+
+    def test_batch_refuses_one_row_updated_and_deleted(self):
+        response = self._batch({
+            "update": [{"id": self.kyoto.pk, "status": "Wishlist"}],
+            "delete": [self.kyoto.pk, self.lima.pk, self.lima.pk],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"update.0", f"delete.{self.lima.pk}"})
+        self.assertEqual(Destination.objects.filter(user=self.user).count(), 2)
+        stats = UserTravelStats.objects.get(user=self.user)
+        self.assertEqual((stats.total_count, stats.visited_count), (2, 1))
+
+
+# ==============================
+# 🗂 DESTINATION LIST CACHE
+# ==============================
+@override_settings(SHARED_CACHE=True)
+class ListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("traveler", password="x")
+        self.destination = Destination.objects.create(user=self.user, name="Kyoto", location="JP")
+        self.client.force_login(self.user)
+
+    def _list(self):
+        return self.client.get(reverse("destination_list")).content.decode()
+
+    def test_rendered_list_is_reused_until_a_save_commits(self):
+        self.assertIn("Kyoto", self._list())
+        # A queryset update sends no signal, so the cached page stays.
+        Destination.objects.filter(pk=self.destination.pk).update(name="Osaka")
+        self.assertIn("Kyoto", self._list())
+
+        version = get_list_version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.destination.name = "Nara"
+            self.destination.save()
+            self.assertEqual(get_list_version(self.user.pk), version)  # not before the commit
+        self.assertNotEqual(get_list_version(self.user.pk), version)
+        self.assertIn("Nara", self._list())
+
+    def test_delete_invalidates_and_other_users_keep_their_pages(self):
+        other = User.objects.create_user("other", password="x")
+        other_version = get_list_version(other.pk)
+        self._list()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.destination.delete()
+        self.assertNotIn("Kyoto", self._list())
+        self.assertEqual(get_list_version(other.pk), other_version)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_per_process_cache_is_not_used(self):
+        self._list()
+        Destination.objects.filter(pk=self.destination.pk).update(name="Osaka")
+        self.assertIn("Osaka", self._list())
+
+
+# ==============================
+# 📦 IMPORT / EXPORT
+# ==============================
+class TransferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("traveler", password="x")
+        Destination.objects.create(user=self.user, name="Kyoto", location="JP", city="Kyoto", status="Visited")
+        Destination.objects.create(user=self.user, name="Café, \"Lima\"", location="PE", status="Wishlist")
+        self.client.force_login(self.user)
+
+    def _round_trip(self, fmt):
+        response = self.client.get(reverse("destination_export"), {"format": fmt})
+        body = b"".join(response.streaming_content)
+        other = User.objects.create_user(f"copy-{fmt}", password="x")
+        self.client.force_login(other)
+        upload = SimpleUploadedFile(f"destinations.{fmt}", body)
+        response = self.client.post(reverse("destination_import"), {"file": upload})
+        self.assertRedirects(response, reverse("destination_list"), fetch_redirect_response=False)
+        return other
+
+    def _rows(self, user):
+        return sorted(Destination.objects.filter(user=user).values_list("name", "location", "city", "status"))
+
+    def test_csv_round_trip(self):
+        copy = self._round_trip("csv")
+        self.assertEqual(self._rows(copy), self._rows(self.user))
+        self.assertEqual(UserTravelStats.objects.get(user=copy).total_count, 2)
+
+    def test_ndjson_round_trip(self):
+        copy = self._round_trip("ndjson")
+        self.assertEqual(self._rows(copy), self._rows(self.user))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        upload = SimpleUploadedFile("d.ndjson", "\n".join([
+            '{"name": "Quito", "location": "EC"}',
+            '{"name": "", "location": "EC"}',
+            '{"name": "Oslo", "location": "XX"}',
+            "not json",
+            '["a list"]',
+        ]).encode())
+        result = import_destinations(self.user, upload, "ndjson")
+        self.assertEqual((result.created, result.failed), (1, 4))
+        self.assertEqual([line for line, _ in result.errors], [2, 3, 4, 5])
+        self.assertTrue(Destination.objects.filter(user=self.user, name="Quito", status="Wishlist").exists())
+
+    def test_csv_that_is_not_utf8_stops_where_it_breaks(self):
+        upload = SimpleUploadedFile("d.csv", b"name,location\nQuito,EC\n\xff\xfe,EC\nOslo,NO\n")
+        result = import_destinations(self.user, upload, "csv")
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.failed, 1)
+        self.assertIn("import stopped here", result.errors[0][1])
+
+
+# ==============================
+# 🔎 SEARCH
+# ==============================
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("traveler", password="x")
+        self.other = User.objects.create_user("other", password="x")
+        Destination.objects.create(user=self.user, name="Temple run", location="JP", city="Kyoto")
+        Destination.objects.create(user=self.user, name="Ceviche", location="PE", city="Lima")
+        Destination.objects.create(user=self.other, name="Temple stay", location="JP", city="Kyoto")
+
+    def _names(self, text, user=None):
+        return sorted(d.name for d in search_destinations(user or self.user, text))
+
+    def test_matches_name_city_and_country(self):
+        self.assertEqual(self._names("temple"), ["Temple run"])
+        self.assertEqual(self._names("lima"), ["Ceviche"])
+        self.assertEqual(self._names("Japan"), ["Temple run"])
+        self.assertEqual(self._names("kyo"), ["Temple run"])  # prefix terms
+
+    def test_results_are_scoped_to_the_user(self):
+        self.assertEqual(self._names("kyoto", self.other), ["Temple stay"])
+        self.assertEqual(self._names("ceviche", self.other), [])
+
+    def test_owner_id_is_not_searchable_text(self):
+        self.assertEqual(self._names(str(self.user.pk)), [])
+
+    def test_blank_or_punctuation_only_queries_match_nothing(self):
+        self.assertEqual(self._names("   "), [])
+        self.assertEqual(self._names("?!"), [])
+
+    def test_search_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("destination_search"), {"q": "temple"})
+        self.assertContains(response, "Temple run")
+        self.assertNotContains(response, "Temple stay")
+
+
+# ==============================
+# 🌍 COUNTRY CHOICES & TYPEAHEAD
+# ==============================
+class CountryTypeaheadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("traveler", password="x")
+        self.client.force_login(self.user)
+
+    def test_prefix_matches_any_word_code_and_accents(self):
+        codes = [match["code"] for match in match_countries("kor")]
+        self.assertEqual(set(codes[:2]), {"KP", "KR"})
+        self.assertIn("KR", [match["code"] for match in match_countries("south k")])
+        self.assertEqual(match_countries("PE")[0]["code"], "PE")
+        self.assertIn("CI", [match["code"] for match in match_countries("cote")])  # Côte d'Ivoire
+        self.assertEqual(match_countries("  "), [])
+
+    def test_rendered_select_marks_the_selected_country(self):
+        html = str(DestinationForm(initial={"location": "JP"})["location"])
+        self.assertEqual(html.count("<option"), len(country_codes()) + 1)
+        self.assertIn('<option value="JP" selected>', html)
+        self.assertEqual(html.count(" selected>"), 1)
+
+    def test_form_accepts_known_codes_only(self):
+        self.assertTrue(DestinationForm({"name": "x", "location": "JP", "status": "Wishlist"}).is_valid())
+        self.assertIn("location", DestinationForm({"name": "x", "location": "XX", "status": "Wishlist"}).errors)
+
+    def test_typeahead_lists_own_cities_first(self):
+        Destination.objects.create(user=self.user, name="Home", location="PH", city="Manila")
+        response = self.client.get(reverse("api_typeahead"), {"q": "man"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["cities"][0], "Manila")
+        self.assertEqual(self.client.get(reverse("api_typeahead"), {"q": ""}).json(), {"countries": [], "cities": []})
+
+
+# ==============================
+# 🧺 BULK ACTIONS
+# ==============================
+class BulkActionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("traveler", password="x")
+        self.other = User.objects.create_user("other", password="x")
+        self.kyoto = Destination.objects.create(user=self.user, name="Temple", location="JP", status="Visited")
+        self.lima = Destination.objects.create(user=self.user, name="Ceviche", location="PE", status="Wishlist")
+        self.foreign = Destination.objects.create(user=self.other, name="Fjord", location="NO", status="Wishlist")
+        rebuild_user_stats(self.user)
+        self.ids = [self.kyoto.pk, self.lima.pk, self.foreign.pk]
+
+    def _stats(self):
+        stats = UserTravelStats.objects.get(user=self.user)
+        countries = dict(UserCountryStats.objects.filter(user=self.user, visited_count__gt=0).values_list("country", "visited_count"))
+        return stats.total_count, stats.visited_count, countries
+
+    def test_set_status_touches_only_the_users_rows(self):
+        self.assertEqual(apply_bulk_action(self.user, "set_status", self.ids, "Visited"), 2)
+        self.assertEqual(self._stats(), (2, 2, {"JP": 1, "PE": 1}))
+        self.assertEqual(Destination.objects.get(pk=self.foreign.pk).status, "Wishlist")
+
+    def test_set_country_moves_stats_and_search_text(self):
+        apply_bulk_action(self.user, "set_country", [self.kyoto.pk], "fr")
+        self.assertEqual(self._stats(), (2, 1, {"FR": 1}))
+        self.assertEqual([d.name for d in search_destinations(self.user, "france")], ["Temple"])
+
+    def test_delete_leaves_tombstones(self):
+        self.assertEqual(apply_bulk_action(self.user, "delete", self.ids), 2)
+        self.assertEqual(self._stats(), (0, 0, {}))
+        self.assertTrue(Destination.objects.filter(pk=self.foreign.pk).exists())
+        tombstones = set(DestinationTombstone.objects.filter(user=self.user).values_list("destination_id", flat=True))
+        self.assertEqual(tombstones, {self.kyoto.pk, self.lima.pk})
+
+    def test_invalid_requests_change_nothing(self):
+        for action, ids, value in (
+            ("set_status", self.ids, "Nope"),
+            ("set_country", self.ids, "XX"),
+            ("explode", self.ids, None),
+            ("delete", ["1; DROP"], None),
+            ("delete", range(1, MAX_BULK_IDS + 2), None),
+        ):
+            with self.assertRaises(ValidationError):
+                apply_bulk_action(self.user, action, ids, value)
+        self.assertEqual(self._stats(), (2, 1, {"JP": 1}))
+
+    def test_bulk_view_reports_the_count(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("destination_bulk"), {"action": "delete", "ids": self.ids}, follow=True
+        )
+        self.assertContains(response, "2 destinations deleted.")
+
+
+# ==============================
+# 🏙️ CITY GAZETTEER
+# ==============================
+PLACES = [
+    ("Tokyo", "JP", 8_300_000, ["東京", "Tokio"]),
+    ("Kyoto", "JP", 1_470_000, []),
+    ("Toyama", "JP", 410_000, []),
+    ("São Paulo", "BR", 10_000_000, ["Sao Paulo"]),
+    ("Cordoba", "ES", 320_000, ["Córdoba"]),
+    ("Córdoba", "AR", 1_300_000, []),
+]
+
+
+class GazetteerTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "gazetteer.idx")
+        write_index(path, PLACES)
+        settings_override = override_settings(GAZETTEER_PATH=path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_canonical_spelling_from_name_or_alias(self):
+        self.assertEqual(canonical_city("  tokyo "), "Tokyo")
+        self.assertEqual(canonical_city("東京", "JP"), "Tokyo")
+        self.assertEqual(canonical_city("sao paulo", "BR"), "São Paulo")
+
+    def test_country_picks_between_namesakes(self):
+        self.assertEqual(canonical_city("cordoba", "ES"), "Cordoba")
+        self.assertEqual(canonical_city("cordoba", "AR"), "Córdoba")
+        self.assertEqual(canonical_city("cordoba"), "Córdoba")  # most populous
+
+    def test_unknown_city_is_kept_as_typed(self):
+        self.assertEqual(canonical_city("  Smallville  ", "US"), "Smallville")
+        self.assertEqual(canonical_city("kyoto", "BR"), "kyoto")
+
+    def test_complete_ranks_by_population(self):
+        self.assertEqual(complete_city("to", "JP"), ["Tokyo", "Toyama"])
+        self.assertEqual(complete_city("toya"), ["Toyama"])
+        self.assertEqual(complete_city(""), [])
+
+    def test_saved_destinations_are_canonicalized(self):
+        user = User.objects.create_user("traveler", password="x")
+        destination = Destination.objects.create(user=user, name="Trip", location="JP", city="tokio")
+        self.assertEqual(destination.city, "Tokyo")
+
+    def test_bulk_set_country_respells_the_city(self):
+        user = User.objects.create_user("traveler", password="x")
+        destination = Destination.objects.create(user=user, name="Trip", location="ES", city="cordoba")
+        self.assertEqual(destination.city, "Cordoba")
+        apply_bulk_action(user, "set_country", [destination.pk], "AR")
+        destination.refresh_from_db()
+        self.assertEqual(destination.city, "Córdoba")
+        self.assertEqual(destination.search_text, "Trip Córdoba Argentina AR")
+
+    @override_settings(GAZETTEER_PATH=None)
+    def test_without_an_index(self):
+        self.assertEqual(canonical_city(" tokio ", "JP"), "tokio")
+        self.assertEqual(complete_city("tok"), [])
+
+
+# ==============================
+# 💾 DUMP / RESTORE
+# ==============================
+class SnapshotTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "accounts.ndjson.gz")
+        for index in range(3):
+            user = User.objects.create_user(f"traveler{index}", email=f"t{index}@example.com", password="x")
+            for name in ("Kyoto", "Lima"):
+                Destination.objects.create(user=user, name=name, location="JP", city="kyoto", status="Visited")
+        self.before = self._snapshot()
+        call_command("dump_accounts", self.path, stderr=StringIO())
+        User.objects.all().delete()
+
+    def _snapshot(self):
+        def ms(value):  # the serializer keeps timestamps to the millisecond, like dumpdata
+            return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+        destinations = Destination.objects.values_list("pk", "user_id", "name", "city", "search_text", "created_at", "updated_at")
+        return (
+            sorted(User.objects.values_list("pk", "username", "email", "password")),
+            sorted((*row[:5], ms(row[5]), ms(row[6])) for row in destinations),
+        )
+
+    def _restore(self, *args):
+        call_command("restore_accounts", self.path, *args, stdout=StringIO())
+
+    def test_round_trip(self):
+        self._restore()
+        self.assertEqual(self._snapshot(), self.before)
+        self.assertEqual(UserProfile.objects.filter(email__startswith="t").count(), 3)
+        self.assertEqual(UserTravelStats.objects.get(user__username="traveler0").visited_count, 2)
+
+    def test_interrupted_restore_resumes_after_the_last_batch(self):
+        checkpoint = Checkpoint(f"{self.path}.checkpoint", self.path)
+
+        def crash_after_first_batch(records):
+            checkpoint.save(records)
+            if records:
+                raise KeyboardInterrupt
+
+        with open_dump(self.path, "r") as stream, self.assertRaises(KeyboardInterrupt):
+            restore_accounts(stream, batch_size=2, on_batch=crash_after_first_batch)
+        self.assertEqual(checkpoint.load(), 2)
+        self.assertEqual(User.objects.count(), 2)
+
+        self._restore("--resume", "--batch-size", "2")
+        self.assertEqual(self._snapshot(), self.before)
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+    def test_rerun_inserts_nothing_twice(self):
+        self._restore()
+        with open_dump(self.path, "r") as stream:
+            counts = restore_accounts(stream)
+        self.assertEqual(set(counts.values()), {0})
+        self.assertEqual(self._snapshot(), self.before)
+
+    def test_checkpoint_of_another_dump_is_refused(self):
+        Checkpoint(f"{self.path}.checkpoint", "/elsewhere/other.ndjson").save(4)
+        with self.assertRaises(CommandError):
+            self._restore("--resume")
+
+    def test_reads_a_dumpdata_array(self):
+        stream = StringIO('[{"model": "auth.user", "pk": 1, "fields": {}},\n {"model": "x.y"}]')
+        self.assertEqual([record.get("pk") for record in iter_records(stream)], [1, None])
+
+
+# ==============================
+# 🚦 LOGIN THROTTLING
+# ==============================
+# Both buckets get a 60 s window; the clock is pinned to the start of one.
+NOW = 6000.0
+
+
+@override_settings(LOGIN_THROTTLE_IP=(4, 4), LOGIN_THROTTLE_USERNAME=(3, 3))
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("traveler", password="pw-correct-1")
+        clock = patch("accounts.throttle.time.time", return_value=NOW)
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+
+    def _login(self, password="wrong", username="traveler", ip="10.0.0.1"):
+        return self.client.post(reverse("login"), {"username": username, "password": password}, REMOTE_ADDR=ip)
+
+    def test_username_is_refused_after_its_burst(self):
+        for _ in range(3):
+            self.assertEqual(self._login().status_code, 200)
+        response = self._login(password="pw-correct-1")
+        self.assertEqual(response.status_code, 429)
+        # 20 s into the next window, 3 attempts weighted by 2/3 fit again.
+        self.assertAlmostEqual(int(response["Retry-After"]), 80, delta=1)
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+    def test_refused_username_does_not_spend_the_ip_budget(self):
+        for _ in range(3):
+            self._login()
+        for _ in range(5):
+            self.assertEqual(self._login().status_code, 429)
+        # The IP has spent 3 of 4; another username still gets in.
+        User.objects.create_user("friend", password="pw-correct-2")
+        self.assertEqual(self._login(password="pw-correct-2", username="friend").status_code, 302)
+        self.assertEqual(self._login(username="friend").status_code, 429)
+
+    def test_success_refills_the_username_bucket(self):
+        self._login()
+        self._login()
+        self.assertEqual(self._login(password="pw-correct-1").status_code, 302)
+        self.client.logout()
+        for _ in range(3):
+            self.assertEqual(self._login(ip="10.0.0.2").status_code, 200)
+
+    def test_previous_window_slides_out(self):
+        for _ in range(3):
+            self._login()
+        self.clock.return_value = NOW + 60 + 30  # half of the full window still counts
+        self.assertEqual(self._login(ip="10.0.0.2").status_code, 200)
+        self.assertEqual(self._login(ip="10.0.0.2").status_code, 429)
+        self.clock.return_value = NOW + 120
+        self.assertEqual(self._login(ip="10.0.0.2").status_code, 200)
+
+
+# ==============================
+# 🔄 DELTA SYNC
+# ==============================
+@override_settings(SYNC_LAG_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("traveler", password="x")
+        self.kyoto = Destination.objects.create(user=self.user, name="Kyoto", location="JP")
+        self.lima = Destination.objects.create(user=self.user, name="Lima", location="PE")
+        Destination.objects.create(user=User.objects.create_user("other"), name="Oslo", location="NO")
+        self.client.force_login(self.user)
+
+    def _sync(self, cursor=None, **params):
+        if cursor:
+            params["cursor"] = cursor
+        return self.client.get(reverse("api_destination_sync"), params).json()
+
+    def test_first_sync_then_only_changes(self):
+        first = self._sync()
+        self.assertEqual({row["name"] for row in first["changed"]}, {"Kyoto", "Lima"})
+        self.assertEqual((first["deleted"], first["more"], first["reset"]), ([], False, False))
+        self.assertEqual(self._sync(first["cursor"])["changed"], [])
+
+        self.lima.status = "Visited"
+        self.lima.save()
+        self.client.post(
+            reverse("api_destination_batch"), {"delete": [self.kyoto.pk]}, content_type="application/json"
+        )
+        delta = self._sync(first["cursor"])
+        self.assertEqual([row["name"] for row in delta["changed"]], ["Lima"])
+        self.assertEqual(delta["deleted"], [self.kyoto.pk])
+        self.assertEqual(self._sync(delta["cursor"])["deleted"], [])
+
+    def test_pages_until_not_more(self):
+        seen, cursor = [], None
+        while True:
+            page = self._sync(cursor, size=1)
+            seen += [row["id"] for row in page["changed"]]
+            cursor = page["cursor"]
+            if not page["more"]:
+                break
+        self.assertEqual(seen, [self.kyoto.pk, self.lima.pk])
+
+    @override_settings(SYNC_LAG_SECONDS=60)
+    def test_rows_inside_the_lag_wait_for_the_next_sync(self):
+        self.assertEqual(self._sync()["changed"], [])
+
+    def test_stale_or_garbled_cursor_resets(self):
+        state = decode_sync_cursor(self._sync()["cursor"])
+        state["issued_at"] -= timedelta(days=31)  # tombstones it never saw may be compacted
+        stale = self._sync(encode_sync_cursor(state))
+        self.assertTrue(stale["reset"])
+        self.assertEqual(len(stale["changed"]), 2)
+        self.assertTrue(self._sync("garbage")["reset"])
+
+    def test_compaction_drops_only_expired_tombstones(self):
+        record_tombstones(self.user, [1], deleted_at=timezone.now() - timedelta(days=40))
+        record_tombstones(self.user, [2])
+        self.assertEqual(compact_tombstones(), {"default": 1})
+        self.assertEqual(list(DestinationTombstone.objects.values_list("destination_id", flat=True)), [2])
+
+
+# ==============================
+# 📊 METRICS ENDPOINT
+# ==============================
+@override_settings(METRICS_TOKEN="s3cret", METRICS_ALLOWED_IPS=[])
+class MetricsAccessTests(TestCase):
+    def test_local_address_alone_is_not_enough(self):
+        self.assertEqual(self.client.get(reverse("metrics"), REMOTE_ADDR="127.0.0.1").status_code, 403)
+        self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+    def test_bearer_token_or_staff(self):
+        self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+        self.client.force_login(User.objects.create_user("ops", is_staff=True))
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_empty_token_matches_nothing(self):
+        self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer ").status_code, 403)
+
+
+# ==============================
+# 🛠️ ADMIN SEARCH
+# ==============================
+class AdminUserSearchTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("root", "root@example.com", "pw"))
+        User.objects.create_user("Alice", email="traveller@example.com", first_name="Ann")
+
+    def test_user_search_keeps_stock_fields(self):
+        for term in ("ali", "traveller", "Ann"):
+            response = self.client.get(reverse("admin:auth_user_changelist"), {"q": term})
+            self.assertContains(response, "Alice", msg_prefix=term)
+
+    def test_profile_search_matches_username_and_email(self):
+        for term in ("alice", "traveller@"):
+            response = self.client.get(reverse("admin:accounts_userprofile_changelist"), {"q": term})
+            self.assertContains(response, "Alice", msg_prefix=term)
+
+
+# ==============================
+# 🩺 SYSTEM CHECKS
+# ==============================
+class ThrottleCacheCheckTests(TestCase):
+    @override_settings(SHARED_CACHE=False, DEBUG=False)
+    def test_per_process_cache_warns(self):
+        self.assertEqual([warning.id for warning in check_throttle_cache(None)], ["accounts.W001"])
+
+    @override_settings(SHARED_CACHE=True, DEBUG=False)
+    def test_shared_cache_is_fine(self):
+        self.assertEqual(check_throttle_cache(None), [])
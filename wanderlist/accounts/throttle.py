@@ -0,0 +1,192 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.shortcuts import render
+
+from .forms import CustomAuthenticationForm
+from .metrics import LOGIN_REJECTIONS
+
+
+# ==============================
+# 🚦 LOGIN THROTTLING
+# ==============================
+# Each login POST takes a token from two cache-backed buckets, one per
+# client IP and one per username, *before* the form hashes anything, so a
+# credential-stuffing wave is turned away for the price of a few cache ops.
+# A successful login refills the username's bucket.
+#
+# Buckets are sliding-window counters: `burst` attempts per window of
+# burst / per_minute minutes, the previous window's count weighted by how
+# much of it still overlaps. Only atomic cache operations touch them —
+# add() creates a window, incr() reserves an attempt and returns the count
+# including every concurrent one — so a parallel flood can't all read the
+# same state and pass together (incr() is atomic on the locmem and redis
+# backends; the file backend emulates it with get/set). An attempt is reserved in every bucket
+# first; if any bucket refuses, the reservations already made are handed
+# back with decr(), so a refused username doesn't spend the IP's budget.
+#
+# The IP is REMOTE_ADDR: behind a proxy, have it set the real client address
+# rather than trusting X-Forwarded-For here.
+#
+# The counters are only as shared as the cache: with more than one worker
+# process, CACHE_BACKEND must not be locmem (SHARED_CACHE), or each worker
+# allows the full burst. accounts.checks warns about that outside DEBUG.
+
+def _rate(scope):
+    return getattr(settings, f"LOGIN_THROTTLE_{scope.upper()}", None)
+
+
+def _key(scope, value):
+    digest = hashlib.sha256(str(value).casefold().encode()).hexdigest()[:32]
+    return f"login-throttle:{scope}:{digest}"
+
+
+def _window(burst, per_minute):
+    """Window length in seconds: the time `burst` attempts take to refill."""
+    return burst * 60.0 / per_minute
+
+
+def _slot(now, window):
+    """(current window number, fraction of it elapsed)."""
+    position = now / window
+    return int(position), position - int(position)
+
+
+def _slot_key(key, slot):
+    return f"{key}:{slot}"
+
+
+def _retry_after(count, previous, elapsed, burst, window):
+    """Seconds until an attempt over (count, previous) fits within `burst` again."""
+    if count <= burst and previous:
+        # Later in this window, once enough of the previous one has slid out.
+        return (1 - (burst - count) / previous - elapsed) * window
+    # In the next window, where this one becomes the weighted "previous".
+    return (1 - elapsed + max(0.0, 1 - (burst - 1) / max(count - 1, 1))) * window
+
+
+def _decide(count, previous, elapsed, burst, window):
+    """retry_after for the `count`-th attempt of this window; 0 when allowed."""
+    if count + previous * (1 - elapsed) <= burst:
+        return 0
+    return max(_retry_after(count, previous, elapsed, burst, window), 1)
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _buckets(request, username):
+    for scope, value in (("ip", client_ip(request)), ("username", username)):
+        rate = _rate(scope)
+        if rate and value:
+            yield scope, _key(scope, value), rate
+
+
+def _take(key, now, burst, per_minute):
+    """Reserve an attempt; returns (retry_after, slot key to refund or None)."""
+    window = _window(burst, per_minute)
+    slot, elapsed = _slot(now, window)
+    current = _slot_key(key, slot)
+    cache.add(current, 0, timeout=math.ceil(2 * window) + 1)
+    try:
+        count = cache.incr(current)
+    except ValueError:  # evicted between add() and incr()
+        cache.add(current, 1, timeout=math.ceil(2 * window) + 1)
+        count = 1
+    previous = cache.get(_slot_key(key, slot - 1), 0)
+    return _decide(count, previous, elapsed, burst, window), current
+
+
+async def _atake(key, now, burst, per_minute):
+    window = _window(burst, per_minute)
+    slot, elapsed = _slot(now, window)
+    current = _slot_key(key, slot)
+    await cache.aadd(current, 0, timeout=math.ceil(2 * window) + 1)
+    try:
+        count = await cache.aincr(current)
+    except ValueError:
+        await cache.aadd(current, 1, timeout=math.ceil(2 * window) + 1)
+        count = 1
+    previous = await cache.aget(_slot_key(key, slot - 1), 0)
+    return _decide(count, previous, elapsed, burst, window), current
+
+
+def _refund(slot_key):
+    try:
+        cache.decr(slot_key)
+    except ValueError:  # already expired
+        pass
+
+
+async def _arefund(slot_key):
+    try:
+        await cache.adecr(slot_key)
+    except ValueError:
+        pass
+
+
+def throttle_login(request, username):
+    """Take a token for this IP and username; returns (scope, retry_after) if refused, else None."""
+    now = time.time()
+    taken = []
+    for scope, key, (burst, per_minute) in _buckets(request, username):
+        retry_after, slot_key = _take(key, now, burst, per_minute)
+        taken.append(slot_key)
+        if retry_after:
+            for reserved in taken:
+                _refund(reserved)
+            LOGIN_REJECTIONS.inc(f"throttled_{scope}")
+            return scope, math.ceil(retry_after)
+    return None
+
+
+async def athrottle_login(request, username):
+    """Async variant of throttle_login."""
+    now = time.time()
+    taken = []
+    for scope, key, (burst, per_minute) in _buckets(request, username):
+        retry_after, slot_key = await _atake(key, now, burst, per_minute)
+        taken.append(slot_key)
+        if retry_after:
+            for reserved in taken:
+                await _arefund(reserved)
+            LOGIN_REJECTIONS.inc(f"throttled_{scope}")
+            return scope, math.ceil(retry_after)
+    return None
+
+
+def _username_slot_keys(username):
+    key = _key("username", username)
+    slot, _ = _slot(time.time(), _window(*_rate("username")))
+    return [_slot_key(key, slot), _slot_key(key, slot - 1)]
+
+
+def reset_login_throttle(username):
+    if username and _rate("username"):
+        cache.delete_many(_username_slot_keys(username))
+
+
+async def areset_login_throttle(username):
+    if username and _rate("username"):
+        await cache.adelete_many(_username_slot_keys(username))
+
+
+def login_refused(request, status, retry_after):
+    """
+    The login page with an explanation, as 429 (throttled) or 503 (hashing
+    busy). The form is unbound: rendering the submitted one would validate
+    it, and so hash the password after all.
+    """
+    form = CustomAuthenticationForm(request, initial={"username": request.POST.get("username", "")})
+    if status == 429:
+        messages.error(request, f"⏳ Too many login attempts. Try again in {retry_after} seconds.")
+    else:
+        messages.error(request, "⏳ Login is busy right now. Please try again in a moment.")
+    response = render(request, "login.html", {"form": form}, status=status)
+    response["Retry-After"] = str(retry_after)
+    return response
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+# ==============================
+# 🖼️ PROFILE PICTURE THUMBNAILS
+# ==============================
+# Uploads are saved as-is in the request; resizing happens on a small,
+# bounded thread pool. Variants are named after the SHA-256 of the original
+# bytes, so re-uploading the same photo reuses the files already on disk.
+# Re-encoding drops EXIF (GPS, camera data) after applying its rotation.
+#
+# The original gets the same treatment: the worker re-encodes it at full
+# size without metadata to ORIGINAL_DIR/<sha256>.<ext>, points the profile
+# at that copy and deletes the raw upload. Identical uploads therefore
+# share one stored original, and none keeps its EXIF past the worker run.
+
+THUMBNAIL_DIR = "profile_pics/thumbs"
+THUMBNAIL_SIZES = (64, 130, 260)
+THUMBNAIL_FORMATS = (("jpg", "JPEG"), ("webp", "WEBP"))
+ORIGINAL_DIR = "profile_pics/originals"
+ORIGINAL_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}  # anything else becomes JPEG
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def variant_name(digest, size, ext):
+    return f"{THUMBNAIL_DIR}/{digest}_{size}.{ext}"
+
+
+def variant_names(digest):
+    """Every thumbnail file name for `digest`, all sizes and formats."""
+    return [variant_name(digest, size, ext) for size in THUMBNAIL_SIZES for ext, _ in THUMBNAIL_FORMATS]
+
+
+def variant_urls(digest, ext):
+    """Map each thumbnail size to its public URL."""
+    return {size: default_storage.url(variant_name(digest, size, ext)) for size in THUMBNAIL_SIZES}
+
+
+def _square(image, size):
+    return ImageOps.fit(image, (size, size), Image.LANCZOS)
+
+
+def build_variants(data, digest=None):
+    """Render every size/format variant of `data`; returns (digest, files)."""
+    digest = digest or hashlib.sha256(data).hexdigest()
+    files = {}
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    for size in THUMBNAIL_SIZES:
+        resized = _square(image, size)
+        for ext, fmt in THUMBNAIL_FORMATS:
+            buffer = BytesIO()
+            # No exif= argument, so nothing from the original metadata is kept.
+            resized.save(buffer, fmt, quality=85, optimize=fmt == "JPEG")
+            files[variant_name(digest, size, ext)] = buffer.getvalue()
+    return digest, files
+
+
+def clean_original(data):
+    """`data` re-encoded at full size, rotated upright, without metadata; returns (ext, bytes)."""
+    with Image.open(BytesIO(data)) as original:
+        fmt = original.format if original.format in ORIGINAL_FORMATS else "JPEG"
+        image = ImageOps.exif_transpose(original)
+    if fmt == "JPEG":
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    # As with the variants, no exif=/icc_profile= argument: nothing is copied over.
+    image.save(buffer, fmt, quality=90, optimize=fmt == "JPEG")
+    return ORIGINAL_FORMATS[fmt], buffer.getvalue()
+
+
+def _store_original(profile_id, name, data, digest):
+    """Swap the raw upload `name` for its deduplicated, metadata-free copy."""
+    from .models import UserProfile
+
+    ext, content = clean_original(data)
+    clean_name = f"{ORIGINAL_DIR}/{digest}.{ext}"
+    if not default_storage.exists(clean_name):
+        default_storage.save(clean_name, ContentFile(content))
+    # Only if the picture wasn't replaced meanwhile.
+    swapped = UserProfile.objects.filter(pk=profile_id, profile_picture=name).update(
+        profile_picture=clean_name, picture_hash=digest
+    )
+    if swapped and not UserProfile.objects.filter(profile_picture=name).exists():
+        default_storage.delete(name)
+
+
+def generate_thumbnails(profile_id):
+    """Create variants for a profile's current picture and record their hash."""
+    from .models import UserProfile
+
+    close_old_connections()
+    try:
+        profile = UserProfile.objects.filter(pk=profile_id).only("profile_picture").first()
+        if profile is None or not profile.profile_picture:
+            return None
+        name = profile.profile_picture.name
+        with default_storage.open(name, "rb") as handle:
+            data = handle.read()
+
+        # A cleaned original (e.g. under generate_thumbnails --all) is named
+        # after the upload's hash; its variants keep that name.
+        cleaned = name.startswith(f"{ORIGINAL_DIR}/")
+        digest, files = build_variants(data, PurePosixPath(name).stem if cleaned else None)
+        for path, content in files.items():
+            if not default_storage.exists(path):
+                default_storage.save(path, ContentFile(content))
+
+        if cleaned:
+            UserProfile.objects.filter(pk=profile_id, profile_picture=name).update(picture_hash=digest)
+        else:
+            _store_original(profile_id, name, data, digest)
+        return digest
+    except Exception:
+        logger.exception("Thumbnail generation failed for profile %s", profile_id)
+        return None
+    finally:
+        close_old_connections()
+
+
+def _run(profile_id):
+    try:
+        generate_thumbnails(profile_id)
+    finally:
+        _slots.release()
+
+
+def schedule_thumbnails(profile_id):
+    """
+    Queue thumbnail generation without blocking the request.
+    Returns False when the pool is saturated; `manage.py generate_thumbnails`
+    picks up anything that was skipped.
+    """
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = getattr(settings, "THUMBNAIL_WORKERS", 2)
+            queue_size = getattr(settings, "THUMBNAIL_QUEUE_SIZE", 16)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+            _slots = threading.BoundedSemaphore(workers + queue_size)
+    if not _slots.acquire(blocking=False):
+        logger.warning("Thumbnail queue full; skipping profile %s", profile_id)
+        return False
+    _executor.submit(_run, profile_id)
+    return True
@@ -0,0 +1,192 @@
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .cache import bump_list_version
+from .forms import DestinationForm
+from .models import Destination
+from .sharding import atomic_for, shard_for
+from .stats import StatsDelta, apply_delta
+
+
+# ==============================
+# 📦 BULK IMPORT / EXPORT OF DESTINATIONS
+# ==============================
+# Both directions stream: uploads are read line by line and inserted in
+# bulk_create batches, exports are yielded from a server-side iterator.
+# Memory therefore stays bounded by BATCH_SIZE, not by the file/table size.
+
+FORMATS = ("csv", "ndjson")
+IMPORT_FIELDS = ("name", "location", "city", "status")
+EXPORT_FIELDS = ("name", "location", "city", "status", "created_at", "updated_at")
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename, requested=None):
+    """Pick csv/ndjson from an explicit choice or the file extension."""
+    if requested in FORMATS:
+        return requested
+    if filename and filename.lower().endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson"
+    return "csv"
+
+
+def _decoded(upload):
+    for line in upload:
+        yield line.decode("utf-8-sig")
+
+
+def iter_rows(upload, fmt):
+    """
+    Yield (line_number, dict) pairs from an uploaded file without reading it
+    whole. Unreadable input is yielded as an exception in place of the row:
+    a bad NDJSON line only skips that line, while a CSV file that is not
+    UTF-8 (or not CSV) ends the import at the line where it broke.
+    """
+    if fmt == "ndjson":
+        for number, raw in enumerate(upload, start=1):
+            try:
+                line = raw.decode("utf-8-sig")
+            except UnicodeDecodeError:
+                yield number, ValueError("not UTF-8 text")
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield number, ValueError(f"invalid JSON: {exc.msg}")
+                continue
+            yield number, row if isinstance(row, dict) else ValueError("expected a JSON object")
+    else:
+        reader = csv.DictReader(_decoded(upload))
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except UnicodeDecodeError:
+            yield reader.line_num + 1, ValueError("not UTF-8 text; import stopped here")
+        except csv.Error as exc:
+            yield reader.line_num, ValueError(f"unreadable CSV ({exc}); import stopped here")
+
+
+def clean_row(row):
+    """
+    Validate one row with DestinationForm's own fields — the rules the
+    add/edit form applies (required name, lengths, no NUL characters, known
+    country code, valid status) — and return the cleaned field values.
+    """
+    cleaned = {}
+    errors = {}
+    for name in IMPORT_FIELDS:
+        field = DestinationForm.base_fields[name]
+        model_field = Destination._meta.get_field(name)
+        value = row.get(name)
+        if value in (None, "") and name == "status":
+            value = model_field.default
+        try:
+            value = field.clean(value)
+        except ValidationError as exc:
+            errors[name] = "; ".join(exc.messages)
+            continue
+        cleaned[name] = None if value in (None, "") and model_field.null else value
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+class ImportResult:
+    """Counts and a bounded sample of per-row errors from one import."""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def _format_error(exc):
+    if isinstance(exc, ValidationError) and hasattr(exc, "message_dict"):
+        return "; ".join(f"{field}: {msg}" for field, msgs in exc.message_dict.items() for msg in msgs)
+    return str(exc)
+
+
+def import_destinations(user, upload, fmt, batch_size=BATCH_SIZE):
+    """
+    Stream `upload` into Destination rows owned by `user`.
+    Valid rows are inserted with bulk_create in batches inside one
+    transaction; invalid rows are skipped and reported by line number.
+    """
+    result = ImportResult()
+    delta = StatsDelta()
+    batch = []
+    with atomic_for(user):
+        for line, row in iter_rows(upload, fmt):
+            if isinstance(row, Exception):
+                result.add_error(line, str(row))
+                continue
+            try:
+                destination = Destination(user=user, **clean_row(row))
+                destination.refresh_search_text()
+            except ValidationError as exc:
+                result.add_error(line, _format_error(exc))
+                continue
+            batch.append(destination)
+            delta.created(destination.status, destination.location)
+            if len(batch) >= batch_size:
+                Destination.objects.bulk_create(batch)
+                result.created += len(batch)
+                batch = []
+        if batch:
+            Destination.objects.bulk_create(batch)
+            result.created += len(batch)
+        if result.created:
+            apply_delta(user, delta)
+            # bulk_create skips post_save, so invalidate once for the batch.
+            transaction.on_commit(lambda: bump_list_version(user.pk), using=shard_for(user))
+    return result
+
+
+# ==============================
+# 📤 EXPORT
+# ==============================
+class _Echo:
+    """File-like object whose write() just returns the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def _export_values(user, using):
+    return (
+        Destination.objects.using(using).filter(user=user)
+        .order_by("-updated_at", "-created_at", "-id")
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+def iter_export(user, fmt, using):
+    """
+    Yield the user's destinations as CSV lines or NDJSON records, read from
+    `using`. Pass the alias explicitly: a streaming response is consumed after
+    the routing middleware has returned, so no shard scope is active by then.
+    """
+    if fmt == "ndjson":
+        for values in _export_values(user, using):
+            record = dict(zip(EXPORT_FIELDS, values))
+            record["created_at"] = record["created_at"].isoformat()
+            record["updated_at"] = record["updated_at"].isoformat()
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        return
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for values in _export_values(user, using):
+        yield writer.writerow(values)
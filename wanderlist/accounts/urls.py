@@ -1,5 +1,12 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, views
+
+# ⚡ Serve the async destination views when running under ASGI
+if getattr(settings, "ASYNC_VIEWS", False):
+    from . import async_views as crud_views
+else:
+    crud_views = views
 
 urlpatterns = [
     # ============================
@@ -13,14 +20,33 @@ urlpatterns = [
     # 🔐 AUTHENTICATION
     # ============================
     path("register/", views.register_view, name="register"),
-    path("login/", views.login_view, name="login"),
+    path("login/", crud_views.login_view, name="login"),
     path("logout/", views.logout_view, name="logout"),
 
     # ============================
     # ✈️ DESTINATIONS (CRUD)
     # ============================
-    path("destinations/", views.destination_list, name="destination_list"),
-    path("destinations/add/", views.destination_create, name="destination_create"),
-    path("destinations/<int:pk>/edit/", views.destination_update, name="destination_update"),
-    path("destinations/<int:pk>/delete/", views.destination_delete, name="destination_delete"),
+    path("destinations/", crud_views.destination_list, name="destination_list"),
+    path("destinations/add/", crud_views.destination_create, name="destination_create"),
+    path("destinations/<int:pk>/edit/", crud_views.destination_update, name="destination_update"),
+    path("destinations/<int:pk>/delete/", crud_views.destination_delete, name="destination_delete"),
+    path("destinations/bulk/", views.destination_bulk, name="destination_bulk"),
+    path("destinations/search/", views.destination_search, name="destination_search"),
+    path("destinations/stats/", views.travel_stats, name="travel_stats"),
+    path("destinations/import/", views.destination_import, name="destination_import"),
+    path("destinations/export/", views.destination_export, name="destination_export"),
+
+    # ============================
+    # 🔌 JSON API
+    # ============================
+    path("api/destinations/", api.destination_list_api, name="api_destination_list"),
+    path("api/destinations/batch/", api.destination_batch_api, name="api_destination_batch"),
+    path("api/destinations/sync/", api.destination_sync_api, name="api_destination_sync"),
+    path("api/destinations/<int:pk>/", api.destination_detail_api, name="api_destination_detail"),
+    path("api/typeahead/", api.typeahead_api, name="api_typeahead"),
+
+    # ============================
+    # 📊 METRICS
+    # ============================
+    path("metrics/", views.metrics_view, name="metrics"),
 ]
@@ -1,8 +1,20 @@
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils._os import safe_join
+from django.utils.crypto import constant_time_compare
+from django.utils.safestring import mark_safe
 from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import require_GET, require_POST, require_safe
+from django.views.decorators.vary import vary_on_headers
 
 from .forms import (
     CustomUserCreationForm,
@@ -11,7 +23,28 @@ from .forms import (
     UserUpdateForm,
     ProfileUpdateForm,
 )
-from .models import Destination, UserProfile
+from .models import Destination, UserProfile, UserTravelStats
+from .metrics import render_metrics
+from .cache import (
+    fill_naturaltime,
+    get_cached_list,
+    get_list_version,
+    list_cache_key,
+    set_cached_list,
+)
+from .bulk import apply_bulk_action, bulk_context
+from .fragments import FRAGMENT_HEADER, form_status, form_template, row_fragment, wants_fragment
+from .hashing import HashingBusy
+from .pagination import paginate_destinations, parse_page_size
+from .rows import destination_rows, rows_from_instances
+from .search import search_destinations
+from .serving import IMMUTABLE_CACHE_CONTROL, clean_name, offload_file, serve_file
+from .sharding import atomic_for, shard_for
+from .stats import record_changed, record_created, record_deleted
+from .sync import record_tombstones
+from .thumbnails import THUMBNAIL_DIR, schedule_thumbnails
+from .throttle import login_refused, reset_login_throttle, throttle_login
+from .transfer import FORMATS, detect_format, import_destinations, iter_export
 
 
 # ============================
@@ -39,15 +72,27 @@ def profile_view(request):
     Automatically creates a profile if missing.
     """
     user = request.user
-    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile, _ = UserProfile.objects.get_or_create(
+        user=user, defaults={"username": user.username, "email": user.email}
+    )
 
     if request.method == "POST":
         user_form = UserUpdateForm(request.POST, instance=user)
         profile_form = ProfileUpdateForm(request.POST, request.FILES, instance=profile)
 
         if user_form.is_valid() and profile_form.is_valid():
-            user_form.save()
-            profile_form.save()
+            picture_changed = "profile_picture" in profile_form.changed_data
+            # Write only what changed: a full profile save would put back the
+            # username/email the User post_save receiver has just synced.
+            if user_form.has_changed():
+                user_form.save(commit=False).save(update_fields=user_form.changed_data)
+            if picture_changed:
+                profile = profile_form.save(commit=False)
+                profile.picture_hash = ""
+                profile.save(update_fields=["profile_picture", "picture_hash", "updated_at"])
+            if picture_changed and profile.profile_picture:
+                # Resize off the request thread once the new file is committed.
+                transaction.on_commit(lambda: schedule_thumbnails(profile.pk))
             messages.success(request, "✅ Profile updated successfully!")
             return redirect("profile")
         else:
@@ -74,13 +119,18 @@ def profile_view(request):
 def register_view(request):
     """
     Handles user registration and auto-login.
-    Ensures a UserProfile is created for the new user.
+    The UserProfile is created by the post_save receiver on User.
     """
     if request.method == "POST":
         form = CustomUserCreationForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            UserProfile.objects.get_or_create(user=user)
+            try:
+                user = form.save()  # hashes the password (accounts.hashing)
+            except HashingBusy:
+                messages.error(request, "⏳ We're busy right now. Please try again in a moment.")
+                response = render(request, "register.html", {"form": form}, status=503)
+                response["Retry-After"] = "1"
+                return response
             login(request, user)
             messages.success(
                 request,
@@ -102,14 +152,22 @@ def register_view(request):
 def login_view(request):
     """
     Handles user login using a custom authentication form.
-    Automatically creates a profile if missing.
+    Profiles are created on registration and lazily by profile_view.
     """
     if request.method == "POST":
+        # Refuse floods before the form spends a PBKDF2 hash on them.
+        refused = throttle_login(request, request.POST.get("username", ""))
+        if refused:
+            return login_refused(request, 429, refused[1])
         form = CustomAuthenticationForm(request, data=request.POST)
-        if form.is_valid():
+        try:
+            valid = form.is_valid()
+        except HashingBusy:
+            return login_refused(request, 503, 1)
+        if valid:
             user = form.get_user()
+            reset_login_throttle(user.get_username())
             login(request, user)
-            UserProfile.objects.get_or_create(user=user)
             messages.success(request, f"👋 Welcome back, {user.username}!")
             next_page = request.GET.get("next", "destination_list")
             return redirect(next_page)
@@ -138,57 +196,97 @@ def logout_view(request):
 @login_required
 def destination_list(request):
     """
-    Display all destinations belonging to the logged-in user.
-    Ordered by last update or creation.
+    Display the logged-in user's destinations one page at a time.
+    Ordered by last update or creation, paginated by opaque keyset cursors
+    (?after= / ?before=) so every page costs the same index range scan.
     """
-    destinations = Destination.objects.filter(user=request.user).order_by(
-        "-updated_at", "-created_at"
+    page_size = parse_page_size(
+        request.GET.get("size"),
+        default=getattr(settings, "DESTINATIONS_PAGE_SIZE", 25),
     )
+    after = request.GET.get("after")
+    before = request.GET.get("before")
+
+    # Rendered table is cached per user + list version; saves/deletes bump it.
+    version = get_list_version(request.user.pk)
+    cache_key = list_cache_key(request.user.pk, version, after, before, page_size)
+    table_html = get_cached_list(cache_key)
+    if table_html is None:
+        page = paginate_destinations(
+            destination_rows(Destination.objects.filter(user=request.user)),
+            after=after,
+            before=before,
+            page_size=page_size,
+        )
+        table_html = render_to_string(
+            "destinations/_destination_table.html",
+            {"destinations": page, "page": page, "page_size": page_size},
+        )
+        set_cached_list(cache_key, table_html)
+
     return render(
         request,
         "destinations/destination_list.html",
-        {"destinations": destinations},
+        {
+            "table_html": mark_safe(fill_naturaltime(table_html)),
+            "page_size": page_size,
+            **bulk_context(),
+        },
     )
 
 
 @login_required
 @csrf_protect
+@vary_on_headers(FRAGMENT_HEADER)
 def destination_create(request):
     """
     Create a new travel destination for the logged-in user.
+    With X-Fragment: 1, answers with the new row instead of redirecting.
     """
     if request.method == "POST":
         form = DestinationForm(request.POST)
         if form.is_valid():
             destination = form.save(commit=False)
             destination.user = request.user
-            destination.save()
+            with atomic_for(request.user):
+                destination.save()
+                record_created(request.user, destination)
             messages.success(request, f"✅ '{destination.name}' added successfully!")
+            if wants_fragment(request):
+                return row_fragment(request, "create", destination.pk, destination)
             return redirect("destination_list")
         else:
             messages.error(request, "⚠️ Please correct the form errors below.")
     else:
         form = DestinationForm()
 
-    return render(request, "destinations/destination_form.html", {"form": form})
+    return render(request, form_template(request), {"form": form}, status=form_status(request, form))
 
 
 @login_required
 @csrf_protect
+@vary_on_headers(FRAGMENT_HEADER)
 def destination_update(request, pk):
     """
     Update an existing destination and refresh updated_at timestamp.
+    With X-Fragment: 1, answers with the updated row instead of redirecting.
     """
     destination = get_object_or_404(Destination, pk=pk, user=request.user)
 
     if request.method == "POST":
+        # is_valid() writes the new values onto the instance, so keep the old ones.
+        old_status, old_location = destination.status, destination.location
         form = DestinationForm(request.POST, instance=destination)
         if form.is_valid():
-            updated_destination = form.save()
+            with atomic_for(request.user):
+                updated_destination = form.save()
+                record_changed(request.user, old_status, old_location, updated_destination)
             messages.success(
                 request,
                 f"✏️ '{updated_destination.name}' updated successfully!",
             )
+            if wants_fragment(request):
+                return row_fragment(request, "update", updated_destination.pk, updated_destination)
             return redirect("destination_list")
         else:
             messages.error(request, "⚠️ Please correct the errors below.")
@@ -197,22 +295,30 @@ def destination_update(request, pk):
 
     return render(
         request,
-        "destinations/destination_form.html",
+        form_template(request),
         {"form": form, "destination": destination},
+        status=form_status(request, form),
     )
 
 
 @login_required
 @csrf_protect
+@vary_on_headers(FRAGMENT_HEADER)
 def destination_delete(request, pk):
     """
     Delete a specific destination belonging to the logged-in user.
+    With X-Fragment: 1, answers with a removal marker instead of redirecting.
     """
     destination = get_object_or_404(Destination, pk=pk, user=request.user)
     if request.method == "POST":
         name = destination.name
-        destination.delete()
+        with atomic_for(request.user):
+            destination.delete()
+            record_deleted(request.user, destination)
+            record_tombstones(request.user, [pk])
         messages.success(request, f"🗑 '{name}' deleted successfully.")
+        if wants_fragment(request):
+            return row_fragment(request, "delete", pk)
         return redirect("destination_list")
 
     return render(
@@ -220,3 +326,226 @@ def destination_delete(request, pk):
         "destinations/destination_confirm_delete.html",
         {"destination": destination},
     )
+
+
+@login_required
+@csrf_protect
+@require_POST
+def destination_bulk(request):
+    """
+    Apply one action (set status, set country, delete) to the selected
+    destinations in a single UPDATE/DELETE.
+    """
+    action = request.POST.get("action", "")
+    try:
+        count = apply_bulk_action(
+            request.user, action, request.POST.getlist("ids"), request.POST.get("value")
+        )
+    except ValidationError as exc:
+        messages.error(request, f"⚠️ {exc.messages[0]}")
+    else:
+        if count:
+            verb = "deleted" if action == "delete" else "updated"
+            messages.success(request, f"✅ {count} destination{'s' if count != 1 else ''} {verb}.")
+        else:
+            messages.info(request, "No destinations selected.")
+
+    next_url = request.POST.get("next", "")
+    if next_url.startswith("/") and not next_url.startswith("//"):
+        return redirect(next_url)
+    return redirect("destination_list")
+
+
+@login_required
+def destination_search(request):
+    """
+    Search the user's destinations by name, city or country (name or code).
+    Results are ranked by relevance and paginated with ?page=.
+    """
+    query = request.GET.get("q", "").strip()
+    page_size = getattr(settings, "DESTINATIONS_PAGE_SIZE", 25)
+    try:
+        page_number = max(1, int(request.GET.get("page", 1)))
+    except ValueError:
+        page_number = 1
+
+    results = search_destinations(
+        request.user, query, limit=page_size + 1, offset=(page_number - 1) * page_size
+    )
+    response = render(
+        request,
+        "destinations/destination_search.html",
+        {
+            "query": query,
+            "destinations": rows_from_instances(results[:page_size]),
+            "page_number": page_number,
+            "has_next": len(results) > page_size,
+            **bulk_context(),
+        },
+    )
+    # Rows share the list's row template, which emits naturaltime placeholders.
+    response.content = fill_naturaltime(response.content.decode())
+    return response
+
+
+# ============================
+# ✅ TRAVEL STATS DASHBOARD
+# ============================
+
+@login_required
+def travel_stats(request):
+    """
+    Show the user's travel totals from the denormalized stats rows.
+    Reads a fixed number of rows regardless of how many destinations exist.
+    """
+    stats = UserTravelStats.objects.filter(user=request.user).first()
+    visited_countries = request.user.country_stats.order_by("-visited_count")
+    return render(
+        request,
+        "destinations/travel_stats.html",
+        {"stats": stats, "visited_countries": visited_countries},
+    )
+
+
+# ============================
+# ✅ DESTINATIONS (BULK IMPORT / EXPORT)
+# ============================
+
+@login_required
+@csrf_protect
+def destination_import(request):
+    """
+    Import destinations from an uploaded CSV or NDJSON file.
+    Rows are validated like DestinationForm and inserted in batches.
+    """
+    result = None
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        if upload is None:
+            messages.error(request, "⚠️ Please choose a CSV or NDJSON file to import.")
+        else:
+            fmt = detect_format(upload.name, request.POST.get("format"))
+            result = import_destinations(request.user, upload, fmt)
+            if result.created:
+                messages.success(request, f"📥 Imported {result.created} destination(s).")
+            if result.failed:
+                messages.error(request, f"⚠️ {result.failed} row(s) could not be imported.")
+            if not result.failed:
+                return redirect("destination_list")
+
+    return render(
+        request,
+        "destinations/destination_import.html",
+        {"result": result, "formats": FORMATS},
+    )
+
+
+@login_required
+@require_GET
+def destination_export(request):
+    """
+    Stream all of the user's destinations as CSV (default) or NDJSON.
+    """
+    fmt = request.GET.get("format", "csv")
+    if fmt not in FORMATS:
+        fmt = "csv"
+    content_type = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+    export = iter_export(request.user, fmt, using=shard_for(request.user))
+    response = StreamingHttpResponse(export, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="destinations.{fmt}"'
+    return response
+
+
+# ============================
+# ✅ METRICS (Prometheus text format)
+# ============================
+def _metrics_token_valid(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    scheme, _, supplied = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and constant_time_compare(supplied.strip(), token)
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Scrape endpoint for accounts.metrics. Open to staff users, to scrapers
+    presenting METRICS_TOKEN as a bearer token and to addresses listed in
+    METRICS_ALLOWED_IPS (empty unless configured).
+    """
+    allowed_ips = getattr(settings, "METRICS_ALLOWED_IPS", ())
+    if not (
+        request.user.is_staff
+        or _metrics_token_valid(request)
+        or request.META.get("REMOTE_ADDR") in allowed_ips
+    ):
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# ============================
+# ✅ STATIC FILES (production, from STATIC_ROOT)
+# ============================
+@require_safe
+def static_asset(request, path):
+    """
+    Serve collectstatic output when no front-end server does. Hashed names
+    are cached forever; .br/.gz sidecars and byte ranges are supported.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+    is_immutable = getattr(staticfiles_storage, "is_immutable", None)
+    hashed = is_immutable is not None and is_immutable(path)
+    return serve_file(
+        request,
+        full_path,
+        cache_control=IMMUTABLE_CACHE_CONTROL if hashed else "public, max-age=300",
+        precompressed=True,
+    )
+
+
+# ============================
+# ✅ MEDIA FILES (uploaded profile pictures)
+# ============================
+@login_required
+@require_safe
+def media_file(request, path):
+    """
+    Serve a profile picture or thumbnail to its owner (staff see all).
+    Streams from MEDIA_ROOT, or hands off to the proxy when MEDIA_OFFLOAD
+    is set.
+    """
+    path = clean_name(path)
+    if path is None:
+        raise Http404("File not found.")
+    if not request.user.is_staff:
+        profile = (
+            UserProfile.objects.filter(user=request.user)
+            .only("profile_picture", "picture_hash")
+            .first()
+        )
+        if profile is None or not profile.owns_media(path):
+            raise Http404("File not found.")
+
+    # Thumbnails are named by content hash, so they never change.
+    if path.startswith(f"{THUMBNAIL_DIR}/"):
+        cache_control = "private, max-age=31536000, immutable"
+    else:
+        cache_control = "private, max-age=3600"
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+    offload = getattr(settings, "MEDIA_OFFLOAD", "")
+    if offload:
+        # offload_file() resolves the path with safe_join() again itself.
+        return offload_file(
+            offload,
+            path,
+            settings.MEDIA_ROOT,
+            accel_prefix=getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/"),
+            cache_control=cache_control,
+        )
+    return serve_file(request, full_path, cache_control=cache_control)
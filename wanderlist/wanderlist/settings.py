@@ -60,6 +60,7 @@ INSTALLED_APPS = [
 # ⚙️ MIDDLEWARE
 # ==========================================
 MIDDLEWARE = [
+    "accounts.middleware.RequestMetricsMiddleware",  # first, so it times everything below
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -74,13 +75,18 @@ MIDDLEWARE = [
 # ==========================================
 ROOT_URLCONF = "wanderlist.urls"
 WSGI_APPLICATION = "wanderlist.wsgi.application"
+ASGI_APPLICATION = "wanderlist.asgi.application"
+
+# ⚡ Route destination CRUD + login to accounts/async_views.py (use with ASGI)
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False") == "True"
 
 # ==========================================
 # 🧱 TEMPLATES
 # ==========================================
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates that also reports render time to accounts.metrics
+        "BACKEND": "accounts.metrics.TimedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -95,19 +101,162 @@ TEMPLATES = [
 ]
 
 # ==========================================
-# 🗄 DATABASE (Supabase PostgreSQL)
+# 🗄 DATABASE (Supabase PostgreSQL + optional read replicas)
 # ==========================================
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+DB_SSL_REQUIRE = os.getenv("DB_SSL_REQUIRE", "True") == "True"
+# "min,max" to use Django's psycopg connection pool (needs psycopg[pool])
+DB_POOL = os.getenv("DB_POOL", "")
+
+
+def _database(url):
+    config = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    if config["ENGINE"] == "django.db.backends.postgresql":
+        options = config.setdefault("OPTIONS", {})
+        if DB_SSL_REQUIRE:
+            options["sslmode"] = "require"
+        if DB_POOL:
+            from psycopg_pool import ConnectionPool
+
+            min_size, _, max_size = DB_POOL.partition(",")
+            options["pool"] = {
+                "min_size": int(min_size),
+                "max_size": int(max_size or min_size),
+                "check": ConnectionPool.check_connection,  # health-check on checkout
+            }
+            config["CONN_MAX_AGE"] = 0  # the pool owns connection reuse
+    return config
+
+
 DATABASES = {
-    "default": dj_database_url.config(
-        default=(
-            "postgresql://postgres.lhcupvxctvtdhobilzix:"
-            "Airetan.123@aws-1-ap-southeast-1.pooler.supabase.com:5432/postgres"
-        ),
-        conn_max_age=600,
-        ssl_require=True,
+    "default": _database(os.getenv(
+        "DATABASE_URL",
+        "postgresql://postgres.lhcupvxctvtdhobilzix:"
+        "Airetan.123@aws-1-ap-southeast-1.pooler.supabase.com:5432/postgres",
+    )),
+}
+
+# Comma-separated replica URLs become replica_0, replica_1, ... and
+# accounts.routers sends list/profile reads to them (read-your-writes
+# pinned to the primary for REPLICA_PIN_SECONDS after a write).
+DATABASE_REPLICA_URLS = [url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url]
+for _index, _url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f"replica_{_index}"] = {**_database(_url), "TEST": {"MIRROR": "default"}}
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "5"))
+DATABASE_ROUTERS = []
+if DATABASE_REPLICA_URLS:
+    DATABASE_ROUTERS.append("accounts.routers.PrimaryReplicaRouter")
+    MIDDLEWARE.insert(1, "accounts.middleware.ReplicaPinningMiddleware")
+
+# Comma-separated shard URLs become shard_0, shard_1, ... and each user's
+# destinations and travel stats live on one of them (accounts.sharding).
+# Locally: DATABASE_SHARD_URLS=sqlite:///shard0.sqlite3,sqlite:///shard1.sqlite3
+# then `manage.py migrate --database=shard_N` for each shard.
+DATABASE_SHARD_URLS = [url for url in os.getenv("DATABASE_SHARD_URLS", "").split(",") if url]
+for _index, _url in enumerate(DATABASE_SHARD_URLS):
+    DATABASES[f"shard_{_index}"] = _database(_url)
+SHARD_DIRECTORY_TTL = int(os.getenv("SHARD_DIRECTORY_TTL", "300"))  # seconds a user → shard lookup is cached
+SHARD_MOVE_GRACE_SECONDS = float(os.getenv("SHARD_MOVE_GRACE_SECONDS", "2"))  # wait for in-flight writes when freezing a move
+if DATABASE_SHARD_URLS:
+    DATABASE_ROUTERS.insert(0, "accounts.sharding.UserShardRouter")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.contrib.auth.middleware.AuthenticationMiddleware") + 1,
+        "accounts.middleware.ShardRoutingMiddleware",
     )
+
+# 🔎 Trigram/full-text search lookups (accounts/search.py) need this on Postgres
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    INSTALLED_APPS.append("django.contrib.postgres")
+
+# ==========================================
+# 🗂 CACHE (locmem | file | redis)
+# ==========================================
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "wanderlist",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / ".cache")),
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+    },
+}
+CACHES = {"default": CACHE_BACKENDS[CACHE_BACKEND]}
+
+# Rendered destination list fragments (keys are versioned per user; used only
+# with a shared CACHE_BACKEND, see SHARED_CACHE below)
+DESTINATIONS_CACHE_TIMEOUT = int(os.getenv("DESTINATIONS_CACHE_TIMEOUT", "600"))
+
+# ==========================================
+# 📊 REQUEST METRICS (accounts/metrics.py, served at /metrics/)
+# ==========================================
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+METRICS_SLOW_REQUEST_MS = int(os.getenv("METRICS_SLOW_REQUEST_MS", "500"))
+# Besides staff users, /metrics/ answers scrapers sending "Authorization: Bearer
+# <METRICS_TOKEN>" and REMOTE_ADDRs listed here. Empty by default: behind a
+# proxy on the same host every client would arrive from 127.0.0.1.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv("METRICS_ALLOWED_IPS", "").split(",") if ip]
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"accounts.metrics": {"handlers": ["console"], "level": "WARNING"}},
 }
 
+# ==========================================
+# 🔐 SESSIONS & AUTH USER (served from CACHES)
+# ==========================================
+# Write-through: sessions are read from the cache and only fall back to the
+# database on a miss. Only enabled with a shared cache (redis/file): with a
+# per-process locmem cache a logout or password change in one process would
+# not be seen by the others, so sessions and users stay in the database.
+# Switching CACHE_BACKEND between the two asks signed-in users to log in again.
+SHARED_CACHE = CACHE_BACKEND != "locmem"
+SESSION_ENGINE = os.getenv(
+    "SESSION_ENGINE",
+    "django.contrib.sessions.backends.cached_db" if SHARED_CACHE else "django.contrib.sessions.backends.db",
+)
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.CachedModelBackend" if SHARED_CACHE else "django.contrib.auth.backends.ModelBackend"
+]
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", "300"))
+
+# ==========================================
+# 🚦 LOGIN THROTTLING & PASSWORD HASHING
+# ==========================================
+def _bucket(value):
+    """Parse "burst,per_minute" into (burst, per_minute); empty disables the bucket."""
+    if not value:
+        return None
+    burst, per_minute = value.split(",")
+    return int(burst), float(per_minute)
+
+
+# Token buckets checked before any hash is computed (accounts/throttle.py).
+# Counted in the cache, so with several workers they need a shared
+# CACHE_BACKEND (check accounts.W001 warns otherwise).
+LOGIN_THROTTLE_IP = _bucket(os.getenv("LOGIN_THROTTLE_IP", "20,10"))
+LOGIN_THROTTLE_USERNAME = _bucket(os.getenv("LOGIN_THROTTLE_USERNAME", "5,2"))
+
+# Hashes run on a bounded per-process pool (accounts/hashing.py); 0 = inline
+PASSWORD_HASHERS = [
+    "accounts.hashing.BoundedPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "8"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "1.0"))
+
 # ==========================================
 # 🔑 PASSWORD VALIDATION
 # ==========================================
@@ -136,9 +285,40 @@ STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"  # ✅ for deployment (collectstatic)
 
+# 📦 Production: hashed names, .gz/.br sidecars and responsive image variants
+# (accounts/storage.py). Needs `collectstatic`, so it is off under DEBUG.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": os.getenv(
+            "STATICFILES_BACKEND",
+            "django.contrib.staticfiles.storage.StaticFilesStorage" if DEBUG
+            else "accounts.storage.CompressedManifestStaticFilesStorage",
+        ),
+    },
+}
+RESPONSIVE_IMAGE_WIDTHS = (480, 960, 1600)
+# Serve STATIC_ROOT from Django (accounts.views.static_asset) when not DEBUG
+SERVE_STATIC = os.getenv("SERVE_STATIC", str(not DEBUG)) == "True"
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Media is served by accounts.views.media_file (owner-only). In production,
+# let the proxy send the bytes: "x-accel-redirect" (nginx, with an internal
+# location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or "x-sendfile".
+MEDIA_OFFLOAD = os.getenv("MEDIA_OFFLOAD", "")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-media/")
+
+# 🏙️ Offline city gazetteer (accounts/gazetteer.py), built from a GeoNames
+# dump with `manage.py load_gazetteer cities15000.zip`. Without it, cities
+# are only trimmed and autocomplete suggests the user's own cities.
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", str(BASE_DIR / "data" / "gazetteer.idx"))
+
+# Background profile picture thumbnails (accounts/thumbnails.py)
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+THUMBNAIL_QUEUE_SIZE = int(os.getenv("THUMBNAIL_QUEUE_SIZE", "16"))
+
 # ==========================================
 # 🚪 LOGIN / LOGOUT REDIRECTS
 # ==========================================
@@ -146,6 +326,18 @@ LOGIN_URL = "/login/"
 LOGIN_REDIRECT_URL = "/destinations/"
 LOGOUT_REDIRECT_URL = "/login/"
 
+# ==========================================
+# 📌 DESTINATION LIST
+# ==========================================
+DESTINATIONS_PAGE_SIZE = int(os.getenv("DESTINATIONS_PAGE_SIZE", "25"))
+
+# Delta sync (/api/destinations/sync/): deletions are remembered this long
+# (older cursors must resync from scratch; `manage.py compact_tombstones`
+# drops the rest), and changes younger than SYNC_LAG_SECONDS wait for the
+# next sync so slow transactions can't slip behind a cursor.
+DESTINATION_TOMBSTONE_RETENTION_DAYS = int(os.getenv("DESTINATION_TOMBSTONE_RETENTION_DAYS", "30"))
+SYNC_LAG_SECONDS = float(os.getenv("SYNC_LAG_SECONDS", "2"))
+
 # ==========================================
 # 🧱 DEFAULT FIELD TYPE
 # ==========================================
@@ -1,7 +1,8 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from accounts.views import media_file, static_asset
 
 urlpatterns = [
     # ============================
@@ -14,5 +15,16 @@ urlpatterns = [
 # ============================
 # 🖼️ MEDIA FILE HANDLING (for profile pictures)
 # ============================
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Always through accounts.views.media_file so the owner check applies in
+# development too; set MEDIA_OFFLOAD to let nginx/Apache send the bytes.
+urlpatterns += [
+    re_path(r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"), media_file, name="media_file"),
+]
+
+# ============================
+# 📦 STATIC FILES (production, when no proxy serves STATIC_ROOT)
+# ============================
+if settings.SERVE_STATIC:
+    urlpatterns += [
+        re_path(r"^%s(?P<path>.*)$" % settings.STATIC_URL.lstrip("/"), static_asset, name="static_asset"),
+    ]